@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlparse, parse_qs
+
+# ================= ⚙️ BENCHMARK MOCK SERVER =================
+# A local stand-in for the parts of Google Maps and IndiaMART the scrapers touch, so benchmark.py
+# can measure them offline and reproducibly:
+#   /maps, /maps/@...              home page with #searchboxinput (typed-search fallback)
+#   /maps/search/<query>/...       results feed; more cards load on scroll from /search?tbm=map XHRs
+#                                  ("Solo ..." queries jump straight to a single place instead)
+#   /maps/place/<name>/data=...    place panel, plus the /maps/preview/place XHR Maps fires for it
+#   /search.mp?ss=..&pg=N          IndiaMART result page; the contact button fetches /ajaxrequest/pns
+# Everything is synthetic and seeded from the query, so every run sees the same places. A recorded
+# page can replace any synthetic one: save it in FIXTURES_DIR as fixture_name(<path?query>).
+PLACES_PER_SEARCH = 45       # Feed length (below category_search's MAX_RESULTS_PER_SEARCH, so the end marker shows)
+FEED_BATCH = 20              # Cards in the first render and in each scroll XHR
+PHONE_SHARE = 0.85           # Places that have a phone at all
+CARD_PHONE_SHARE = 0.6       # ...of those, shown on the feed card / in the search XHR (the rest need the panel)
+INDIAMART_CARDS = 20
+INDIAMART_PAGES = 4          # Pages past this repeat the last one, as IndiaMART does
+INDIAMART_SHOWN_SHARE = 0.3  # Cards with the number printed in the listing HTML
+SERVER_LATENCY_MS = 80       # Added to every response
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+# =============================================================
+
+NAVIGATION_KINDS = ("maps_home", "maps_search", "maps_place", "indiamart_page")
+PINCODE_RE = re.compile(r"\b[1-9]\d{5}\b")
+WORDS = ["Sri", "Durga", "Krishna", "Coastal", "Karavali", "Mangala", "Shree", "Ganesh", "Lakshmi", "Manipal", "Kodi", "Navya"]
+STREETS = ["Main Road", "Temple Street", "NH 66", "Market Road", "Station Road", "Industrial Estate"]
+XSSI = ")]}'\n"
+
+def fixture_name(path):
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+
+def _rng(*parts):
+    return random.Random(zlib.crc32("|".join(str(p) for p in parts).encode("utf-8")))
+
+def _topic(query):
+    topic = PINCODE_RE.sub("", query).replace(" in ", " ").strip()
+    return " ".join(topic.split()).title() or "Business"
+
+def make_place(query, i):
+    """The i-th synthetic place of a Maps query (deterministic)."""
+    rng = _rng("maps", query, i)
+    pin = (PINCODE_RE.findall(query) or ["576101"])[-1]
+    has_phone = rng.random() < PHONE_SHARE
+    return {
+        "name": f"{rng.choice(WORDS)} {_topic(query)} {i + 1}",
+        "cid": f"0x{rng.getrandbits(48):012x}:0x{rng.getrandbits(60):x}",
+        "place_id": "ChIJ" + "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") for _ in range(23)),
+        "category": _topic(query),
+        "locality": rng.choice(["Udupi", "Manipal", "Malpe", "Brahmavar", "Kundapura"]),
+        "address": f"{rng.randint(1, 400)}, {rng.choice(STREETS)}, Udupi, Karnataka {pin}",
+        "phone": f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}" if has_phone else "",
+        "on_card": has_phone and rng.random() < CARD_PHONE_SHARE,
+        "lat": 13.34 + rng.uniform(-0.05, 0.05),
+        "lng": 74.74 + rng.uniform(-0.05, 0.05),
+    }
+
+def place_info(place, with_phone=True):
+    """The Maps place array at the positions maps_network reads."""
+    info = [None] * 179
+    info[9] = [None, None, place["lat"], place["lng"]]
+    info[10] = place["cid"]
+    info[11] = place["name"]
+    info[13] = [place["category"]]
+    info[39] = place["address"]
+    info[78] = place["place_id"]
+    if with_phone and place["phone"]:
+        info[178] = [[place["phone"]]]
+    return info
+
+def place_href(place):
+    return f"/maps/place/{quote(place['name'])}/data=!4m2!3m1!1s{place['cid']}"
+
+def feed_card(place):
+    phone = f"<div>{escape(place['phone'])}</div>" if place["on_card"] else ""
+    return (f'<div role="article" class="Nv2PK"><a class="hfpxzc" href="{place_href(place)}" '
+            f'aria-label="{escape(place["name"])}">{escape(place["name"])}</a>'
+            f'<div>4.{len(place["name"]) % 10} ({len(place["address"])})</div>'
+            f'<div>{escape(place["category"])} · {escape(place["locality"])}</div>{phone}</div>')
+
+def place_panel(place):
+    phone = (f'<button data-item-id="phone:tel:{escape(place["phone"])}" aria-label="Phone: {escape(place["phone"])}">'
+             f'{escape(place["phone"])}</button>') if place["phone"] else ""
+    return (f'<h1 class="DUwDvf">{escape(place["name"])}</h1>'
+            f'<button jsaction="pane.rating.category">{escape(place["category"])}</button>'
+            f'<button data-item-id="address" aria-label="Address: {escape(place["address"])}">{escape(place["address"])}</button>'
+            f'{phone}')
+
+END_MARKER = '<p class="fontBodyMedium"><span><span>You\'ve reached the end of the list.</span></span></p>'
+
+FEED_PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>__TITLE__ - Google Maps</title>
+<style>#feed{height:640px;overflow-y:auto;width:400px}.Nv2PK{height:110px}.hfpxzc{display:block}
+#place{position:fixed;left:440px;top:0;width:400px}</style></head><body>
+<div role="main" id="list"><h1>Results</h1><div role="feed" id="feed">__CARDS__</div></div>
+<div role="main" id="place"></div>
+<script>
+const QUERY = __QUERY__, TOTAL = __TOTAL__, END = __END__;
+let next = __NEXT__, loading = false;
+const feed = document.getElementById("feed"), pane = document.getElementById("place");
+const esc = (s) => String(s).replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+const decode = (t) => JSON.parse(t.slice(5));
+fetch(`/search?tbm=map&q=${encodeURIComponent(QUERY)}&start=0`);
+async function more() {
+    if (loading || next >= TOTAL) return;
+    loading = true;
+    const data = decode(await (await fetch(`/search?tbm=map&q=${encodeURIComponent(QUERY)}&start=${next}`)).text());
+    feed.insertAdjacentHTML("beforeend", data[2].join(""));
+    next += data[2].length;
+    if (next >= TOTAL) feed.insertAdjacentHTML("beforeend", END);
+    loading = false;
+}
+feed.addEventListener("scroll", () => { if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 50) more(); });
+feed.addEventListener("click", async (e) => {
+    const a = e.target.closest("a[href*='/place/']");
+    if (!a) return;
+    e.preventDefault();
+    history.pushState({}, "", a.href);
+    const cid = a.href.match(/!1s([^!/?]+)/)[1];
+    const data = decode(await (await fetch(`/maps/preview/place?cid=${encodeURIComponent(cid)}`)).text());
+    pane.innerHTML = data[2];
+});
+window.addEventListener("popstate", () => { pane.innerHTML = ""; });
+</script></body></html>"""
+
+PLACE_PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>__TITLE__ - Google Maps</title></head><body>
+<div role="main" id="place">__PANEL__</div>
+<script>fetch(`/maps/preview/place?cid=${encodeURIComponent(__CID__)}`);</script></body></html>"""
+
+HOME_PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>Google Maps</title></head><body>
+<input id="searchboxinput" type="text" aria-label="Search Google Maps">
+<script>
+document.getElementById("searchboxinput").addEventListener("keydown", (e) => {
+    if (e.key === "Enter") location.href = `/maps/search/${encodeURIComponent(e.target.value)}/`;
+});
+</script></body></html>"""
+
+INDIAMART_PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>__TITLE__ - IndiaMART</title></head><body>
+<div id="results">__CARDS__</div>
+<script>
+document.addEventListener("click", async (e) => {
+    const close = e.target.closest(".close");
+    if (close) { close.closest("[role='dialog']").remove(); return; }
+    const button = e.target.closest(".m-cp-b");
+    if (!button) return;
+    const card = button.closest(".m-slr-c");
+    const data = await (await fetch(`/ajaxrequest/pns?glid=${card.dataset.glid}`)).json();
+    document.body.insertAdjacentHTML("beforeend",
+        `<div role="dialog"><span class="m-ph">${data.mobile}</span><span class="close">x</span></div>`);
+});
+</script></body></html>"""
+
+def indiamart_cards(search, page_num):
+    page_num = min(page_num, INDIAMART_PAGES)
+    cards = []
+    for i in range(INDIAMART_CARDS):
+        rng = _rng("indiamart", search, page_num, i)
+        glid = str(rng.randint(10_000_000, 99_999_999))
+        mobile = f"+91-{rng.randint(70000, 99999)}{rng.randint(10000, 99999)}"
+        cards.append({
+            "glid": glid, "mobile": mobile, "shown": rng.random() < INDIAMART_SHOWN_SHARE,
+            "name": f"{rng.choice(WORDS)} {_topic(search)} Works {page_num}-{i + 1}",
+            "address": f"{rng.choice(STREETS)}, Udupi, Karnataka 5761{rng.randint(0, 9):02d}",
+        })
+    return cards
+
+class MockServer(ThreadingHTTPServer):
+    """Serves the mock sites on 127.0.0.1; counts requests by kind."""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=SERVER_LATENCY_MS, fixtures_dir=FIXTURES_DIR):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.latency = latency_ms / 1000
+        self.fixtures_dir = fixtures_dir
+        self.places = {}  # cid -> place, for panels opened from earlier feeds
+        self.glids = {}   # glid -> mobile
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, kind):
+        with self.lock:
+            self.counts[kind] += 1
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+    def snapshot(self):
+        with self.lock:
+            counts = dict(self.counts)
+        counts["navigations"] = sum(counts.get(k, 0) for k in NAVIGATION_KINDS)
+        return counts
+
+    def remember(self, places):
+        with self.lock:
+            for place in places:
+                self.places[place["cid"]] = place
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send(self, body, content_type="text/html; charset=utf-8", status=200, headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = unquote(url.path)
+
+        fixture = os.path.join(server.fixtures_dir, fixture_name(self.path))
+        for ext, content_type in ((".html", "text/html; charset=utf-8"), (".json", "application/json")):
+            if os.path.exists(fixture + ext):
+                server.count("fixture")
+                with open(fixture + ext, encoding="utf-8") as f:
+                    return self.send(f.read(), content_type)
+
+        if path.startswith("/maps/search/"):
+            return self.maps_search(path[len("/maps/search/"):].split("/@")[0].strip("/"))
+        if path.startswith("/maps/place/"):
+            return self.maps_place(path)
+        if path == "/maps/preview/place":
+            return self.maps_preview(params.get("cid", ""))
+        if path == "/search" and params.get("tbm") == "map":
+            return self.maps_xhr(params.get("q", ""), int(params.get("start", 0)))
+        if path == "/maps" or path.startswith("/maps/@") or path == "/maps/":
+            server.count("maps_home")
+            return self.send(HOME_PAGE)
+        if path == "/search.mp":
+            return self.indiamart_page(params.get("ss", ""), int(params.get("pg", 1)))
+        if path == "/ajaxrequest/pns":
+            server.count("indiamart_xhr")
+            mobile = server.glids.get(params.get("glid", ""), "")
+            return self.send(json.dumps({"glid": params.get("glid", ""), "mobile": mobile}), "application/json")
+        server.count("not_found")
+        return self.send("not found", "text/plain", status=404)
+
+    def maps_search(self, query):
+        server = self.server
+        server.count("maps_search")
+        if query.lower().startswith("solo "):
+            place = make_place(query, 0)
+            server.remember([place])
+            return self.send("", status=302, headers={"Location": place_href(place)})
+        places = [make_place(query, i) for i in range(PLACES_PER_SEARCH)]
+        server.remember(places)
+        first = places[:FEED_BATCH]
+        page = (FEED_PAGE.replace("__TITLE__", escape(query))
+                .replace("__CARDS__", "".join(feed_card(p) for p in first) + (END_MARKER if len(first) >= len(places) else ""))
+                .replace("__QUERY__", json.dumps(query)).replace("__TOTAL__", str(len(places)))
+                .replace("__NEXT__", str(len(first))).replace("__END__", json.dumps(END_MARKER)))
+        return self.send(page)
+
+    def maps_xhr(self, query, start):
+        server = self.server
+        server.count("maps_xhr")
+        places = [make_place(query, i) for i in range(start, min(start + FEED_BATCH, PLACES_PER_SEARCH))]
+        server.remember(places)
+        payload = [query, [[None, place_info(p, with_phone=p["on_card"])] for p in places], [feed_card(p) for p in places]]
+        return self.send(XSSI + json.dumps(payload), "application/json; charset=utf-8")
+
+    def maps_place(self, path):
+        server = self.server
+        server.count("maps_place")
+        match = re.search(r"!1s([^!/?]+)", path)
+        place = server.places.get(match.group(1)) if match else None
+        if place is None:
+            place = make_place(path.split("/")[3] if len(path.split("/")) > 3 else path, 0)
+            server.remember([place])
+        page = (PLACE_PAGE.replace("__TITLE__", escape(place["name"])).replace("__PANEL__", place_panel(place))
+                .replace("__CID__", json.dumps(place["cid"])))
+        return self.send(page)
+
+    def maps_preview(self, cid):
+        server = self.server
+        server.count("maps_xhr")
+        place = server.places.get(cid)
+        if place is None:
+            return self.send(XSSI + "[]", "application/json; charset=utf-8")
+        payload = [None, [place_info(place)], place_panel(place)]
+        return self.send(XSSI + json.dumps(payload), "application/json; charset=utf-8")
+
+    def indiamart_page(self, search, page_num):
+        server = self.server
+        server.count("indiamart_page")
+        cards = indiamart_cards(search, page_num)
+        with server.lock:
+            server.glids.update((c["glid"], c["mobile"]) for c in cards)
+        html = "".join(
+            f'<div class="m-slr-c" data-glid="{c["glid"]}"><span class="m-sn">{escape(c["name"])}</span>'
+            f'<p class="m-sa">{escape(c["address"])}</p>'
+            + (f'<span class="m-ph">{c["mobile"]}</span>' if c["shown"] else "")
+            + '<span class="m-cp-b">View Mobile Number</span></div>'
+            for c in cards
+        )
+        return self.send(INDIAMART_PAGE.replace("__TITLE__", escape(search)).replace("__CARDS__", html))
+
+if __name__ == "__main__":
+    server = MockServer(port=8765).start()
+    print(f"🧪 Mock Maps / IndiaMART on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import csv
+import functools
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import bench_server
+
+# ================= ⚙️ OFFLINE BENCHMARK =================
+# Runs the scrapers against bench_server's local mock of Maps / IndiaMART, each in a fresh process
+# with a fresh work directory (cold caches, empty ledgers and lead stores), and reports:
+#   leads/min          leads with a valid phone written, per minute of wall time
+#   navigations/lead   page loads the mock served (feeds, panels, home, listing pages) per lead
+#   p50/p95 extract    latency of the scraper's extraction calls (EXTRACTION_POINTS), in ms
+#   peak RSS           Python + Chromium processes (psutil); Python alone (ru_maxrss) without it
+# `--save-baseline` stores the results in BASELINE_FILE; every later run is compared with it and
+# exits with status 1 when a metric is worse than its THRESHOLDS allowance. The rate scheduler's
+# politeness limits are lifted to BENCH_PROFILE (unless --polite), so the numbers measure the hot
+# path rather than the waits.
+#   python benchmark.py --save-baseline        # on the commit you compare against
+#   python benchmark.py                        # after a change
+#   python benchmark.py --scrapers indiamart --latency-ms 200
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+SCRAPERS = ["category_search", "map_searchmerge", "indiamart"]
+BENCH_PINCODES = ["576101", "576102"]
+BENCH_CATEGORIES = ["Rice Mill", "Cashew Factory"]
+BENCH_ENRICH_ROWS = 6      # map_searchmerge Phase 1 rows ("Solo ..." names: Maps jumps straight to the place)
+BENCH_LOCATIONS = ["Manipal", "Malpe"]
+BENCH_KEYWORDS = ["furniture"]
+BENCH_WORKERS = 2          # category_search browser contexts
+BENCH_PROFILE = {"rate": 20.0, "min_rate": 1.0, "max_rate": 50.0, "burst": 5}
+RSS_SAMPLE_EVERY = 0.25    # Seconds
+# metric: (which way is better, allowed relative regression)
+THRESHOLDS = {
+    "leads_per_minute": ("higher", 0.15),
+    "navigations_per_lead": ("lower", 0.10),
+    "p50_extract_ms": ("lower", 0.25),
+    "p95_extract_ms": ("lower", 0.30),
+    "peak_rss_mb": ("lower", 0.20),
+}
+EXTRACTION_POINTS = {
+    "category_search": ["category_search.extract_details_async", "category_search.read_feed_cards"],
+    "map_searchmerge": ["map_searchmerge.network_or_dom_details"],
+    "indiamart": ["indiamart_cards.ListingEngine.snapshot", "indiamart_cards.ListingEngine.phones",
+                  "indiamart_http.ListingClient.fetch_cards"],
+}
+# ========================================================
+
+# --- child process: one scraper against the mock ---
+def instrument(dotted, samples):
+    """Wraps module.func / module.Class.method so every call appends its latency (ms) to samples."""
+    module_name, _, attr = dotted.partition(".")
+    owner = importlib.import_module(module_name)
+    *parents, name = attr.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+    original = getattr(owner, name)
+    if inspect.iscoroutinefunction(original):
+        @functools.wraps(original)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - started) * 1000)
+    else:
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - started) * 1000)
+    setattr(owner, name, timed)
+
+def process_rss_mb():
+    """This process plus its children (Chromium), or None without psutil."""
+    if psutil is None:
+        return None
+    try:
+        me = psutil.Process(os.getpid())
+        total = me.memory_info().rss
+        for child in me.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    except psutil.Error:
+        return None
+    return total / 1048576
+
+class RssSampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = 0.0
+        self.halt = threading.Event()
+
+    def run(self):
+        while not self.halt.is_set():
+            self.peak = max(self.peak, process_rss_mb() or 0.0)
+            self.halt.wait(RSS_SAMPLE_EVERY)
+
+    def result(self):
+        """(peak MB, source)."""
+        self.halt.set()
+        if psutil is not None:
+            return self.peak, "psutil (python + chromium)"
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / (1048576 if sys.platform == "darwin" else 1024), "ru_maxrss (python only)"
+        return 0.0, "unavailable"
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+def count_leads(path, phone_column):
+    from phones import phone_key
+    if not os.path.exists(path):
+        return 0
+    with open(path, newline="", encoding="utf-8") as f:
+        return sum(1 for row in csv.DictReader(f) if phone_key(row.get(phone_column)))
+
+def run_category_search(workdir, headed):
+    import category_search as cs
+    cs.PINCODE_FILE = write_csv(os.path.join(workdir, "pincodes.csv"), ["Pincode"], [[p] for p in BENCH_PINCODES])
+    cs.SEARCH_CATEGORIES = BENCH_CATEGORIES
+    cs.PLAN_QUERIES = False  # The planner's skips depend on history; every run does the same searches
+    cs.PLACE_CACHE_FILE = os.path.join(workdir, "place_cache.db")
+    cs.QUERY_CACHE_FILE = os.path.join(workdir, "query_cache.db")
+    output = os.path.join(workdir, "category_leads.csv")
+    asyncio.run(cs.run_deep_discovery(
+        workers=BENCH_WORKERS, output_file=output, progress_file=os.path.join(workdir, "progress.txt"),
+        headless=not headed,
+    ))
+    return count_leads(output, "Contact_Number")
+
+def run_map_searchmerge(workdir, headed):
+    import map_searchmerge as ms
+    rows = [[f"Solo Traders {i + 1}", BENCH_PINCODES[i % len(BENCH_PINCODES)], "Udupi"] for i in range(BENCH_ENRICH_ROWS)]
+    ms.INPUT_CSV = write_csv(os.path.join(workdir, "input.csv"), ["EnterpriseName", "Pincode", "District"], rows)
+    ms.ZONE_FILE = write_csv(os.path.join(workdir, "zones.csv"), ["Pincode"], [[p] for p in BENCH_PINCODES])
+    ms.OUTPUT_FILE = os.path.join(workdir, "logistics_leads.csv")
+    ms.JOURNAL_FILE = ms.OUTPUT_FILE + ".journal"
+    ms.PROGRESS_FILE = os.path.join(workdir, "progress.txt")
+    ms.NEW_BUSINESS_KEYWORDS = BENCH_CATEGORIES
+    ms.PLACE_CACHE_FILE = os.path.join(workdir, "place_cache.db")
+    ms.QUERY_CACHE_FILE = os.path.join(workdir, "query_cache.db")
+    ms.HEADLESS = not headed
+    ms.run_marketing_agent()
+    return count_leads(ms.OUTPUT_FILE, "Google_Phone")
+
+def run_indiamart(workdir, headed, server_url):
+    import indiamart as im
+    im.OUTPUT_FILE = os.path.join(workdir, "indiamart_leads.csv")
+    im.PROGRESS_FILE = os.path.join(workdir, "progress.txt")
+    im.LOCATIONS = BENCH_LOCATIONS
+    im.KEYWORDS = BENCH_KEYWORDS
+    im.INDIAMART_BASE = server_url
+    im.HEADLESS = not headed
+    asyncio.run(im.run_scraper())
+    return count_leads(im.OUTPUT_FILE, "Contact")
+
+def run_child(name, server_url, workdir, result_path, headed, polite):
+    import rate_scheduler
+    import pincode_geo
+    if not polite:
+        rate_scheduler.PROFILE_OVERRIDES.update({host: dict(BENCH_PROFILE) for host in ("www.google.com", "dir.indiamart.com")})
+    pincode_geo.MAPS_BASE = server_url
+    # Never created in the workdir: no centroids, so searches use plain /maps/search URLs
+    pincode_geo.CENTROIDS_FILE = os.path.join(workdir, "centroids.csv")
+
+    samples = []
+    for dotted in EXTRACTION_POINTS[name]:
+        try:
+            instrument(dotted, samples)
+        except (ImportError, AttributeError):
+            continue
+    sampler = RssSampler()
+    sampler.start()
+    started = time.perf_counter()
+    if name == "category_search":
+        leads = run_category_search(workdir, headed)
+    elif name == "map_searchmerge":
+        leads = run_map_searchmerge(workdir, headed)
+    else:
+        leads = run_indiamart(workdir, headed, server_url)
+    seconds = time.perf_counter() - started
+    peak, rss_source = sampler.result()
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"seconds": seconds, "leads": leads, "samples": samples, "peak_rss_mb": peak,
+                   "rss_source": rss_source}, f)
+
+# --- parent process: server, children, metrics, baseline ---
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+def metrics(child, counts):
+    leads = child["leads"]
+    return {
+        "leads": leads,
+        "seconds": round(child["seconds"], 1),
+        "leads_per_minute": round(leads / (child["seconds"] / 60), 1) if child["seconds"] else 0.0,
+        "navigations_per_lead": round(counts.get("navigations", 0) / leads, 2) if leads else float(counts.get("navigations", 0)),
+        "p50_extract_ms": round(percentile(child["samples"], 0.50), 1),
+        "p95_extract_ms": round(percentile(child["samples"], 0.95), 1),
+        "extract_calls": len(child["samples"]),
+        "peak_rss_mb": round(child["peak_rss_mb"], 0),
+        "rss_source": child["rss_source"],
+        "requests": counts,
+    }
+
+def run_benchmark(name, server, headed, polite):
+    server.reset()
+    log_path = os.path.join(tempfile.gettempdir(), f"bench_{name}.log")
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        result_path = os.path.join(workdir, "result.json")
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--server", server.url,
+               "--workdir", workdir, "--result", result_path]
+        cmd += ["--headed"] if headed else []
+        cmd += ["--polite"] if polite else []
+        print(f"⏱️ {name}: running against {server.url} (log: {log_path})...", flush=True)
+        with open(log_path, "w", encoding="utf-8") as log:
+            code = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if code != 0 or not os.path.exists(result_path):
+            print(f"❌ {name} failed (exit {code}); see {log_path}")
+            return None
+        with open(result_path, encoding="utf-8") as f:
+            return metrics(json.load(f), server.snapshot())
+
+def compare(name, current, baseline):
+    """Regression messages for one scraper (empty when within THRESHOLDS)."""
+    problems = []
+    for metric, (better, allowed) in THRESHOLDS.items():
+        base, now = baseline.get(metric), current.get(metric)
+        if not base or now is None:
+            continue
+        change = (now - base) / base
+        worse = -change if better == "higher" else change
+        if worse > allowed:
+            problems.append(f"{metric} {now} vs baseline {base} ({change:+.0%}, allowed {allowed:.0%})")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark against a local mock of Maps / IndiaMART.")
+    parser.add_argument("--scrapers", nargs="+", choices=SCRAPERS, default=SCRAPERS)
+    parser.add_argument("--latency-ms", type=int, default=bench_server.SERVER_LATENCY_MS, help="Added to every mock response")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--headed", action="store_true", help="Show the browsers")
+    parser.add_argument("--polite", action="store_true", help="Keep the rate scheduler's real politeness limits")
+    parser.add_argument("--child", choices=SCRAPERS, help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.server, args.workdir, args.result, args.headed, args.polite)
+        return
+
+    settings = {"latency_ms": args.latency_ms, "polite": args.polite}
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print(f"⚠️ Baseline was taken with {baseline.get('settings')}, this run uses {settings}; comparisons are rough.")
+
+    server = bench_server.MockServer(latency_ms=args.latency_ms).start()
+    results = {}
+    regressions = 0
+    try:
+        for name in args.scrapers:
+            result = run_benchmark(name, server, args.headed, args.polite)
+            if result is None:
+                regressions += 1
+                continue
+            results[name] = result
+            print(f"📊 {name}: {result['leads']} leads in {result['seconds']}s = {result['leads_per_minute']} leads/min, "
+                  f"{result['navigations_per_lead']} navigations/lead, extract p50 {result['p50_extract_ms']} ms / "
+                  f"p95 {result['p95_extract_ms']} ms ({result['extract_calls']} calls), "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB [{result['rss_source']}]", flush=True)
+            if name in baseline.get("scrapers", {}):
+                problems = compare(name, result, baseline["scrapers"][name])
+                for problem in problems:
+                    print(f"   ⚠️ Regression: {problem}")
+                if not problems:
+                    print("   ✅ Within thresholds of the baseline.")
+                regressions += len(problems)
+    finally:
+        server.stop()
+
+    if args.save_baseline and results:
+        saved = {"settings": settings, "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "scrapers": {**(baseline.get("scrapers", {}) if baseline.get("settings") == settings else {}), **results}}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+    sys.exit(1 if regressions and not args.save_baseline else 0)
+
+if __name__ == "__main__":
+    main()
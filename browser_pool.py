@@ -0,0 +1,355 @@
+import asyncio
+import os
+import time
+from collections import Counter, deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ================= ⚙️ BROWSER / CONTEXT POOL =================
+# Owns the Chromium process and its contexts for the Maps scrapers. Instead of reopening a page
+# every N searches, each context is recycled when its health says so:
+#   - navigations  > MAX_NAVIGATIONS
+#   - JS heap      > MAX_HEAP_MB        (performance.memory of the context's page; a failed probe
+#                                         recycles too, without counting as a search error)
+#   - error rate   > MAX_ERROR_RATE     (over the last ERROR_WINDOW searches)
+#   - age          > MAX_CONTEXT_AGE
+# The whole browser is replaced (new process, old one closed once its last context is gone) when
+# the Chromium processes together use more than BROWSER_RSS_LIMIT_MB (needs psutil; skipped
+# without it). SPARES contexts are kept pre-warmed, so a swap costs no page setup time.
+MAX_NAVIGATIONS = 150
+MAX_HEAP_MB = 400
+MAX_ERROR_RATE = 0.5
+ERROR_WINDOW = 10          # Recent searches the error rate is taken over (needs at least half of them)
+MAX_CONTEXT_AGE = 45 * 60  # Seconds
+BROWSER_RSS_LIMIT_MB = 3500
+HEALTH_CHECK_EVERY = 10    # Navigations between heap / RSS probes (the other signals are checked every time)
+SPARES = 1
+# =============================================================
+
+HEAP_JS = "() => performance.memory ? performance.memory.usedJSHeapSize / 1048576 : 0"
+
+def browser_rss_mb():
+    """Resident memory of every Chromium process started by this Python process, or None without psutil."""
+    if psutil is None:
+        return None
+    total = 0
+    try:
+        for proc in psutil.Process(os.getpid()).children(recursive=True):
+            try:
+                name = proc.name().lower()
+                if "chrom" in name or "headless_shell" in name:
+                    total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    except psutil.Error:
+        return None
+    return total / 1048576
+
+class Generation:
+    """One browser process and how many contexts still live in it."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.live = 0
+        self.retired = False
+
+class PoolSlot:
+    """A context with its single working page, plus the health counters the pool recycles on."""
+
+    def __init__(self, generation, context, page):
+        self.generation = generation
+        self.context = context
+        self.page = page
+        self.created = time.monotonic()
+        self.navigations = 0
+        self.outcomes = deque(maxlen=ERROR_WINDOW)
+        self.heap_mb = 0.0  # None when the last heap probe failed (page unresponsive)
+
+    def error_rate(self):
+        if len(self.outcomes) < ERROR_WINDOW // 2:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def unhealthy(self):
+        """Reason to recycle this context, or None."""
+        if self.generation.retired:
+            return "browser_rss"
+        if self.navigations >= MAX_NAVIGATIONS:
+            return "navigations"
+        if self.heap_mb is None:
+            return "heap_probe"
+        if self.heap_mb > MAX_HEAP_MB:
+            return "heap"
+        if self.error_rate() > MAX_ERROR_RATE:
+            return "errors"
+        if time.monotonic() - self.created > MAX_CONTEXT_AGE:
+            return "age"
+        return None
+
+class _PoolStats:
+    def __init__(self):
+        self.recycles = Counter()
+        self.browser_restarts = 0
+        self.cold_swaps = 0
+        self.contexts_created = 0
+        self.peak_rss_mb = 0.0
+
+    def _rss_over_limit(self):
+        rss = browser_rss_mb()
+        if rss is None:
+            return False
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return rss > BROWSER_RSS_LIMIT_MB
+
+    def summary(self):
+        reasons = ", ".join(f"{k} {v}" for k, v in self.recycles.most_common()) or "none"
+        rss = f", peak Chromium RSS {self.peak_rss_mb:.0f} MB" if self.peak_rss_mb else ""
+        return (f"🧪 Browser pool: {self.contexts_created} contexts, recycled: {reasons}; "
+                f"{self.browser_restarts} browser restarts, {self.cold_swaps} contexts opened cold (no warm spare){rss}")
+
+class BrowserPool(_PoolStats):
+    """Async pool (category_search). setup_context / setup_page are coroutines run on every new context / page."""
+
+    def __init__(self, browser_type, launch_kwargs=None, context_kwargs=None, setup_context=None, setup_page=None,
+                 spares=SPARES):
+        super().__init__()
+        self.browser_type = browser_type
+        self.launch_kwargs = launch_kwargs or {}
+        self.context_kwargs = context_kwargs or {}
+        self.setup_context = setup_context
+        self.setup_page = setup_page
+        self.spares_wanted = spares
+        self.current = None
+        self.generations = []
+        self.spares = []
+        self.pending_spares = 0
+        self.tasks = set()
+
+    async def start(self):
+        await self._launch()
+        for _ in range(self.spares_wanted):
+            self.spares.append(await self._new_slot())
+        return self
+
+    async def _launch(self):
+        self.current = Generation(await self.browser_type.launch(**self.launch_kwargs))
+        self.generations.append(self.current)
+
+    async def _new_slot(self):
+        gen = self.current
+        context = await gen.browser.new_context(**self.context_kwargs)
+        gen.live += 1
+        if self.setup_context:
+            await self.setup_context(context)
+        page = await context.new_page()
+        if self.setup_page:
+            await self.setup_page(page)
+        self.contexts_created += 1
+        return PoolSlot(gen, context, page)
+
+    def _background(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _make_spare(self):
+        try:
+            self.spares.append(await self._new_slot())
+        except Exception as e:
+            print(f"   ⚠️ Could not pre-warm a spare context: {e}", flush=True)
+        finally:
+            self.pending_spares -= 1
+
+    def _refill(self):
+        while len(self.spares) + self.pending_spares < self.spares_wanted:
+            self.pending_spares += 1
+            self._background(self._make_spare())
+
+    async def acquire(self):
+        """A ready context: a warm spare when there is one, otherwise a freshly opened one."""
+        while self.spares:
+            slot = self.spares.pop()
+            if not slot.generation.retired:
+                break
+            self._background(self._close_slot(slot))
+        else:
+            self.cold_swaps += 1
+            slot = await self._new_slot()
+        self._refill()
+        return slot
+
+    async def _close_slot(self, slot):
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        gen = slot.generation
+        gen.live -= 1
+        if gen.retired and gen.live <= 0 and gen in self.generations:
+            self.generations.remove(gen)
+            try:
+                await gen.browser.close()
+            except Exception:
+                pass
+
+    async def _restart_browser(self):
+        old = self.current
+        old.retired = True
+        self.browser_restarts += 1
+        print(f"   🧪 Chromium over {BROWSER_RSS_LIMIT_MB} MB: starting a fresh browser.", flush=True)
+        await self._launch()
+        for slot in self.spares:
+            self._background(self._close_slot(slot))
+        self.spares = []
+        self._refill()
+
+    async def checkup(self, slot, ok=True):
+        """Call after every search. Returns the slot to keep using: the same one, or a fresh replacement."""
+        slot.navigations += 1
+        slot.outcomes.append(ok)
+        if slot.navigations % HEALTH_CHECK_EVERY == 0:
+            try:
+                slot.heap_mb = await slot.page.evaluate(HEAP_JS)
+            except Exception:
+                slot.heap_mb = None
+            if not any(g.retired for g in self.generations) and self._rss_over_limit():
+                await self._restart_browser()
+        reason = slot.unhealthy()
+        return await self.replace(slot, reason) if reason else slot
+
+    async def replace(self, slot, reason="error"):
+        """Swaps a slot for a warm one now; the old context is closed in the background."""
+        self.recycles[reason] += 1
+        fresh = await self.acquire()
+        self._background(self._close_slot(slot))
+        return fresh
+
+    async def release(self, slot):
+        """Hands a slot back for good (worker finished)."""
+        await self._close_slot(slot)
+
+    async def close(self):
+        for slot in self.spares:
+            await self._close_slot(slot)
+        self.spares = []
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+        for gen in list(self.generations):
+            try:
+                await gen.browser.close()
+            except Exception:
+                pass
+        self.generations = []
+
+class SyncBrowserPool(_PoolStats):
+    """Sync pool (map_searchmerge). Same health rules; the spare is re-warmed right after each swap."""
+
+    def __init__(self, browser_type, launch_kwargs=None, context_kwargs=None, setup_context=None, setup_page=None,
+                 spares=SPARES):
+        super().__init__()
+        self.browser_type = browser_type
+        self.launch_kwargs = launch_kwargs or {}
+        self.context_kwargs = context_kwargs or {}
+        self.setup_context = setup_context
+        self.setup_page = setup_page
+        self.spares_wanted = spares
+        self.current = None
+        self.generations = []
+        self.spares = []
+
+    def start(self):
+        self._launch()
+        self._refill()
+        return self
+
+    def _launch(self):
+        self.current = Generation(self.browser_type.launch(**self.launch_kwargs))
+        self.generations.append(self.current)
+
+    def _new_slot(self):
+        gen = self.current
+        context = gen.browser.new_context(**self.context_kwargs)
+        gen.live += 1
+        if self.setup_context:
+            self.setup_context(context)
+        page = context.new_page()
+        if self.setup_page:
+            self.setup_page(page)
+        self.contexts_created += 1
+        return PoolSlot(gen, context, page)
+
+    def _refill(self):
+        while len(self.spares) < self.spares_wanted:
+            try:
+                self.spares.append(self._new_slot())
+            except Exception as e:
+                print(f"   ⚠️ Could not pre-warm a spare context: {e}", flush=True)
+                return
+
+    def acquire(self):
+        slot = self.spares.pop() if self.spares else None
+        if slot is None:
+            self.cold_swaps += 1
+            slot = self._new_slot()
+        return slot
+
+    def _close_slot(self, slot):
+        try:
+            slot.context.close()
+        except Exception:
+            pass
+        gen = slot.generation
+        gen.live -= 1
+        if gen.retired and gen.live <= 0 and gen in self.generations:
+            self.generations.remove(gen)
+            try:
+                gen.browser.close()
+            except Exception:
+                pass
+
+    def _restart_browser(self):
+        self.current.retired = True
+        self.browser_restarts += 1
+        print(f"   🧪 Chromium over {BROWSER_RSS_LIMIT_MB} MB: starting a fresh browser.", flush=True)
+        self._launch()
+        for slot in self.spares:
+            self._close_slot(slot)
+        self.spares = []
+
+    def checkup(self, slot, ok=True):
+        slot.navigations += 1
+        slot.outcomes.append(ok)
+        if slot.navigations % HEALTH_CHECK_EVERY == 0:
+            try:
+                slot.heap_mb = slot.page.evaluate(HEAP_JS)
+            except Exception:
+                slot.heap_mb = None
+            if not any(g.retired for g in self.generations) and self._rss_over_limit():
+                self._restart_browser()
+        reason = slot.unhealthy()
+        return self.replace(slot, reason) if reason else slot
+
+    def replace(self, slot, reason="error"):
+        """Hands out the warm spare, closes the old context, then warms the next spare."""
+        self.recycles[reason] += 1
+        fresh = self.acquire()
+        self._close_slot(slot)
+        self._refill()
+        return fresh
+
+    def release(self, slot):
+        self._close_slot(slot)
+
+    def close(self):
+        for slot in self.spares:
+            self._close_slot(slot)
+        self.spares = []
+        for gen in list(self.generations):
+            try:
+                gen.browser.close()
+            except Exception:
+                pass
+        self.generations = []
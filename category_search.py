@@ -1,15 +1,31 @@
+import asyncio
 import pandas as pd
 import os
-import time
 import re
-from urllib.parse import quote
-from playwright.sync_api import sync_playwright
+import time
+from collections import deque
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+from maps_network import PlaceCapture, merge_details
+from place_extractor import extract_details_async
+import request_blocking
+from lead_store import open_store
+from task_ledger import TaskLedger
+from place_cache import PlaceCache, cache_key, PLACE_CACHE_FILE
+from query_cache import QueryCache, QUERY_CACHE_FILE
+from feed_scroller import FeedScroller
+from rate_scheduler import RateScheduler
+from browser_pool import BrowserPool
+from query_planner import QueryPlanner, PlannedTasks
+from pincode_geo import PincodeZone
+from stage_metrics import StageMetrics
 
 # ================= ⚙️ CONFIGURATION =================
 PINCODE_FILE = "/Users/apple/Desktop/webscrape/operationalpincodesudupi.csv"
 OUTPUT_FILE = "/Users/apple/Desktop/webscrape/results/category_discovery_leads.csv"
 # Header row order: category, name, location, address, pincode, contact number
 OUTPUT_COLUMNS = ["Category", "Name", "Location", "Address", "Pincode", "Contact_Number"]
+PROGRESS_FILE = "/Users/apple/Desktop/webscrape/results/category_discovery_progress.txt"  # Task ledger for resume (delete to start a fresh sweep)
+STORE_BACKEND = "sqlite"      # "sqlite" (indexed, WAL; OUTPUT_FILE exported at the end) or "csv" (append to OUTPUT_FILE)
 
 # FULL LIST OF CATEGORIES
 SEARCH_CATEGORIES = [
@@ -25,65 +41,363 @@ SEARCH_CATEGORIES = [
 
 # SETTINGS
 MAX_RESULTS_PER_SEARCH = 60   # Good balance between speed and volume
-RESTART_BROWSER_EVERY = 20    # Restart browser every 20 searches
+WORKERS = 4                   # Parallel browser contexts pulling searches from one queue (1 = old sequential run)
+HEADLESS = False              # shard_runner.py runs its shards headless
+MIN_SEARCH_INTERVAL = 3.0     # Starting gap between any two searches across ALL workers (rate_scheduler adapts it)
+MAPS_HOST = "www.google.com"
+FEED_FIRST = True             # Harvest results-feed cards in one pass; open the detail panel only when a card has no phone
+NETWORK_FIRST = True          # Use place records decoded from Maps XHR responses before any DOM scraping
+BLOCK_POLICY = "fast"         # request_blocking policy: "off", "lite" or "fast" (no tiles/images/fonts/analytics)
+PLACE_CACHE_TTL_DAYS = 14     # Cached place details younger than this skip the detail-panel visit
+LEDGER_EVERY = 10             # Listings between ledger checkpoints (store is flushed first, so no lead is lost)
+PLAN_QUERIES = True           # query_planner: skip saturated searches, run the rest by expected new places
 # ====================================================
 
+STEALTH_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+# Reads every result card in one round-trip. Uses the same selector as the click loop so that
+# card i lines up with page.locator("a[href*='/place/']").nth(i).
+FEED_CARDS_JS = """
+() => Array.from(document.querySelectorAll("a[href*='/place/']")).map(a => {
+    const card = a.closest("div[role='article']") || a.parentElement;
+    return {
+        href: a.href || "",
+        label: a.getAttribute("aria-label") || "",
+        text: card ? card.innerText : "",
+    };
+})
+"""
+PLACE_HREFS_JS = """() => Array.from(document.querySelectorAll("a[href*='/place/']")).map(a => a.href || "")"""
+FEED_PHONE_RE = re.compile(r'((\+91|0)\s?\d{2,5}[\s-]?\d{5,8})')
+RATING_RE = re.compile(r'^\d(\.\d)?\s*\(')
+
 # Ensure output directory exists
 os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
-def extract_details(page):
+async def extract_details(page):
     """Extracts Name, Category, Address, Location, Contact_Number from Business Detail view."""
+    await asyncio.sleep(0.3)
+    return await extract_details_async(page)
+
+def parse_feed_card(raw):
+    """Turns one FEED_CARDS_JS entry into the extract_details dict (address is the card's short locality)."""
     data = {"Name": "N/A", "Phone": "Not Found", "Category": "N/A", "Address": "N/A"}
+    lines = [l.strip() for l in (raw.get("text") or "").split("\n") if l.strip()]
+    name = (raw.get("label") or "").strip() or (lines[0] if lines else "")
+    if name and "Results" not in name and len(name) < 200:
+        data["Name"] = name
+    for line in lines:
+        if data["Phone"] == "Not Found":
+            match = FEED_PHONE_RE.search(line)
+            if match:
+                data["Phone"] = match.group(0).strip()
+        if data["Category"] == "N/A" and "·" in line and not RATING_RE.match(line):
+            parts = [p.strip() for p in line.split("·") if p.strip() and p.strip() != "₹"]
+            if parts and not FEED_PHONE_RE.search(parts[0]):
+                data["Category"] = parts[0]
+                if len(parts) > 1:
+                    data["Address"] = parts[-1]
+    return data
+
+async def read_feed_cards(page):
     try:
-        # NAME — try several selectors (Maps sometimes uses different structure)
-        try:
-            time.sleep(0.3)
-            for selector in ["div[role='main'] h1", "h1.DUwDvf", "h1", "div[role='main'] [class*='fontHeadline']"]:
-                loc = page.locator(selector).first
-                if loc.count() > 0:
-                    text = loc.inner_text()
-                    if text and "Results" not in text and len(text) < 200:
-                        data["Name"] = text.strip()
-                        break
-            if data["Name"] == "N/A":
-                main = page.locator("div[role='main']")
-                if main.count() > 0:
-                    first_line = (main.inner_text() or "").split("\n")[0].strip()
-                    if first_line and "Results" not in first_line and len(first_line) < 200:
-                        data["Name"] = first_line
-        except Exception:
-            pass
+        return await page.evaluate(FEED_CARDS_JS)
+    except Exception:
+        return []
+
+async def read_place_hrefs(page):
+    try:
+        return await page.evaluate(PLACE_HREFS_JS)
+    except Exception:
+        return []
+
+async def open_and_extract(page, i, capture=None, href=None):
+    # CLICK
+    await page.locator("a[href*='/place/']").nth(i).click()
+
+    # WAIT FOR DETAILS (Critical Step)
+    # We wait for the H1 title to change from "Results" to the business name
+    try:
+        await page.wait_for_selector("div[role='main'] h1", timeout=3000)
+        await asyncio.sleep(0.5) # Slight buffer
+    except: pass
+
+    # GET DATA — the place-preview XHR fired by the click is the primary source
+    if capture is not None:
+        record = capture.lookup(href=href)
+        if record and record["Phone"] != "Not Found":
+            return record
+        return merge_details(record, await extract_details(page)) if record else await extract_details(page)
+    return await extract_details(page)
+
+def load_pincodes():
+    zone_df = pd.read_csv(PINCODE_FILE)
+    cols = [str(c).strip().lower() for c in zone_df.columns]
+    zone_df.columns = cols
+    pincode_col = next((c for c in cols if 'pincode' in c), cols[0])
+    return zone_df[pincode_col].dropna().astype(str).str.replace(".0", "", regex=False).unique().tolist()
+
+class LeadSink:
+    """Single writer for all workers. The store's dedup check and insert run without an `await`
+    in between, so on one event loop no two workers can interleave or duplicate a row."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def save(self, details, pincode):
+        # Build row: category, name, location, address, pincode, contact number (header at top)
+        row = {
+            "Category": details["Category"],
+            "Name": details["Name"],
+            "Location": details["Address"],
+            "Address": details["Address"],
+            "Pincode": pincode,
+            "Contact_Number": details["Phone"],
+            "Place_Id": details.get("Place_Id", ""),
+        }
+        return self.store.add(row)
+
+class QueueTasks:
+    """Default task source: the (pincode, category) searches of this process, in order.
+    shard_runner.SharedTasks has the same interface and claims tasks from a shared store instead."""
+
+    def __init__(self, items):
+        self.items = deque(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    async def next(self):
+        return self.items.popleft() if self.items else None
+
+    def retry(self, item):
+        self.items.append(item)
+
+    def complete(self, item):
+        pass
+
+class DiscoveryRun:
+    """State shared by all workers of one run."""
+
+    def __init__(self, tasks, sink, ledger, scheduler, block_stats, place_cache, query_cache, scroller):
+        self.tasks = tasks
+        self.sink = sink
+        self.ledger = ledger
+        self.scheduler = scheduler
+        self.block_stats = block_stats
+        self.place_cache = place_cache
+        self.query_cache = query_cache
+        self.scroller = scroller
+        self.pool = None
+        self.planner = None
+        self.zone = None
+        self.metrics = None
+
+async def scrape_search(page, tag, pincode, category, run, capture=None):
+    search_term = f"{category} in {pincode}"
+    task = ("maps", pincode, category)
+    sink, ledger, place_cache, query_cache = run.sink, run.ledger, run.place_cache, run.query_cache
+    metrics = run.metrics
+    resume_from = ledger.get(*task).get("last_index", -1) + 1
+    if resume_from:
+        print(f"   {tag} ⏩ Resuming {search_term} at listing {resume_from + 1}", flush=True)
+    else:
+        print(f"   {tag} 🔎 Searching: {search_term}", flush=True)
+    if capture is not None:
+        capture.clear()
+
+    # LOAD (viewport anchored on the pincode's centroid when pincode_centroids.csv has it)
+    with metrics.span("navigate"):
+        await page.goto(run.zone.search_url(search_term, pincode), timeout=60000)
+        blocked = await run.scheduler.check_page_async(MAPS_HOST, page)
+    if blocked:
+        print(f"   {tag} 🧯 Blocked on {search_term}; will retry after the cooldown.", flush=True)
+        metrics.count("blocked")
+        return False
+
+    # WAIT
+    try:
+        with metrics.span("results_wait"):
+            await page.wait_for_selector("a[href*='/place/'], div[role='heading']:has-text('No results')", timeout=10000)
+    except:
+        print(f"   {tag} 🔸 No results: {search_term}")
+        metrics.count("no_results")
+        ledger.done(*task, scrolled=0)
+        if run.planner is not None:
+            run.planner.observe(category, pincode, [])
+        return True
 
+    # Same head as last sweep and the rest still cached? Then skip scrolling and reuse the cached tail
+    loaded_urls = await read_place_hrefs(page)
+    cached_tail = query_cache.unchanged_tail(search_term, loaded_urls, place_cache.is_fresh)
+
+    # SCROLL until MAX_RESULTS_PER_SEARCH or the end of the feed (waits on feed mutations, no fixed sleeps)
+    if cached_tail is not None:
+        prev_count = len(loaded_urls)
+        print(f"   {tag} ♻️ {search_term}: head unchanged since last sweep, reusing {len(cached_tail)} cached listings.")
+    else:
+        with metrics.span("scroll"):
+            scroll = await run.scroller.load(page, MAX_RESULTS_PER_SEARCH, start_count=len(loaded_urls))
+        prev_count = scroll["count"]
+        print(f"   {tag} 📜 {search_term}: {scroll['count']} listings in {scroll['seconds']:.1f}s "
+              f"({scroll['batches']} batches, stopped: {scroll['reason']})", flush=True)
+    print(f"   {tag} 👀 Found {prev_count} listings for {search_term}. Extracting...", flush=True)
+    ledger.start(*task, scrolled=prev_count)
+
+    # EXTRACT — sources in order: Maps XHR records, feed card text, detail panel DOM
+    with metrics.span("feed_read"):
+        raw_cards = await read_feed_cards(page) if (FEED_FIRST or capture is not None) else []
+    new_count = 0
+    addresses = []  # Where the listings really are (the planner's coverage map)
+    opened = from_feed = from_cache = 0  # This run's listings by source (a resumed task starts mid-list)
+    for i in range(resume_from, prev_count):
+        if i > resume_from and (i - resume_from) % LEDGER_EVERY == 0:
+            with metrics.span("store_flush"):
+                sink.store.flush()
+                ledger.update(*task, last_index=i - 1)
+        started = time.perf_counter()
         try:
-            phone_btn = page.locator("button[aria-label^='Phone:']")
-            if phone_btn.count() > 0:
-                raw = phone_btn.first.get_attribute("aria-label")
-                data["Phone"] = (raw or "").replace("Phone:", "").strip()
+            raw = raw_cards[i] if i < len(raw_cards) else {}
+            network = capture.lookup(href=raw.get("href"), name=raw.get("label")) if capture is not None and raw else None
+            card = parse_feed_card(raw) if FEED_FIRST and raw else None
+            known = merge_details(network, card)
+            # Outside the operational zone? Then it is not worth a panel visit
+            zone_status, place_pin = run.zone.classify(known)
+            if zone_status == "out":
+                metrics.count("out_of_zone")
+                continue
+            key = cache_key(raw.get("href"), (known or {}).get("Place_Id"))
+            if known and known["Phone"] != "Not Found":
+                details = known
+                from_feed += 1
+                place_cache.put(key, details)
             else:
-                main_text = page.locator("div[role='main']").inner_text()
-                match = re.search(r'((\+91|0)?\s?\d{5}\s?\d{5})', main_text)
-                if match:
-                    data["Phone"] = match.group(0).strip()
-        except: pass
+                cached = place_cache.get(key)
+                if cached:
+                    details = merge_details(cached, known)
+                    metrics.count("cached")
+                    from_cache += 1
+                else:
+                    # A panel click is a Maps navigation: same rate limit and block check as a search
+                    with metrics.span("rate_wait"):
+                        allowed = await run.scheduler.wait_async(MAPS_HOST)
+                    if allowed:
+                        with metrics.span("panel"):
+                            details = merge_details(await open_and_extract(page, i, capture, raw.get("href")), known)
+                            blocked = await run.scheduler.check_page_async(MAPS_HOST, page)
+                    if not allowed or blocked:
+                        print(f"   {tag} 🧯 Stopped {search_term} at listing {i + 1}; will resume there later.", flush=True)
+                        metrics.count("blocked" if allowed else "halted")
+                        sink.store.flush()
+                        ledger.update(*task, last_index=i - 1)
+                        return False
+                    place_cache.put(key, details)
+                    opened += 1
 
-        try:
-            cat_btn = page.locator("button[jsaction*='category']")
-            if cat_btn.count() > 0:
-                data["Category"] = cat_btn.first.inner_text()
-        except: pass
+            if zone_status == "unknown":
+                zone_status, place_pin = run.zone.classify(details)
+                if zone_status == "out":
+                    metrics.count("out_of_zone")
+                    continue
+            addresses.append(details.get("Address"))
+            # SAVE CHECK (accept if we have a phone; allow Name "N/A" when name selector fails)
+            if details["Phone"] != "Not Found" and details["Name"] != "Results":
+                # Filed under the pincode in its address when known (Maps ignores the searched one)
+                with metrics.span("save"):
+                    saved = sink.save(details, place_pin or pincode)
+                if saved:
+                    new_count += 1
+                    metrics.count("new_lead")
+                    print(f"   {tag} 📞 NEW: {details['Name']} | {details['Phone']}", flush=True)
+                else:
+                    metrics.count("duplicate")
+        except Exception as e:
+            metrics.count("timeout" if isinstance(e, PlaywrightTimeout) else "listing_error")
+            run.scheduler.record_error(MAPS_HOST, e)
+        finally:
+            metrics.observe("listing", time.perf_counter() - started)
 
-        try:
-            addr_btn = page.locator("button[data-item-id='address']")
-            if addr_btn.count() > 0:
-                raw = addr_btn.first.get_attribute("aria-label") or ""
-                data["Address"] = raw.replace("Address:", "").strip()
-        except: pass
-    except Exception:
-        pass
-    return data
+    # Tail of an unchanged result list: every place is fresh in the place cache
+    for url in cached_tail or []:
+        details = place_cache.get(cache_key(url))
+        if not details:
+            continue
+        zone_status, place_pin = run.zone.classify(details)
+        if zone_status == "out":
+            continue
+        addresses.append(details.get("Address"))
+        if details["Phone"] != "Not Found":
+            if sink.save(details, place_pin or pincode):
+                new_count += 1
+                metrics.count("new_lead")
+            else:
+                metrics.count("duplicate")
+
+    # Remember this result list for the next sweep
+    urls = [raw.get("href", "") for raw in raw_cards] or await read_place_hrefs(page)
+    result_urls = urls[:prev_count] + list(cached_tail or [])
+    new_places, gone_places = query_cache.record(search_term, result_urls)
+    print(f"   {tag} 🧭 {search_term}: {new_places} new / {gone_places} gone places since last sweep.")
+    if run.planner is not None:
+        own, overlap = run.planner.observe(category, pincode, result_urls, addresses)
+        print(f"   {tag} 🧮 {search_term}: {overlap:.0%} of results already found by other pincodes, {own} own.")
+
+    with metrics.span("store_flush"):
+        sink.store.flush()
+        ledger.done(*task, last_index=prev_count - 1)
+    if raw_cards:
+        print(f"   {tag} 🗂️ {search_term}: {from_feed} from feed/network, {from_cache} from the place cache, "
+              f"{opened} detail panels opened.")
+    if not new_count:
+        print(f"   {tag} 🔸 No new valid leads with phones found for {search_term}.")
+    return True
+
+async def discovery_worker(worker_id, run):
+    tag = f"[W{worker_id}]"
+    capture = PlaceCapture() if NETWORK_FIRST else None
+    slot = await run.pool.acquire()
+    if capture is not None:
+        capture.attach_async(slot.page)
+    try:
+        while True:
+            item = await run.tasks.next()
+            if item is None:
+                break
+            pincode, category = item
+
+            ok = False
+            try:
+                with run.metrics.span("rate_wait"):
+                    allowed = await run.scheduler.wait_async(MAPS_HOST)
+                if not allowed:
+                    break
+                with run.metrics.span("search", pincode=pincode, category=category):
+                    ok = await scrape_search(slot.page, tag, pincode, category, run, capture)
+                if ok:
+                    run.tasks.complete(item)
+                else:
+                    run.tasks.retry(item)  # Blocked: back of the queue, after the cooldown
+                    run.metrics.count("retry")
+            except Exception as e:
+                print(f"   {tag} ⚠️ Search Error ({category} in {pincode}): {e}")
+                run.metrics.count("timeout" if isinstance(e, PlaywrightTimeout) else "search_error")
+                run.scheduler.record_error(MAPS_HOST, e)
+                await run.scheduler.backoff_async(MAPS_HOST)
 
-def run_deep_discovery():
-    print("🤖 STARTING ROBUST DISCOVERY...", flush=True)
+            # Recycle the context when its health (navigations, heap, errors, age, browser RSS) says so
+            with run.metrics.span("pool_checkup"):
+                fresh = await run.pool.checkup(slot, ok)
+            if fresh is not slot:
+                slot = fresh
+                if capture is not None:
+                    capture.attach_async(slot.page)
+    finally:
+        await run.pool.release(slot)
+
+async def run_deep_discovery(workers=WORKERS, tasks=None, output_file=OUTPUT_FILE, progress_file=PROGRESS_FILE,
+                             headless=HEADLESS):
+    """tasks: a task source (QueueTasks / shard_runner.SharedTasks); by default every pincode x category."""
+    print(f"🤖 STARTING ROBUST DISCOVERY ({workers} workers)...", flush=True)
 
     # --- 1. SETUP ---
     if not os.path.exists(PINCODE_FILE):
@@ -92,140 +406,84 @@ def run_deep_discovery():
 
     # Load Pincodes
     try:
-        zone_df = pd.read_csv(PINCODE_FILE)
-        cols = [str(c).strip().lower() for c in zone_df.columns]
-        zone_df.columns = cols
-        pincode_col = next((c for c in cols if 'pincode' in c), cols[0])
-        pincodes = zone_df[pincode_col].dropna().astype(str).str.replace(".0", "", regex=False).unique().tolist()
+        pincodes = load_pincodes()
         print(f"✅ Loaded {len(pincodes)} Pincodes.")
     except Exception as e:
         print(f"❌ Error reading CSV: {e}")
         return
+    zone = PincodeZone(pincodes)
 
-    # Load Existing to prevent duplicates
-    existing_ids = set()
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            df = pd.read_csv(OUTPUT_FILE)
-            for _, row in df.iterrows():
-                name = str(row.get("Name", "")).strip()
-                ph = str(row.get("Contact_Number", row.get("Phone", ""))).strip()
-                if name and ph:
-                    existing_ids.add((name, ph))
-            print(f"📋 Loaded {len(existing_ids)} existing leads to avoid duplicates.")
-        except Exception:
-            pass
-
-    write_header = not os.path.exists(OUTPUT_FILE)
-    print(f"📁 Writing to: {OUTPUT_FILE} (each lead written as soon as extracted)\n")
-
-    # --- 2. BROWSER LOOP ---
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, args=["--disable-blink-features=AutomationControlled"])
-        context = browser.new_context(viewport={"width": 1280, "height": 720})
-        page = context.new_page()
-        page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-        for pin_idx, pincode in enumerate(pincodes):
-            print(f"\n📍 Scanning Zone [{pin_idx+1}/{len(pincodes)}]: {pincode}")
-            
-            for cat_idx, category in enumerate(SEARCH_CATEGORIES):
-                
-                # Restart browser to keep it fast
-                if cat_idx > 0 and cat_idx % RESTART_BROWSER_EVERY == 0:
-                    page.close()
-                    page = context.new_page()
-                    page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-                search_term = f"{category} in {pincode}"
-                print(f"   🔎 Searching: {search_term}")
-
-                try:
-                    # LOAD
-                    page.goto("https://www.google.com/maps/search/" + quote(search_term), timeout=60000)
-                    
-                    # WAIT
-                    try:
-                        page.wait_for_selector("a[href*='/place/'], div[role='heading']:has-text('No results')", timeout=10000)
-                    except:
-                        print("      🔸 No results.")
-                        continue
-
-                    # SCROLL (Wait a bit longer to ensure loading)
-                    print("      📜 Scrolling...", end="", flush=True)
-                    prev_count = 0
-                    same_count = 0
-                    while True:
-                        try:
-                            page.hover("div[role='feed']")
-                            page.mouse.wheel(0, 5000)
-                            time.sleep(2) # Wait 2 seconds for load
-                            
-                            curr_count = page.locator("a[href*='/place/']").count()
-                            if curr_count == prev_count:
-                                same_count += 1
-                                if same_count >= 2: break 
-                            else:
-                                print(f".{curr_count}", end="", flush=True)
-                                same_count = 0
-                            
-                            prev_count = curr_count
-                            if curr_count >= MAX_RESULTS_PER_SEARCH: break
-                        except: break
-                    
-                    print(f"\n      👀 Found {prev_count} listings. Extracting...")
-
-                    # EXTRACT
-                    leads_buffer = []
-                    for i in range(prev_count):
-                        try:
-                            # CLICK
-                            item = page.locator("a[href*='/place/']").nth(i)
-                            item.click()
-                            
-                            # WAIT FOR DETAILS (Critical Step)
-                            # We wait for the H1 title to change from "Results" to the business name
-                            try:
-                                page.wait_for_selector("div[role='main'] h1", timeout=3000)
-                                time.sleep(0.5) # Slight buffer
-                            except: pass
-
-                            # GET DATA
-                            details = extract_details(page)
-                            
-                            # SAVE CHECK (accept if we have a phone; allow Name "N/A" when name selector fails)
-                            if details["Phone"] != "Not Found" and details["Name"] != "Results":
-                                uid = (details["Name"].strip(), details["Phone"].strip())
-                                if uid not in existing_ids:
-                                    existing_ids.add(uid)
-                                    leads_buffer.append(details)
-                                    # Build row: category, name, location, address, pincode, contact number (header at top)
-                                    row = {
-                                        "Category": details["Category"],
-                                        "Name": details["Name"],
-                                        "Location": details["Address"],
-                                        "Address": details["Address"],
-                                        "Pincode": pincode,
-                                        "Contact_Number": details["Phone"],
-                                    }
-                                    pd.DataFrame([row])[OUTPUT_COLUMNS].to_csv(
-                                        OUTPUT_FILE, mode="a", header=write_header, index=False
-                                    )
-                                    if write_header:
-                                        write_header = False
-                                    print(f"         📞 NEW: {details['Name']} | {details['Phone']}")
-                                    print(f"         💾 Written to CSV — refresh file to see")
-                        except Exception:
-                            pass
-
-                    if not leads_buffer:
-                        print("      🔸 No new valid leads with phones found.")
-
-                except Exception as e:
-                    print(f"      ⚠️ Search Error: {e}")
-
-        browser.close()
-        print("\n🏁 DISCOVERY COMPLETE.")
+    ledger = TaskLedger(progress_file)
+    if tasks is None:
+        # One task per (pincode, category); finished ones are skipped. Without the planner they run in the
+        # old nested-loop order, with it by expected new places (saturated ones are dropped and logged).
+        items = [(pincode, category) for pincode in pincodes for category in SEARCH_CATEGORIES]
+        pending = [item for item in items if not ledger.is_done("maps", *item)]
+        if PLAN_QUERIES:
+            tasks = PlannedTasks(pending, QueryPlanner())
+        else:
+            tasks = QueueTasks(pending)
+        print(f"📋 Queued {len(tasks)} searches ({len(items) - len(pending)} already done per {progress_file}).")
+
+    # Open the lead store; its unique index prevents duplicates
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    store = open_store(STORE_BACKEND, output_file, OUTPUT_COLUMNS, ("Name", "Contact_Number"), id_column="Place_Id")
+    sink = LeadSink(store)
+    print(f"📁 Writing to: {output_file} via {STORE_BACKEND} store\n")
+
+    run = DiscoveryRun(
+        tasks, sink, ledger,
+        RateScheduler({MAPS_HOST: {"rate": 1 / MIN_SEARCH_INTERVAL, "min_rate": 0.05, "max_rate": 0.8, "burst": 1}}),
+        request_blocking.BlockStats(BLOCK_POLICY),
+        PlaceCache(PLACE_CACHE_FILE, ttl_days=PLACE_CACHE_TTL_DAYS),
+        QueryCache(QUERY_CACHE_FILE),
+        FeedScroller(),
+    )
+    run.zone = zone
+    # Per-stage spans next to the output (shards write their own file)
+    run.metrics = StageMetrics("category_search").export_to(os.path.splitext(output_file)[0] + ".metrics.jsonl").serve()
+    if isinstance(tasks, PlannedTasks):
+        run.planner = tasks.planner
+
+    # --- 2. WORKER POOL ---
+    try:
+        async with async_playwright() as p:
+            run.pool = await BrowserPool(
+                p.chromium,
+                launch_kwargs={"headless": headless, "args": ["--disable-blink-features=AutomationControlled"]},
+                context_kwargs={"viewport": {"width": 1280, "height": 720}},
+                setup_context=lambda context: request_blocking.install_async(context, BLOCK_POLICY, run.block_stats),
+                setup_page=lambda page: page.add_init_script(STEALTH_JS),
+            ).start()
+            try:
+                await asyncio.gather(*(
+                    discovery_worker(w + 1, run)
+                    for w in range(max(1, workers))
+                ))
+            finally:
+                await run.pool.close()
+    finally:
+        # Flush the last batch and refresh the CSV view even if the run was interrupted
+        store.export_csv(output_file)
+        store.close()
+        ledger.close()
+        run.place_cache.close()
+        run.query_cache.close()
+        if run.planner is not None:
+            run.planner.close()
+        run.metrics.close()
+    print("\n🏁 DISCOVERY COMPLETE.")
+    print(run.block_stats.summary())
+    print(run.place_cache.summary())
+    print(run.query_cache.summary())
+    print(run.scroller.summary())
+    print(run.scheduler.summary())
+    print(run.zone.summary())
+    if run.planner is not None:
+        print(run.planner.summary())
+    if run.pool is not None:
+        print(run.pool.summary())
+    print(run.metrics.summary())
 
 if __name__ == "__main__":
-    run_deep_discovery()
\ No newline at end of file
+    asyncio.run(run_deep_discovery())
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+# ================= ⚙️ ENRICHMENT JOURNAL =================
+# Append-only JSON-lines log of Phase 1 results: one record per enriched row.
+#   {"i": <row index>, "Google_Phone": ..., "Google_Category": ..., "Google_Address": ..., "Source": ...,
+#    "Google_Checked": "<YYYY-MM-DD>"}
+# Every record stamps CHECKED_FIELD, which compaction writes into the CSV like the other fields, so a
+# row tried without a result ("Not Found") is skipped on resume whether or not it was compacted.
+# A checkpoint fsyncs only the records written since the last one, so its cost is independent
+# of dataset size. On resume the journal is replayed onto the loaded CSV; compact() writes the
+# merged CSV atomically and then empties the journal.
+CHECKED_FIELD = "Google_Checked"
+JOURNAL_FIELDS = ["Google_Phone", "Google_Category", "Google_Address", "Source", CHECKED_FIELD]
+# =========================================================
+
+class EnrichmentJournal:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.unsynced = 0
+
+    def record(self, df, i, **fields):
+        """Applies the fields (plus today's CHECKED_FIELD) to df row i and appends them to the journal
+        (fsynced on sync())."""
+        entry = {"i": int(i)}
+        fields.setdefault(CHECKED_FIELD, time.strftime("%Y-%m-%d"))
+        if CHECKED_FIELD not in df.columns:
+            df[CHECKED_FIELD] = ""
+        for field, value in fields.items():
+            df.at[i, field] = value
+            entry[field] = value
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.unsynced += 1
+
+    def sync(self):
+        if not self.unsynced:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def replay(self, df):
+        """Re-applies every journaled record onto df. Returns the set of row indices it touched."""
+        self.sync()
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A crash mid-write can leave one truncated last line; everything before it is intact
+                    continue
+        if not entries:
+            return set()
+        # Last value per field, as record() applied them (a later record may carry fewer fields)
+        journal_df = pd.DataFrame(entries).groupby("i", sort=False).last()
+        journal_df = journal_df[journal_df.index.isin(df.index)]
+        for field in JOURNAL_FIELDS:
+            if field in journal_df.columns:
+                values = journal_df[field].dropna()
+                if field not in df.columns:
+                    df[field] = ""
+                df[field] = df[field].astype(object)
+                df.loc[values.index, field] = values.values
+        return set(journal_df.index.tolist())
+
+    def compact(self, df, output_file):
+        """Writes the merged CSV via a temp file + rename, then truncates the journal."""
+        self.sync()
+        tmp_path = output_file + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_file)
+        self.file.close()
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.unsynced = 0
+
+    def close(self):
+        self.sync()
+        self.file.close()
@@ -0,0 +1,193 @@
+import argparse
+import re
+from difflib import SequenceMatcher
+from itertools import combinations
+
+import pandas as pd
+
+from phones import PLACEHOLDERS, STRING_DTYPE, add_source_args, normalize_phones, read_sources, to_leads
+
+# ================= ⚙️ ENTITY RESOLUTION =================
+# Fuzzy duplicate detection across every lead file ("Sri Durga Rice Mill" vs "Durga Rice Mills, Udupi").
+# Records are only compared inside blocks that share a key:
+#   P:<phone>                 same normalized number
+#   N:<pincode>|<name tokens> same pincode and identical cleaned, token-sorted name
+#   S:<pincode>|<soundex>     same pincode and one distinctive name token that sounds alike
+# Blocks larger than MAX_BLOCK are skipped (those keys are too common to be informative),
+# which keeps the whole run near-linear in the number of records.
+NAME_STOPWORDS = {
+    "sri", "shri", "shree", "sree", "the", "and", "m", "s", "ms", "pvt", "ltd", "private", "limited",
+    "co", "company", "enterprises", "enterprise", "llp", "inc", "of",
+}
+# Words too generic to block on (they still count when scoring names)
+GENERIC_TOKENS = {
+    "store", "stores", "shop", "mill", "traders", "trader", "dealer", "dealers", "service", "services",
+    "center", "centre", "agency", "agencies", "industries", "industry", "works", "udupi", "manipal",
+}
+MAX_BLOCK = 200
+NAME_MATCH = 0.88          # Name similarity needed to merge (a shared phone merges on its own)
+NAME_MATCH_OTHER_PHONE = 0.97  # Needed when both sides have phones and none is shared ...
+ADDRESS_MATCH = 0.9            # ... and then their addresses must match too (branches share names, not addresses)
+GOLDEN_COLUMNS = ["Cluster_Id", "Name", "Phone", "Other_Phones", "Category", "Address", "Pincode",
+                  "Sources", "Records"]
+# =========================================================
+
+SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"])
+                 for c in letters}
+
+def soundex(word):
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    codes = [SOUNDEX_CODES.get(c, "") for c in word]
+    out, prev = word[0], codes[0]
+    for c, code in zip(word[1:], codes[1:]):
+        if code != "0" and code != prev:
+            out += code
+        if c not in "hw":
+            prev = code
+    return (out + "000")[:4]
+
+def clean_name_tokens(name):
+    """"Sri Durga Rice Mills, Udupi" -> ["durga", "mill", "rice"] (before first comma, no stopwords, singular, sorted)."""
+    name = str(name).split(",")[0].lower()
+    tokens = re.findall(r"[a-z0-9]+", name)
+    tokens = [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t for t in tokens]
+    return sorted(t for t in tokens if t not in NAME_STOPWORDS)
+
+def clean_address(address):
+    return " ".join(re.findall(r"[a-z0-9]+", str(address).lower()))
+
+def name_similarity(a, b):
+    """Best of token-sorted string ratio and token overlap (Jaccard averaged with containment), in [0, 1]."""
+    if not a or not b:
+        return 0.0
+    ratio = SequenceMatcher(None, " ".join(a), " ".join(b)).ratio()
+    sa, sb = set(a), set(b)
+    jaccard = len(sa & sb) / len(sa | sb)
+    containment = len(sa & sb) / min(len(sa), len(sb))
+    return max(ratio, (jaccard + containment) / 2)
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+def prepare_records(frames):
+    """All sources on one schema plus the normalized fields used for blocking and scoring."""
+    records = pd.concat([to_leads(df, source) for source, df in frames], ignore_index=True)
+    records = pd.concat([records, normalize_phones(records["Phone_Raw"])], axis=1)
+    for col in ["Name", "Category", "Address", "Pincode"]:
+        records[col] = records[col].mask(records[col].str.lower().isin(PLACEHOLDERS)).fillna("")
+    records = records[records["Phone_Valid"] | records["Name"].ne("")].reset_index(drop=True)
+
+    # Pincode: the address wins (Maps often files results under the wrong search pincode)
+    from_address = records["Address"].astype(STRING_DTYPE).str.extract(r"\b([1-9]\d{5})\b", expand=False)
+    records["Pin"] = from_address.fillna(records["Pincode"].str.extract(r"([1-9]\d{5})", expand=False)).fillna("")
+
+    # Name work is done once per distinct name, not per record
+    unique_names = pd.Series(records["Name"].unique())
+    tokens = dict(zip(unique_names, unique_names.map(clean_name_tokens)))
+    records["Tokens"] = records["Name"].map(tokens)
+    records["Name_Key"] = records["Tokens"].map(" ".join)
+    return records
+
+def blocking_keys(records):
+    """Long table of (block key, record index)."""
+    parts = []
+    phone = records["Phone_E164"].astype(object)
+    parts.append(("P:" + phone[phone.ne("")]).rename("Key"))
+    named = records["Name_Key"].ne("") & records["Pin"].ne("")
+    parts.append(("N:" + records.loc[named, "Pin"] + "|" + records.loc[named, "Name_Key"]).rename("Key"))
+
+    distinctive = records.loc[named, ["Pin", "Tokens"]].explode("Tokens").dropna()
+    distinctive = distinctive[~distinctive["Tokens"].isin(GENERIC_TOKENS) & distinctive["Tokens"].str.len().ge(3)]
+    sounds = {t: soundex(t) for t in distinctive["Tokens"].unique()}
+    parts.append(("S:" + distinctive["Pin"] + "|" + distinctive["Tokens"].map(sounds)).rename("Key"))
+
+    keys = pd.concat(parts).rename_axis("Record").reset_index().drop_duplicates()
+    sizes = keys.groupby("Key")["Record"].transform("size")
+    return keys[(sizes > 1) & (sizes <= MAX_BLOCK)]
+
+def resolve(records):
+    """Cluster id per record (union of every matching pair found inside the blocks)."""
+    uf = UnionFind(len(records))
+    tokens = records["Tokens"].tolist()
+    addresses = records["Address"].map(clean_address).tolist()
+    # Phones of each cluster (by root), so a chain of name matches cannot join two numbers either
+    cluster_phones = [{p} if p else set() for p in records["Phone_E164"].tolist()]
+
+    def merge(a, b):
+        ra, rb = uf.find(a), uf.find(b)
+        uf.union(ra, rb)
+        cluster_phones[uf.find(ra)] = cluster_phones[ra] | cluster_phones[rb]
+
+    seen_pairs = set()
+    for key, members in blocking_keys(records).groupby("Key", sort=False)["Record"]:
+        members = members.tolist()
+        if key.startswith("P:"):
+            # Same number: one entity, no scoring needed
+            for other in members[1:]:
+                merge(members[0], other)
+            continue
+        for a, b in combinations(members, 2):
+            if (a, b) in seen_pairs or uf.find(a) == uf.find(b):
+                continue
+            seen_pairs.add((a, b))
+            phones_a, phones_b = cluster_phones[uf.find(a)], cluster_phones[uf.find(b)]
+            if phones_a and phones_b and not phones_a & phones_b:
+                # Different numbers: same name is not enough (branches, namesakes) — same address too
+                same_address = (addresses[a] and addresses[b]
+                                and SequenceMatcher(None, addresses[a], addresses[b]).ratio() >= ADDRESS_MATCH)
+                if same_address and name_similarity(tokens[a], tokens[b]) >= NAME_MATCH_OTHER_PHONE:
+                    merge(a, b)
+            elif name_similarity(tokens[a], tokens[b]) >= NAME_MATCH:
+                merge(a, b)
+    return pd.Series([uf.find(i) for i in range(len(records))], index=records.index)
+
+def golden_records(records, clusters):
+    """One row per cluster: best-source name/category, longest address, every phone and source."""
+    records = records.assign(Cluster=clusters.values, Address_Len=records["Address"].str.len())
+    blank = lambda col: records[col].mask(records[col].eq(""))
+    grouped = records.assign(**{c: blank(c) for c in ["Name", "Category", "Pin", "Phone"]}).groupby("Cluster", sort=False)
+    golden = grouped[["Name", "Phone", "Category", "Pin"]].first()
+    longest = records.sort_values("Address_Len", ascending=False).drop_duplicates("Cluster").set_index("Cluster")
+    golden["Address"] = longest["Address"]
+    phones = records[records["Phone_E164"].ne("")].drop_duplicates(["Cluster", "Phone_E164"])
+    golden["Other_Phones"] = phones.groupby("Cluster")["Phone"].agg(lambda s: ";".join(s.iloc[1:]))
+    sources = records.drop_duplicates(["Cluster", "Sources"])
+    golden["Sources"] = sources.groupby("Cluster")["Sources"].agg("|".join)
+    golden["Records"] = grouped.size()
+    golden = golden.rename(columns={"Pin": "Pincode"}).reset_index(drop=True)
+    golden.insert(0, "Cluster_Id", range(1, len(golden) + 1))
+    return golden[GOLDEN_COLUMNS].fillna("")
+
+def resolve_leads(frames):
+    records = prepare_records(frames)
+    if records.empty:
+        return pd.DataFrame(columns=GOLDEN_COLUMNS)
+    return golden_records(records, resolve(records))
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy-merge lead files from every scraper into golden records.")
+    parser.add_argument("output", help="Golden-record CSV to write")
+    add_source_args(parser)
+    args = parser.parse_args()
+    frames = read_sources(args)
+    total = sum(len(df) for _, df in frames)
+    golden = resolve_leads(frames)
+    golden.to_csv(args.output, index=False)
+    print(f"✅ {total} records from {len(frames)} files -> {len(golden)} entities -> {args.output}")
+
+if __name__ == "__main__":
+    main()
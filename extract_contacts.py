@@ -1,23 +1,252 @@
-import csv
+import argparse
+import os
+import re
+import sqlite3
+import time
 
-in_path = "0-3507&&15-16k.csv"
-out_path = "0-3507_contacts_10digit.csv"
+import numpy as np
+import pandas as pd
 
-with open(in_path, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    rows = list(reader)
+from phones import PLACEHOLDERS, SOURCE_SCHEMAS, national_numbers, normalize_phones, to_leads
 
-contacts = []
-for row in rows:
-    raw = row.get("Google_Phone", "").strip()
-    digits = "".join(c for c in raw if c.isdigit())
-    last10 = digits[-10:] if len(digits) >= 10 else digits
-    if last10:
-        contacts.append({"Contact": f"+91{last10}"})
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
-with open(out_path, "w", encoding="utf-8", newline="") as f:
-    w = csv.DictWriter(f, fieldnames=["Contact"])
-    w.writeheader()
-    w.writerows(contacts)
+# ================= ⚙️ CONTACT EXPORT =================
+# Streams any number of lead files into dialer / CRM import files with constant memory:
+#   inputs  -> CSV (plain or .gz) written by any scraper, or a scraper's SQLite store (.db);
+#              the scraper is recognised by its columns (phones.SOURCE_SCHEMAS)
+#   chunks  -> CHUNK_ROWS rows at a time: national numbers read as whole columns, invalid ones dropped,
+#              --category / --pincode filters applied
+#   dedup   -> by national number, kept as int64 in a sorted numpy array (8 bytes per number); only
+#              the surviving rows get full formatting (phones.normalize_phones), and only if the
+#              layout shows it
+#   output  -> CSV, JSONL or Parquet, split into shards of --shard-rows rows (0 = one file)
+# Files are read in the order given, so the first file wins for a number seen twice.
+OUTPUT_FILE = "contacts_export.csv"
+CHUNK_ROWS = 200_000
+STORE_TABLE = "leads"   # Table name used by lead_store.open_store
+LAYOUTS = {
+    "dialer": {"Contact": "Phone_E164"},
+    "crm": {"Name": "Name", "Phone": "Phone", "Phone_E164": "Phone_E164", "Phone_Kind": "Phone_Kind",
+            "Category": "Category", "Address": "Address", "Pincode": "Pincode", "Source": "Sources"},
+}
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl", ".parquet": "parquet"}
+# =====================================================
 
-print(f"Wrote {len(contacts)} contacts to {out_path}")
+PIN_RE = r"\b([1-9]\d{5})\b"
+
+class PhoneSet:
+    """Compact set of 10-digit national numbers: one sorted int64 array plus a few small sorted runs."""
+
+    def __init__(self):
+        self.sorted = np.empty(0, dtype=np.int64)
+        self.tail = []
+        self.tail_size = 0
+
+    def __len__(self):
+        return len(self.sorted) + self.tail_size
+
+    def _compact(self):
+        if self.tail:
+            merged = np.concatenate([self.sorted] + self.tail)
+            merged.sort(kind="stable")  # Sorted runs: timsort merges them in near-linear time
+            self.sorted, self.tail, self.tail_size = merged, [], 0
+
+    def add_new(self, keys):
+        """Boolean mask over keys: True for numbers not seen before (first occurrence within keys too).
+        The new numbers are added to the set."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.tail_size > max(len(self.sorted) // 8, CHUNK_ROWS):
+            self._compact()
+        seen = np.zeros(len(keys), dtype=bool)
+        if len(self.sorted):
+            pos = np.searchsorted(self.sorted, keys).clip(max=len(self.sorted) - 1)
+            seen = self.sorted[pos] == keys
+        for run in self.tail:
+            pos = np.searchsorted(run, keys).clip(max=len(run) - 1)
+            seen |= run[pos] == keys
+        _, first = np.unique(keys, return_index=True)
+        fresh = np.zeros(len(keys), dtype=bool)
+        fresh[first] = True
+        fresh &= ~seen
+        if fresh.any():
+            run = np.sort(keys[fresh])
+            self.tail.append(run)
+            self.tail_size += len(run)
+        return fresh
+
+def detect_source(columns):
+    """Which scraper wrote a file, from its phone column (phones.SOURCE_SCHEMAS)."""
+    for source, schema in SOURCE_SCHEMAS.items():
+        if schema["Phone_Raw"] in columns:
+            return source
+    raise ValueError(f"no known phone column in {list(columns)}")
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yields (source, DataFrame of str) chunks of one lead file; only the columns the export uses are read."""
+    if path.endswith((".db", ".sqlite")):
+        conn = sqlite3.connect(path)
+        try:
+            columns = [r[1] for r in conn.execute(f'PRAGMA table_info("{STORE_TABLE}")')]
+            source = detect_source(columns)
+            wanted = [c for c in SOURCE_SCHEMAS[source].values() if c and c in columns]
+            cols = ", ".join(f'"{c}"' for c in wanted)
+            for chunk in pd.read_sql_query(f'SELECT {cols} FROM "{STORE_TABLE}" ORDER BY id', conn, chunksize=chunk_rows):
+                yield source, chunk.fillna("").astype(str)
+        finally:
+            conn.close()
+        return
+    columns = pd.read_csv(path, nrows=0, compression="infer").columns
+    source = detect_source(columns)
+    wanted = [c for c in SOURCE_SCHEMAS[source].values() if c and c in columns]
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, usecols=wanted, chunksize=chunk_rows,
+                             compression="infer"):
+        yield source, chunk
+
+class ShardedWriter:
+    """Appends DataFrames to <stem>-00001<ext>, <stem>-00002<ext>, ... of shard_rows rows each
+    (a single file when shard_rows is 0)."""
+
+    def __init__(self, path, fmt, columns, shard_rows=0):
+        if fmt == "parquet" and pq is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.shard_rows = shard_rows
+        self.paths = []
+        self.handle = None
+        self.rows_in_shard = 0
+        self.rows = 0
+
+    def _open(self):
+        self._close_shard()
+        if self.shard_rows:
+            stem, ext = os.path.splitext(self.path)
+            path = f"{stem}-{len(self.paths) + 1:05d}{ext}"
+        else:
+            path = self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.paths.append(path)
+        self.rows_in_shard = 0
+        self.handle = path if self.fmt == "parquet" else open(path, "w", encoding="utf-8", newline="")
+
+    def _write_part(self, df):
+        if self.fmt == "csv":
+            df.to_csv(self.handle, header=self.rows_in_shard == 0, index=False)
+        elif self.fmt == "jsonl":
+            if len(df):
+                self.handle.write(df.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+        else:
+            schema = pa.schema([(c, pa.string()) for c in self.columns])
+            if isinstance(self.handle, str):
+                self.handle = pq.ParquetWriter(self.handle, schema)
+            self.handle.write_table(pa.Table.from_pandas(df[self.columns], schema=schema, preserve_index=False))
+        self.rows_in_shard += len(df)
+        self.rows += len(df)
+
+    def write(self, df):
+        start = 0
+        while start < len(df):
+            if self.handle is None or (self.shard_rows and self.rows_in_shard >= self.shard_rows):
+                self._open()
+            room = self.shard_rows - self.rows_in_shard if self.shard_rows else len(df)
+            self._write_part(df.iloc[start:start + room])
+            start += room
+
+    def _close_shard(self):
+        if self.handle is not None and not isinstance(self.handle, str):
+            self.handle.close()
+        self.handle = None
+
+    def close(self):
+        """Closes the last shard; with no rows at all, writes one empty file with the header."""
+        if not self.paths:
+            self._open()
+            self._write_part(pd.DataFrame(columns=self.columns, dtype=object))
+        self._close_shard()
+        return self.paths
+
+class ContactExporter:
+    """Validate -> filter -> dedup -> format -> write, one chunk at a time."""
+
+    def __init__(self, writer, layout="dialer", categories=(), pincodes=()):
+        self.writer = writer
+        self.layout = LAYOUTS[layout]
+        self.category_re = "|".join(re.escape(c) for c in categories) or None
+        self.pincodes = set(pincodes)
+        self.seen = PhoneSet()
+        self.stats = {"read": 0, "invalid": 0, "filtered": 0, "duplicates": 0, "written": 0}
+
+    def export_chunk(self, source, chunk):
+        self.stats["read"] += len(chunk)
+        leads = to_leads(chunk, source).reset_index(drop=True)
+        national, valid = national_numbers(leads["Phone_Raw"])
+        self.stats["invalid"] += int((~valid).sum())
+        leads = leads[valid]
+        leads["National"] = national[valid]
+
+        keep = pd.Series(True, index=leads.index)
+        if self.category_re:
+            keep &= leads["Category"].str.contains(self.category_re, case=False, regex=True).fillna(False)
+        if self.pincodes:
+            # Pincode column first, else the first 6-digit number in the address
+            pin = leads["Pincode"].str.extract(PIN_RE, expand=False)
+            pin = pin.fillna(leads["Address"].str.extract(PIN_RE, expand=False))
+            keep &= pin.isin(self.pincodes).fillna(False)
+        self.stats["filtered"] += int((~keep).sum())
+        leads = leads[keep]
+
+        fresh = self.seen.add_new(leads["National"].astype("int64").to_numpy())
+        self.stats["duplicates"] += int((~fresh).sum())
+        leads = leads[fresh]
+
+        if {"Phone", "Phone_Kind"} & set(self.layout.values()):
+            leads = pd.concat([leads, normalize_phones(leads["Phone_Raw"])], axis=1)
+        else:
+            leads["Phone_E164"] = "+91" + leads["National"]
+        out = pd.DataFrame({col: leads[src].astype(object).fillna("") for col, src in self.layout.items()})
+        for col in out.columns.intersection(["Name", "Category", "Address", "Pincode"]):
+            out[col] = out[col].mask(out[col].str.lower().isin(PLACEHOLDERS), "")
+        self.writer.write(out)
+        self.stats["written"] += len(out)
+
+    def export_file(self, path, chunk_rows=CHUNK_ROWS):
+        for source, chunk in read_chunks(path, chunk_rows):
+            self.export_chunk(source, chunk)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream lead files into deduplicated dialer / CRM contact files.")
+    parser.add_argument("inputs", nargs="+", help="Lead CSV (.csv / .csv.gz) or scraper store (.db); first file wins")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help=f"Output path (default {OUTPUT_FILE})")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], help="Default: from the output extension")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="dialer",
+                        help="dialer: one Contact column; crm: name, phones, category, address, pincode, source")
+    parser.add_argument("--shard-rows", type=int, default=0, help="Rows per output file (0 = a single file)")
+    parser.add_argument("--category", action="append", default=[], help="Keep categories containing this text (repeatable)")
+    parser.add_argument("--pincode", action="append", default=[], help="Keep these pincodes (repeatable, comma-separated ok)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    fmt = args.format or FORMATS.get(os.path.splitext(args.output)[1].lower(), "csv")
+    pincodes = [p.strip() for value in args.pincode for p in value.split(",") if p.strip()]
+    writer = ShardedWriter(args.output, fmt, list(LAYOUTS[args.layout]), args.shard_rows)
+    exporter = ContactExporter(writer, args.layout, args.category, pincodes)
+    started = time.perf_counter()
+    for path in args.inputs:
+        before = exporter.stats["written"]
+        exporter.export_file(path, args.chunk_rows)
+        print(f"📥 {path}: {exporter.stats['written'] - before} new contacts", flush=True)
+    paths = writer.close()
+
+    stats = exporter.stats
+    print(f"✅ {stats['read']} rows in, {stats['written']} contacts out in {time.perf_counter() - started:.1f}s "
+          f"({stats['invalid']} invalid, {stats['filtered']} filtered, {stats['duplicates']} duplicates skipped)")
+    print(f"📁 {fmt}: " + (paths[0] if len(paths) == 1 else f"{len(paths)} shards, {paths[0]} ... {paths[-1]}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import time
+
+# ================= ⚙️ RESULTS FEED SCROLLER =================
+# Loads the Maps results feed by scrolling it and then waiting *inside the page* for the next thing
+# that matters: new result cards (MutationObserver on the feed), the "end of the list" marker, or a
+# timeout. No fixed sleeps, so a fast batch costs its real load time (~0.3-1s) instead of 2s, and a
+# slow one is not mistaken for the end of the feed.
+# The timeout adapts to how long batches have actually taken (EWMA of observed waits x
+# TIMEOUT_FACTOR, clamped to MIN/MAX_TIMEOUT). STALL_LIMIT consecutive timeouts without growth end
+# the scroll (the feed sometimes needs a second nudge before the next batch arrives).
+FEED_SELECTORS = {
+    "feed": "div[role='feed']",
+    "item": "a[href*='/place/']",
+    "end": ["span.HlvSq", "p.fontBodyMedium > span > span"],
+    "end_texts": ["reached the end of the list", "end of the list"],
+}
+INITIAL_TIMEOUT = 4.0   # Seconds to wait for the first batch of a worker's first search
+MIN_TIMEOUT = 1.5
+MAX_TIMEOUT = 8.0
+TIMEOUT_FACTOR = 3.0    # Timeout = typical batch wait x this
+EWMA_ALPHA = 0.3
+STALL_LIMIT = 2
+# ============================================================
+
+# Scroll the feed once and resolve when it grows, shows the end marker, or the timeout passes
+SCROLL_AND_WAIT_JS = """
+(cfg) => new Promise((resolve) => {
+    const feed = document.querySelector(cfg.feed);
+    const count = () => document.querySelectorAll(cfg.item).length;
+    const atEnd = () => {
+        for (const sel of cfg.end) {
+            for (const el of document.querySelectorAll(sel)) {
+                const text = (el.innerText || "").toLowerCase();
+                if (cfg.end_texts.some(t => text.includes(t))) return true;
+            }
+        }
+        return false;
+    };
+    const before = count();
+    const started = performance.now();
+    if (!feed) { resolve({count: before, end: true, grew: false, waited: 0}); return; }
+    if (atEnd()) { resolve({count: before, end: true, grew: false, waited: 0}); return; }
+
+    let done = false;
+    const finish = (timedOut) => {
+        if (done) return;
+        done = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        const now = count();
+        resolve({count: now, end: atEnd(), grew: now > before, timed_out: timedOut,
+                 waited: (performance.now() - started) / 1000});
+    };
+    const observer = new MutationObserver(() => {
+        if (count() > before || atEnd()) finish(false);
+    });
+    observer.observe(feed, {childList: true, subtree: true});
+    const timer = setTimeout(() => finish(true), cfg.timeout * 1000);
+    // A small step back first so Maps sees a fresh scroll even if we are already at the bottom
+    if (cfg.nudge) feed.scrollTop = Math.max(0, feed.scrollTop - 400);
+    feed.scrollTop = feed.scrollHeight;
+})
+"""
+
+class FeedScroller:
+    """One scroller shared by all workers of a run: the adaptive timeout learns from every worker's
+    scrolls and the totals cover the whole run. Workers run on one asyncio loop and the state is only
+    updated between awaits, so no lock is needed."""
+
+    def __init__(self, selectors=None):
+        self.selectors = dict(FEED_SELECTORS, **(selectors or {}))
+        self.typical_wait = INITIAL_TIMEOUT / TIMEOUT_FACTOR
+        self.searches = 0
+        self.total_time = 0.0
+        self.total_listings = 0
+
+    @property
+    def timeout(self):
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, self.typical_wait * TIMEOUT_FACTOR))
+
+    def _observe(self, waited):
+        self.typical_wait = (1 - EWMA_ALPHA) * self.typical_wait + EWMA_ALPHA * waited
+
+    async def load(self, page, max_results, start_count=0):
+        """Scrolls until max_results listings, the end marker, or STALL_LIMIT timeouts.
+
+        Returns {"count", "seconds", "batches", "reason"} for the per-search report.
+        """
+        started = time.monotonic()
+        count, batches, stalls = start_count, 0, 0
+        reason = "max_results" if count >= max_results else ""
+        while not reason:
+            try:
+                result = await page.evaluate(
+                    SCROLL_AND_WAIT_JS, dict(self.selectors, timeout=self.timeout, nudge=stalls > 0)
+                )
+            except Exception:
+                reason = "error"
+                break
+            count = max(count, result.get("count", 0))
+            if result.get("grew"):
+                batches += 1
+                stalls = 0
+                self._observe(result.get("waited", 0.0))
+            elif result.get("timed_out"):
+                stalls += 1
+            if count >= max_results:
+                reason = "max_results"
+            elif result.get("end"):
+                reason = "end_of_list"
+            elif stalls >= STALL_LIMIT:
+                reason = "stalled"
+
+        seconds = time.monotonic() - started
+        self.searches += 1
+        self.total_time += seconds
+        self.total_listings += count
+        return {"count": count, "seconds": seconds, "batches": batches, "reason": reason}
+
+    def summary(self):
+        avg = self.total_time / self.searches if self.searches else 0.0
+        return (f"📜 Feed scroll: {self.searches} searches, {self.total_listings} listings, "
+                f"{self.total_time:.0f}s scrolling ({avg:.1f}s avg, timeout now {self.timeout:.1f}s)")
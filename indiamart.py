@@ -2,10 +2,18 @@ import asyncio
 import os
 import random
 import re
-import pandas as pd
+import time
 from datetime import datetime
 from urllib.parse import quote_plus
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+import request_blocking
+from lead_store import open_store
+from task_ledger import TaskLedger
+from rate_scheduler import RateScheduler
+from indiamart_cards import ListingEngine, CardStats, CARD_SELECTOR
+import indiamart_http
+from phones import normalize_phone
+from stage_metrics import StageMetrics
 
 try:
     from playwright_stealth import stealth_async
@@ -14,9 +22,20 @@ except ImportError:
 
 # --- CONFIGURATION ---
 OUTPUT_FILE = "udupi_hyperlocal_leads.csv"
+STORE_BACKEND = "sqlite"  # "sqlite" (indexed, WAL; OUTPUT_FILE exported at the end) or "csv" (append to OUTPUT_FILE)
+PROGRESS_FILE = "udupi_hyperlocal_progress.txt"  # Per-(location, keyword) page ledger (delete to start over)
+PAGE_PARAM = "pg"  # search.mp result page parameter (assumed, not confirmed by IndiaMART); every page is opened by URL
+PAGE_TABS = 3     # Result pages of one search fetched at once, one tab each (all requests still go through the scheduler)
+CARDS_WAIT_MS = 10000  # Max wait for result cards (or a fully loaded page without any) after DOMContentLoaded
 # Your expanded lists
 LOCATIONS = ["Manipal", "Santhekatte Udupi", "Kalyanpura", "Adi Udupi", "Shivalli Industrial Area", "Malpe", "Kunjibettu", "Brahmavara", "Ambagilu", "udupi", "manipal industrial area"]
 KEYWORDS = ["furniture"]
+BLOCK_POLICY = "lite"  # request_blocking policy: "off", "lite" (images/fonts/media/analytics) or "fast"
+INDIAMART_BASE = "https://dir.indiamart.com"  # benchmark.py points this at its local mock server
+HEADLESS = False
+INDIAMART_HOST = "dir.indiamart.com"  # Page loads and contact reveals are paced by rate_scheduler for this host
+HTTP_LISTINGS = True   # Read result pages over plain HTTP (indiamart_http); Chromium only for reveals / JS pages
+REVEAL_PHONES = True   # Open pages in the browser to reveal numbers that the listing HTML does not carry
 
 # List of User-Agents to rotate (mimics different browsers)
 USER_AGENTS = [
@@ -25,32 +44,135 @@ USER_AGENTS = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
 ]
 
+metrics = StageMetrics("indiamart")  # Per-stage spans/counters; exported next to OUTPUT_FILE by run_scraper
+
+def search_url(search_term, page_num=1):
+    url = f"{INDIAMART_BASE}/search.mp?ss={quote_plus(search_term)}"
+    return url if page_num <= 1 else f"{url}&{PAGE_PARAM}={page_num}"
+
+# Ready as soon as the first card is in the DOM; a page without cards once it has fully loaded
+CARDS_READY_JS = "(sel) => document.querySelector(sel) !== null || document.readyState === 'complete'"
+
+async def load_listing(tab, engine, scheduler, url):
+    """Opens one result page by URL. Returns its card snapshot ([] for an empty page), or None when blocked."""
+    with metrics.span("rate_wait"):
+        allowed = await scheduler.wait_async(INDIAMART_HOST)
+    if not allowed:
+        return None
+    with metrics.span("navigate"):
+        await tab.goto(url, timeout=60000, wait_until="domcontentloaded")
+    try:
+        with metrics.span("cards_wait"):
+            await tab.wait_for_function(CARDS_READY_JS, arg=CARD_SELECTOR, timeout=CARDS_WAIT_MS)
+    except PlaywrightTimeout:
+        metrics.count("timeout")
+    if await scheduler.check_page_async(INDIAMART_HOST, tab):
+        metrics.count("blocked")
+        return None
+    with metrics.span("snapshot"):
+        return await engine.snapshot()
+
 async def run_scraper():
     # Output: Name, Contact, Location, Pin only
     CSV_COLS = ["Name", "Contact", "Location", "Pin"]
-    if os.path.exists(OUTPUT_FILE):
-        existing_df = pd.read_csv(OUTPUT_FILE)
-        if list(existing_df.columns) != CSV_COLS:
-            processed_entries = set()
-        else:
-            existing_df = existing_df.drop_duplicates(subset=["Name", "Location"], keep="first")
-            existing_df.to_csv(OUTPUT_FILE, index=False)
-            processed_entries = set(existing_df['Name'].astype(str) + existing_df['Location'].astype(str))
-        print(f"Resuming: skipping {len(processed_entries)} already scraped (no duplicates).", flush=True)
-    else:
-        processed_entries = set()
-        pd.DataFrame(columns=CSV_COLS).to_csv(OUTPUT_FILE, index=False)
+    # Dedup on (Name, Location) through the store's unique index
+    store = open_store(STORE_BACKEND, OUTPUT_FILE, CSV_COLS, ("Name", "Location"))
+    if not store.is_empty():
+        print("Resuming: already scraped entries will be skipped (no duplicates).", flush=True)
+    ledger = TaskLedger(PROGRESS_FILE)
+    scheduler = RateScheduler()
+    metrics.export_to(os.path.splitext(OUTPUT_FILE)[0] + ".metrics.jsonl").serve()
+
+    # 2. ANTI-BLOCK: Use randomized User-Agent (same one for HTTP and the browser)
+    user_agent = random.choice(USER_AGENTS)
+    http = None
+    if HTTP_LISTINGS and indiamart_http.available():
+        http = indiamart_http.ListingClient(scheduler, INDIAMART_HOST, user_agent)
+    elif HTTP_LISTINGS:
+        print("ℹ️ httpx + selectolax/lxml not installed: reading every page in the browser.", flush=True)
 
     async with async_playwright() as p:
-        # Launch headed so you can see, but add anti-bot args
-        browser = await p.chromium.launch(headless=False, args=["--disable-blink-features=AutomationControlled"])
-        
-        # 2. ANTI-BLOCK: Use randomized User-Agent
-        context = await browser.new_context(user_agent=random.choice(USER_AGENTS))
-        page = await context.new_page()
-        
-        if stealth_async:
-            await stealth_async(page)
+        block_stats = request_blocking.BlockStats(BLOCK_POLICY)
+        card_stats = CardStats()
+        tabs = []
+        browsers = []
+        launch_lock = asyncio.Lock()  # Pages of one batch ask for the browser at the same time: launch it once
+
+        async def browser_tabs():
+            """Launches Chromium on first use: one tab per page fetched in parallel, each with its own
+            listing engine (contact XHR listener)."""
+            async with launch_lock:
+                if tabs:
+                    return tabs
+                started = time.perf_counter()
+                # Launch headed so you can see, but add anti-bot args
+                browser = await p.chromium.launch(headless=HEADLESS, args=["--disable-blink-features=AutomationControlled"])
+                browsers.append(browser)
+                context = await browser.new_context(user_agent=user_agent)
+                await request_blocking.install_async(context, BLOCK_POLICY, block_stats)
+                for _ in range(PAGE_TABS):
+                    tab = await context.new_page()
+                    if stealth_async:
+                        await stealth_async(tab)
+                    tabs.append((tab, ListingEngine(tab, scheduler, INDIAMART_HOST, stats=card_stats)))
+                metrics.observe("browser_launch", time.perf_counter() - started)
+            return tabs
+
+        async def snapshot_page(slot, url):
+            """("http" | "browser", cards); cards is None when the page was blocked."""
+            if http is not None:
+                with metrics.span("http_fetch"):
+                    status, cards = await http.fetch_cards(url)
+                if status == "blocked":
+                    metrics.count("blocked")
+                if status != "browser":
+                    card_stats.cards += len(cards or [])
+                    return "http", cards
+            tab, engine = (await browser_tabs())[slot]
+            return "browser", await load_listing(tab, engine, scheduler, url)
+
+        async def page_phones(via, slot, url, fresh):
+            """{card index: phone} for a page's new cards; cards left out were blocked before their reveal."""
+            if via == "browser":
+                engine = (await browser_tabs())[slot][1]
+                with metrics.span("reveal"):
+                    return await engine.phones(fresh)
+            phones = {}
+            hidden = []
+            for card in fresh:
+                phones[card["index"]] = normalize_phone(card["phone"]) if card["phone"] else "Not Found"
+                if phones[card["index"]] != "Not Found":
+                    card_stats.shown += 1
+                elif card["button"] and REVEAL_PHONES:
+                    hidden.append(card)
+                else:
+                    card_stats.missing += 1
+            if not hidden:
+                return phones
+            # Numbers behind the contact button: open the page in the browser and reveal just those cards
+            http.reveal_pages += 1
+            tab, engine = (await browser_tabs())[slot]
+            rendered = await load_listing(tab, engine, scheduler, url)
+            if rendered is None:
+                card_stats.blocked += len(hidden)
+                return phones
+            # Same (name, address) in page order: the n-th such HTML card is the n-th such rendered card
+            by_key = {}
+            for c in rendered:
+                by_key.setdefault((c["name"], c["address"]), []).append(c)
+            targets = {}
+            for card in hidden:
+                matches = by_key.get((card["name"], card["address"]))
+                if matches:
+                    targets[card["index"]] = matches.pop(0)
+                else:
+                    phones[card["index"]] = "Not Found"
+            card_stats.missing += len(hidden) - len(targets)
+            with metrics.span("reveal"):
+                revealed = await engine.phones(list(targets.values()))
+            for index, target in targets.items():
+                phones[index] = revealed.get(target["index"], "Not Found")
+            return phones
 
         def extract_pin(text):
             if not text or text == "N/A":
@@ -58,112 +180,116 @@ async def run_scraper():
             m = re.search(r"\b[1-9][0-9]{5}\b", str(text))
             return m.group(0) if m else "N/A"
 
-        def normalize_phone(raw):
-            if not raw or str(raw).strip() in ("", "N/A", "Not Found"):
-                return "Not Found"
-            s = str(raw).strip()
-            digits = re.sub(r"\D", "", s)
-            if len(digits) >= 10:
-                return digits[-10:] if len(digits) > 10 else digits
-            if len(digits) >= 6:
-                return digits
-            return s if re.search(r"\d", s) else "Not Found"
-
-        async def get_phone_from_contact_click(page, card):
-            contact_btn = await card.query_selector(".m-cp-b")
-            if not contact_btn:
-                return "Not Found"
-            await contact_btn.click()
-            await asyncio.sleep(random.uniform(1.5, 3))
-            raw = "Not Found"
-            for selector in [".m-ph", "[class*='ph']", "[class*='phone']", "a[href^='tel:']", "[class*='contact']"]:
-                try:
-                    el = await page.wait_for_selector(selector, state="visible", timeout=3000)
-                    if el:
-                        raw = await el.inner_text()
-                        if not raw:
-                            href = await el.get_attribute("href")
-                            if href and href.startswith("tel:"):
-                                raw = href.replace("tel:", "").strip()
-                        if raw and re.search(r"\d", str(raw)):
-                            break
-                except Exception:
-                    continue
-            try:
-                close_btn = await page.query_selector(".close, [aria-label='Close'], .modal-close, .popup-close, button:has-text('Close')")
-                if close_btn:
-                    await close_btn.click()
-                    await asyncio.sleep(0.5)
-            except Exception:
-                pass
-            return normalize_phone(raw)
-
         for loc in LOCATIONS:
             for kw in KEYWORDS:
                 search_term = f"{kw} in {loc}"
-                page_num = 1
-                while True:
-                    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {search_term} (page {page_num})", flush=True)
-                    try:
-                        if page_num == 1:
-                            await page.goto(f"https://dir.indiamart.com/search.mp?ss={quote_plus(search_term)}", timeout=60000)
-                        else:
-                            next_btn = None
-                            for sel in ["a[rel='next']", "a:has-text('Next')", "a.pn", ".pagination a", "a:has-text('>')"]:
-                                try:
-                                    next_btn = await page.query_selector(sel)
-                                    if next_btn:
-                                        break
-                                except Exception:
-                                    continue
-                            if not next_btn:
-                                print(f"   No more pages for {loc}. Moving to next location.", flush=True)
-                                break
-                            await next_btn.click()
-                            await asyncio.sleep(random.uniform(2, 5))
-
-                        await page.wait_for_load_state("networkidle", timeout=15000)
-                        await asyncio.sleep(2)
-
-                        cards = await page.query_selector_all(".m-slr-c")
-                        if not cards:
-                            if page_num == 1:
-                                print("   No result cards found.", flush=True)
+                task = ("indiamart", loc, kw)
+                if ledger.is_done(*task):
+                    continue
+                if scheduler.halted(INDIAMART_HOST):
+                    break
+                page_num = ledger.get(*task).get("page", 1)
+                seen = set()  # Card names of this search so far: a page of repeats means we ran past the end
+                finished = False
+                search_started = time.perf_counter()
+                while not finished and not scheduler.halted(INDIAMART_HOST):
+                    batch = list(range(page_num, page_num + PAGE_TABS))
+                    started = time.perf_counter()
+                    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] {search_term} (pages {batch[0]}-{batch[-1]})", flush=True)
+                    snapshots = await asyncio.gather(
+                        *(snapshot_page(slot, search_url(search_term, n)) for slot, n in enumerate(batch)),
+                        return_exceptions=True,
+                    )
+
+                    # Pages are accepted in order up to the first failure, block, empty or all-repeat page
+                    reveals = []
+                    failed = False
+                    for slot, (n, result) in enumerate(zip(batch, snapshots)):
+                        if isinstance(result, Exception):
+                            print(f"Error on page {n}: {result}", flush=True)
+                            metrics.count("timeout" if isinstance(result, PlaywrightTimeout) else "page_error")
+                            scheduler.record_error(INDIAMART_HOST, result)
+                            failed = True
+                            break
+                        via, cards = result
+                        if cards is None:
+                            # Retried from this page by URL once the breaker's cooldown has passed
+                            print(f"   🧯 Blocked on page {n}; retrying after the cooldown.", flush=True)
+                            break
+                        names = {c["name"] for c in cards}
+                        if not cards or names <= seen:
+                            print(f"   {'No result cards' if not cards else 'Only repeated cards'} on page {n}: end of results.", flush=True)
+                            if cards and n == 2:
+                                # Page 2 == page 1 is also what an ignored PAGE_PARAM looks like
+                                print(f"   ⚠️ Page 2 of {search_term} repeats page 1: check that IndiaMART still "
+                                      f"pages with '{PAGE_PARAM}=' or later pages are never read.", flush=True)
+                                metrics.count("page2_repeat")
+                            finished = True
                             break
+                        seen |= names
+                        fresh = [c for c in cards if not store.contains({"Name": c["name"], "Location": loc})]
+                        metrics.count("duplicate", len(cards) - len(fresh))
+                        print(f"   Page {n}: {len(cards)} cards, {len(fresh)} new.", flush=True)
+                        reveals.append((via, slot, n, fresh))
 
-                        print(f"   Found {len(cards)} cards. Extracting...", flush=True)
-                        for idx in range(len(cards)):
-                            try:
-                                card = (await page.query_selector_all(".m-slr-c"))[idx]
-                                name_elem = await card.query_selector(".m-sn")
-                                name = await name_elem.inner_text() if name_elem else "N/A"
-                                if (name + loc) in processed_entries:
-                                    continue
-
-                                addr_elem = await card.query_selector(".m-sa")
-                                address = await addr_elem.inner_text() if addr_elem else "N/A"
-                                pin = extract_pin(address)
-
-                                contact = await get_phone_from_contact_click(page, card)
-
-                                row = {"Name": name, "Contact": contact, "Location": loc, "Pin": pin}
-                                pd.DataFrame([row]).to_csv(OUTPUT_FILE, mode='a', header=False, index=False)
-                                processed_entries.add(name + loc)
-                                print(f"   SAVED: {name} | {contact}", flush=True)
-                            except Exception as e:
-                                print(f"   Skip card: {e}", flush=True)
+                    # Phones for all accepted pages at once (reveal clicks are paced by the scheduler)
+                    phones = await asyncio.gather(
+                        *(page_phones(via, slot, search_url(search_term, n), fresh) for via, slot, n, fresh in reveals),
+                        return_exceptions=True,
+                    )
+                    for (via, slot, n, fresh), found in zip(reveals, phones):
+                        if isinstance(found, Exception):
+                            print(f"Error revealing page {n}: {found}", flush=True)
+                            metrics.count("timeout" if isinstance(found, PlaywrightTimeout) else "reveal_error")
+                            scheduler.record_error(INDIAMART_HOST, found)
+                            failed = True
+                            break
+                        blocked = [card for card in fresh if card["index"] not in found]
+                        for card in fresh:
+                            if card["index"] not in found:
                                 continue
-
-                        page_num += 1
-                        await asyncio.sleep(random.uniform(1, 3))
-
-                    except Exception as e:
-                        print(f"Error: {e}", flush=True)
-                        await asyncio.sleep(60)
+                            contact = found[card["index"]]
+                            row = {"Name": card["name"], "Contact": contact, "Location": loc, "Pin": extract_pin(card["address"])}
+                            if store.add(row):
+                                metrics.count("new_lead")
+                                print(f"   SAVED: {card['name']} | {contact}", flush=True)
+                            else:
+                                metrics.count("duplicate")
+                        if blocked:
+                            # Hidden numbers not revealed yet: this page is fetched again after the cooldown
+                            print(f"   🧯 Blocked revealing {len(blocked)} numbers on page {n}; retrying after the cooldown.", flush=True)
+                            metrics.count("blocked")
+                            finished = False
+                            break
+                        page_num = n + 1
+                    with metrics.span("store_flush"):
+                        store.flush()
+                    if finished and not failed:
+                        ledger.done(*task, page=page_num)
+                    else:
+                        ledger.start(*task, page=page_num)
+                    metrics.observe("batch", time.perf_counter() - started, search=search_term, first_page=batch[0])
+                    if failed:
+                        metrics.count("retry")
+                        await scheduler.backoff_async(INDIAMART_HOST)
                         break
+                metrics.observe("search", time.perf_counter() - search_started, search=search_term)
 
-        await browser.close()
+        for browser in browsers:
+            await browser.close()
+        if http is not None:
+            await http.close()
+        store.export_csv(OUTPUT_FILE)
+        store.close()
+        ledger.close()
+        metrics.close()
         print(f"\n🏁 Finished! Data is in {OUTPUT_FILE}")
+        print(block_stats.summary())
+        print(card_stats.summary())
+        if http is not None:
+            print(http.summary())
+        print(scheduler.summary())
+        print(metrics.summary())
 
 if __name__ == "__main__":
     asyncio.run(run_scraper())
\ No newline at end of file
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import re
+
+from phones import normalize_phone, phone_key
+
+# ================= ⚙️ INDIAMART LISTING ENGINE =================
+# One result page is handled in three steps instead of one DOM round-trip (and popup poll) per card:
+#   1. snapshot: name, address, seller id and any number already printed for every card, read in
+#      a single page.evaluate;
+#   2. reveal:   the contact button is clicked inside the page (by card index) only for new cards
+#      without a number, REVEAL_CONCURRENCY at a time, each click paced by the rate scheduler;
+#   3. capture:  the number is taken from the contact XHR the click fires, matched to its card by
+#      the seller id in the request; if it has not arrived after REVEAL_TIMEOUT the card and any
+#      open popup are read once from the DOM.
+# Cards without a seller id are revealed one at a time, so an unmatched XHR can only be theirs.
+CARD_SELECTOR = ".m-slr-c"
+NAME_SELECTOR = ".m-sn"
+ADDRESS_SELECTOR = ".m-sa"
+CONTACT_BUTTON_SELECTOR = ".m-cp-b"
+PHONE_SELECTORS = ".m-ph, a[href^='tel:'], [class*='phone'], [class*='ph']"
+POPUP_SELECTORS = "[role='dialog'], .modal, .popup, [class*='popup'], [class*='Popup']"
+CLOSE_SELECTORS = ".close, [aria-label='Close'], .modal-close, .popup-close"
+CARD_ID_ATTRS = ["data-glid", "data-dispid", "data-id"]
+CONTACT_XHR_MARKERS = ("pns", "mobile", "contact", "ajax", "enq")
+PHONE_KEYS = ("pns", "mobile", "phone", "contact", "number")
+REVEAL_CONCURRENCY = 3
+REVEAL_TIMEOUT = 4.0  # Seconds to wait for a card's contact XHR before reading the DOM
+# ===============================================================
+
+PHONE_RE = re.compile(r"(?:\+?91[\s-]*|0)?[6-9]\d{4}[\s-]?\d{5}|0\d{2,4}[\s-]\d{6,8}")
+
+ENGINE_CONFIG = {
+    "card": CARD_SELECTOR, "name": NAME_SELECTOR, "address": ADDRESS_SELECTOR,
+    "button": CONTACT_BUTTON_SELECTOR, "phone": PHONE_SELECTORS, "popup": POPUP_SELECTORS,
+    "close": CLOSE_SELECTORS, "ids": CARD_ID_ATTRS,
+}
+
+# Every card in one pass: [{index, name, address, id, phone, button}]
+SNAPSHOT_JS = """(cfg) => {
+    const text = (root, sel) => { const el = root.querySelector(sel); return el ? el.innerText.trim() : ""; };
+    const cardId = (card) => {
+        for (const attr of cfg.ids) {
+            if (card.getAttribute(attr)) return card.getAttribute(attr);
+            const inner = card.querySelector(`[${attr}]`);
+            if (inner && inner.getAttribute(attr)) return inner.getAttribute(attr);
+        }
+        return "";
+    };
+    const shownPhone = (card) => {
+        for (const el of card.querySelectorAll(cfg.phone)) {
+            const href = el.getAttribute("href") || "";
+            const value = href.startsWith("tel:") ? href.slice(4) : el.innerText;
+            if (/\\d{5}/.test((value || "").replace(/\\D/g, ""))) return value.trim();
+        }
+        return "";
+    };
+    return [...document.querySelectorAll(cfg.card)].map((card, index) => ({
+        index,
+        name: text(card, cfg.name) || "N/A",
+        address: text(card, cfg.address) || "N/A",
+        id: cardId(card),
+        phone: shownPhone(card),
+        button: !!card.querySelector(cfg.button),
+    }));
+}"""
+
+CLICK_JS = """([cfg, index]) => {
+    const card = document.querySelectorAll(cfg.card)[index];
+    const button = card && card.querySelector(cfg.button);
+    if (!button) return false;
+    button.click();
+    return true;
+}"""
+
+# DOM fallback: the number shown in the card, else in a visible popup
+READ_PHONE_JS = """([cfg, index]) => {
+    const card = document.querySelectorAll(cfg.card)[index];
+    const roots = [card, ...[...document.querySelectorAll(cfg.popup)].filter(p => p.offsetParent !== null)];
+    for (const root of roots) {
+        if (!root) continue;
+        for (const el of root.querySelectorAll(cfg.phone)) {
+            const href = el.getAttribute("href") || "";
+            const value = href.startsWith("tel:") ? href.slice(4) : el.innerText;
+            if (/\\d{5}/.test((value || "").replace(/\\D/g, ""))) return value.trim();
+        }
+    }
+    return "";
+}"""
+
+CLOSE_POPUPS_JS = """(cfg) => {
+    let closed = 0;
+    for (const el of document.querySelectorAll(cfg.close)) {
+        if (el.offsetParent !== null) { el.click(); closed++; }
+    }
+    return closed;
+}"""
+
+def _phones_in(value, depth=0):
+    """Phone-like strings in a decoded JSON payload, from phone-ish keys first."""
+    if depth > 6:
+        return []
+    if isinstance(value, dict):
+        keyed = [v for k, v in value.items() if any(p in str(k).lower() for p in PHONE_KEYS)]
+        rest = [v for k, v in value.items() if not any(p in str(k).lower() for p in PHONE_KEYS)]
+        return [p for v in keyed + rest for p in _phones_in(v, depth + 1)]
+    if isinstance(value, list):
+        return [p for v in value for p in _phones_in(v, depth + 1)]
+    if isinstance(value, (str, int)):
+        return PHONE_RE.findall(str(value))
+    return []
+
+def phone_from_payload(text):
+    """Canonical phone from a contact XHR body (JSON or HTML snippet), or "Not Found"."""
+    try:
+        candidates = _phones_in(json.loads(text))
+    except ValueError:
+        candidates = PHONE_RE.findall(text or "")
+    for raw in candidates:
+        if phone_key(raw):
+            return normalize_phone(raw)
+    return "Not Found"
+
+class CardStats:
+    """Counters shared by the engines of every tab."""
+
+    def __init__(self):
+        self.cards = 0
+        self.shown = 0
+        self.from_xhr = 0
+        self.from_dom = 0
+        self.missing = 0
+        self.blocked = 0
+        self.unmatched = 0
+
+    def summary(self):
+        return (f"📇 IndiaMART cards: {self.cards} read, {self.shown} numbers already shown, "
+                f"{self.from_xhr} revealed via XHR, {self.from_dom} via DOM fallback, {self.missing} without a number"
+                + (f", {self.blocked} not revealed (page blocked)" if self.blocked else "")
+                + (f" ({self.unmatched} unmatched contact XHRs)" if self.unmatched else ""))
+
+class ContactCapture:
+    """Resolves pending reveals from contact XHR responses: pending[card id] -> future."""
+
+    def __init__(self, stats):
+        self.pending = {}
+        self.stats = stats
+
+    @staticmethod
+    def wants(response):
+        url = response.url.lower()
+        return (response.request.resource_type in ("xhr", "fetch")
+                and any(marker in url for marker in CONTACT_XHR_MARKERS))
+
+    def attach_async(self, page):
+        async def on_response(response):
+            if not self.pending or not self.wants(response):
+                return
+            try:
+                phone = phone_from_payload(await response.text())
+            except Exception:
+                return
+            if phone == "Not Found":
+                return
+            haystack = response.url + (response.request.post_data or "")
+            key = next((k for k in self.pending if k and k in haystack), None)
+            if key is None and len(self.pending) == 1:
+                key = next(iter(self.pending))
+            future = self.pending.pop(key, None) if key is not None else None
+            if future is None:
+                self.stats.unmatched += 1
+            elif not future.done():
+                future.set_result(phone)
+        page.on("response", on_response)
+
+class ListingEngine:
+    """Snapshot + concurrent XHR-captured reveals for one IndiaMART page object (async)."""
+
+    def __init__(self, page, scheduler, host, concurrency=REVEAL_CONCURRENCY, stats=None):
+        self.page = page
+        self.scheduler = scheduler
+        self.host = host
+        self.concurrency = concurrency
+        self.stats = stats or CardStats()
+        self.capture = ContactCapture(self.stats)
+        self.capture.attach_async(page)
+
+    async def snapshot(self):
+        cards = await self.page.evaluate(SNAPSHOT_JS, ENGINE_CONFIG)
+        self.stats.cards += len(cards)
+        return cards
+
+    async def _reveal(self, card, gate):
+        async with gate:
+            if not await self.scheduler.wait_async(self.host):
+                return "Not Found"
+            future = asyncio.get_running_loop().create_future()
+            self.capture.pending[card["id"]] = future
+            try:
+                if not await self.page.evaluate(CLICK_JS, [ENGINE_CONFIG, card["index"]]):
+                    self.stats.missing += 1
+                    return "Not Found"
+                try:
+                    phone = await asyncio.wait_for(future, REVEAL_TIMEOUT)
+                    self.stats.from_xhr += 1
+                    return phone
+                except asyncio.TimeoutError:
+                    pass
+                phone = normalize_phone(await self.page.evaluate(READ_PHONE_JS, [ENGINE_CONFIG, card["index"]]))
+                if phone != "Not Found":
+                    self.stats.from_dom += 1
+                else:
+                    self.stats.missing += 1
+                return phone
+            finally:
+                self.capture.pending.pop(card["id"], None)
+
+    async def phones(self, cards):
+        """{card index: phone} for the given snapshot cards; numbers already shown cost no click."""
+        result = {}
+        to_reveal = []
+        for card in cards:
+            shown = normalize_phone(card["phone"]) if card["phone"] else "Not Found"
+            if shown != "Not Found":
+                self.stats.shown += 1
+                result[card["index"]] = shown
+            elif card["button"]:
+                to_reveal.append(card)
+            else:
+                self.stats.missing += 1
+                result[card["index"]] = "Not Found"
+        ids = [c["id"] for c in to_reveal]
+        # XHRs can only be told apart by seller id: without unique ids, one reveal at a time
+        parallel = all(ids) and len(set(ids)) == len(ids)
+        gate = asyncio.Semaphore(self.concurrency if parallel else 1)
+        phones = await asyncio.gather(*(self._reveal(c, gate) for c in to_reveal), return_exceptions=True)
+        for card, phone in zip(to_reveal, phones):
+            result[card["index"]] = phone if isinstance(phone, str) else "Not Found"
+        if to_reveal:
+            try:
+                await self.page.evaluate(CLOSE_POPUPS_JS, ENGINE_CONFIG)
+            except Exception:
+                pass
+        return result
+
+    def summary(self):
+        return self.stats.summary()
@@ -0,0 +1,175 @@
+import re
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+from indiamart_cards import (
+    CARD_SELECTOR, NAME_SELECTOR, ADDRESS_SELECTOR, CONTACT_BUTTON_SELECTOR, PHONE_SELECTORS, CARD_ID_ATTRS,
+)
+from rate_scheduler import looks_blocked
+
+# ================= ⚙️ INDIAMART HTTP FAST PATH =================
+# Result pages are server-rendered, so the listing is read over one pooled keep-alive HTTP client
+# (httpx) and parsed with selectolax, or lxml when selectolax is missing — no browser involved.
+# The scraper only starts Chromium for pages that need it: new cards whose number is behind the
+# contact button, or a page that came back without cards and without IndiaMART's no-results text
+# (i.e. rendered by JavaScript). Without httpx and a parser everything goes through the browser.
+HTTP_MAX_CONNECTIONS = 8
+HTTP_MAX_KEEPALIVE = 8
+HTTP_TIMEOUT = 20.0
+BLOCK_STATUS = {403, 429, 503}
+NO_RESULTS_MARKERS = ["no results found", "no result found", "did not match any", "0 results"]
+# ===============================================================
+
+def available():
+    return httpx is not None and (HTMLParser is not None or lxml_html is not None)
+
+def _xpath(selector):
+    """The simple CSS forms used for IndiaMART cards (.cls, tag[a^='v'], [a*='v'], [a]) -> XPath."""
+    parts = []
+    for sel in selector.split(","):
+        sel = sel.strip()
+        match = re.fullmatch(r"([a-z]*)\.([\w-]+)", sel)
+        if match:
+            parts.append(f".//{match.group(1) or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {match.group(2)} ')]")
+            continue
+        match = re.fullmatch(r"([a-z]*)\[([\w-]+)(?:([\^*]?=)'([^']*)')?\]", sel)
+        if not match:
+            raise ValueError(f"unsupported selector: {sel}")
+        tag, attr, op, value = match.groups()
+        test = {None: f"@{attr}", "=": f"@{attr}='{value}'", "^=": f"starts-with(@{attr}, '{value}')",
+                "*=": f"contains(@{attr}, '{value}')"}[op]
+        parts.append(f".//{tag or '*'}[{test}]")
+    return " | ".join(parts)
+
+def _phone_value(href, text):
+    value = href[4:] if href.startswith("tel:") else text
+    return value.strip() if re.search(r"\d{5}", re.sub(r"\D", "", value or "")) else ""
+
+def _cards_selectolax(text):
+    cards = []
+    for index, node in enumerate(HTMLParser(text).css(CARD_SELECTOR)):
+        def first_text(sel):
+            found = node.css_first(sel)
+            return found.text(separator=" ", strip=True) if found else ""
+        card_id = ""
+        for attr in CARD_ID_ATTRS:
+            holder = node if node.attributes.get(attr) else node.css_first(f"[{attr}]")
+            if holder is not None and holder.attributes.get(attr):
+                card_id = holder.attributes[attr]
+                break
+        phone = next((p for p in (_phone_value(el.attributes.get("href") or "", el.text(separator=" ", strip=True))
+                                  for el in node.css(PHONE_SELECTORS)) if p), "")
+        cards.append({"index": index, "name": first_text(NAME_SELECTOR) or "N/A",
+                      "address": first_text(ADDRESS_SELECTOR) or "N/A", "id": card_id, "phone": phone,
+                      "button": node.css_first(CONTACT_BUTTON_SELECTOR) is not None})
+    return cards
+
+def _cards_lxml(text):
+    cards = []
+    tree = lxml_html.fromstring(text)
+    for index, node in enumerate(tree.xpath(_xpath(CARD_SELECTOR).replace(".//", "//"))):
+        def first_text(sel):
+            found = node.xpath(_xpath(sel))
+            return " ".join(found[0].text_content().split()) if found else ""
+        card_id = ""
+        for attr in CARD_ID_ATTRS:
+            values = [node.get(attr)] + node.xpath(f".//@{attr}")
+            card_id = next((v for v in values if v), "")
+            if card_id:
+                break
+        phone = next((p for p in (_phone_value(el.get("href") or "", " ".join(el.text_content().split()))
+                                  for el in node.xpath(_xpath(PHONE_SELECTORS))) if p), "")
+        cards.append({"index": index, "name": first_text(NAME_SELECTOR) or "N/A",
+                      "address": first_text(ADDRESS_SELECTOR) or "N/A", "id": card_id, "phone": phone,
+                      "button": bool(node.xpath(_xpath(CONTACT_BUTTON_SELECTOR)))})
+    return cards
+
+def parse_cards(text):
+    """Result page HTML -> the same card dicts as indiamart_cards.SNAPSHOT_JS."""
+    if not text:
+        return []
+    return _cards_selectolax(text) if HTMLParser is not None else _cards_lxml(text)
+
+def visible_text(text):
+    """Body text of a page without scripts and styles (what a visitor reads)."""
+    if not text:
+        return ""
+    if HTMLParser is not None:
+        tree = HTMLParser(text)
+        tree.strip_tags(["script", "style", "noscript", "template"])
+        return tree.body.text(separator=" ", strip=True) if tree.body is not None else ""
+    tree = lxml_html.fromstring(text)
+    for node in tree.xpath("//script | //style | //noscript | //template"):
+        node.drop_tree()
+    body = tree.find("body")
+    return " ".join((body if body is not None else tree).text_content().split())
+
+class ListingClient:
+    """Keep-alive client for IndiaMART result pages (async). Requests are paced by the rate scheduler."""
+
+    def __init__(self, scheduler, host, user_agent):
+        self.scheduler = scheduler
+        self.host = host
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent, "Accept-Language": "en-IN,en;q=0.9"},
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        )
+        self.pages = 0
+        self.rendered = 0      # Pages handed to the browser because they needed JavaScript
+        self.reveal_pages = 0  # Pages opened in the browser only to reveal numbers
+        self.bytes = 0
+        self.seconds = 0.0
+
+    async def fetch_cards(self, url):
+        """("ok", cards), ("blocked", None), or ("browser", None) when the page has to be rendered."""
+        if not await self.scheduler.wait_async(self.host):
+            return "blocked", None
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(url)
+        finally:
+            self.seconds += time.perf_counter() - started
+        text = response.text
+        self.pages += 1
+        self.bytes += len(response.content)
+        if response.status_code in BLOCK_STATUS or looks_blocked(str(response.url)):
+            self.scheduler.record(self.host, "blocked")
+            return "blocked", None
+        cards = parse_cards(text) if response.status_code == 200 else []
+        # Raw HTML names captcha scripts (enquiry forms load reCAPTCHA): only a page without cards
+        # whose visible text reads like a block page counts as blocked, as in the browser path
+        if not cards and looks_blocked(text=visible_text(text)[:3000]):
+            self.scheduler.record(self.host, "blocked")
+            return "blocked", None
+        self.scheduler.record(self.host, "ok")
+        if response.status_code != 200:
+            self.rendered += 1
+            return "browser", None
+        if not cards and not any(marker in text.lower() for marker in NO_RESULTS_MARKERS):
+            self.rendered += 1
+            return "browser", None
+        return "ok", cards
+
+    async def close(self):
+        await self.client.aclose()
+
+    def summary(self):
+        per_page = self.seconds / self.pages if self.pages else 0.0
+        return (f"🌐 IndiaMART HTTP: {self.pages} pages ({self.bytes / 1048576:.1f} MB, {per_page:.2f}s/page), "
+                f"{self.rendered} needed the browser to render, {self.reveal_pages} opened in it for phone reveals")
@@ -0,0 +1,230 @@
+import csv
+import os
+import re
+import shutil
+import sqlite3
+import sys
+
+from phones import phone_key
+
+# ================= ⚙️ LEAD STORAGE BACKENDS =================
+# "sqlite" -> indexed table in WAL mode; dedup is done by unique indexes, so startup cost does
+#             not grow with the table and every insert is an O(log n) index probe.
+# "csv"    -> the old behaviour: append rows to the CSV, dedup set rebuilt from the file on start.
+# Both backends expose the same add() / flush() / export_csv() / close() interface and keep the
+# same fields: the columns plus id_column (e.g. Place_Id), written as the last CSV column when it is
+# not one of the columns, so a resumed run still dedups on it.
+BATCH_SIZE = 50          # Rows per SQLite transaction
+# ============================================================
+
+def csv_columns(columns, id_column=None):
+    """Columns of the CSV a store writes: id_column is appended when it is not already one of them."""
+    columns = list(columns)
+    return columns + [id_column] if id_column and id_column not in columns else columns
+
+def normalize_key(value):
+    """Dedup form of a key field: phones -> national 10 digits (phones.phone_key), else lowercase alphanumerics."""
+    key = re.sub(r"[^a-z0-9]", "", str(value if value is not None else "").lower())
+    if key.isdigit():
+        return phone_key(key) or key
+    return key
+
+class SqliteLeadStore:
+    def __init__(self, db_path, table, columns, key_columns, id_column=None, batch_size=BATCH_SIZE):
+        self.db_path = db_path
+        self.table = table
+        self.columns = list(columns)
+        self.key_columns = tuple(key_columns)
+        self.id_column = id_column
+        self.batch_size = batch_size
+        self.pending = []
+        self.pending_keys = set()
+        self.pending_ids = set()
+        self.inserted = 0
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        cols = ", ".join(f'"{c}" TEXT' for c in self.columns)
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" ('
+            f"id INTEGER PRIMARY KEY, k1 TEXT NOT NULL, k2 TEXT NOT NULL, place_id TEXT NOT NULL DEFAULT '', {cols})"
+        )
+        self.conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{table}_key" ON "{table}" (k1, k2)')
+        self.conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS \"{table}_place\" ON \"{table}\" (place_id) WHERE place_id != ''"
+        )
+        self.conn.commit()
+
+    def _keys(self, row):
+        k1, k2 = (normalize_key(row.get(c, "")) for c in self.key_columns)
+        place_id = str(row.get(self.id_column) or "") if self.id_column else ""
+        return k1, k2, place_id
+
+    def is_empty(self):
+        return not self.pending and self.conn.execute(f'SELECT 1 FROM "{self.table}" LIMIT 1').fetchone() is None
+
+    def contains(self, row):
+        k1, k2, place_id = self._keys(row)
+        if (k1, k2) in self.pending_keys or (place_id and place_id in self.pending_ids):
+            return True
+        hit = self.conn.execute(
+            f"SELECT 1 FROM \"{self.table}\" WHERE (k1 = ? AND k2 = ?) OR (place_id != '' AND place_id = ?) LIMIT 1",
+            (k1, k2, place_id),
+        ).fetchone()
+        return hit is not None
+
+    def add(self, row):
+        """Queues the row unless it is a duplicate. Returns True when the lead is new."""
+        if self.contains(row):
+            return False
+        k1, k2, place_id = self._keys(row)
+        self.pending.append((k1, k2, place_id) + tuple(str(row.get(c, "")) for c in self.columns))
+        self.pending_keys.add((k1, k2))
+        if place_id:
+            self.pending_ids.add(place_id)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        if not self.pending:
+            return
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        marks = ", ".join("?" for _ in range(len(self.columns) + 3))
+        with self.conn:
+            cur = self.conn.executemany(
+                f'INSERT INTO "{self.table}" (k1, k2, place_id, {cols}) VALUES ({marks}) ON CONFLICT DO NOTHING',
+                self.pending,
+            )
+            self.inserted += max(cur.rowcount, 0)
+        self.pending.clear()
+        self.pending_keys.clear()
+        self.pending_ids.clear()
+
+    def import_csv(self, csv_path):
+        """One-off migration of an existing output CSV into the table."""
+        if not os.path.exists(csv_path):
+            return 0
+        added = 0
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                added += self.add(row)
+        self.flush()
+        return added
+
+    def export_csv(self, csv_path, chunk_rows=10_000):
+        """Writes the table in the current CSV layout (same columns, insertion order)."""
+        self.flush()
+        header = csv_columns(self.columns, self.id_column)
+        cols = ", ".join(f'"{c}"' for c in self.columns) + (", place_id" if len(header) > len(self.columns) else "")
+        tmp_path = csv_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            cur = self.conn.execute(f'SELECT {cols} FROM "{self.table}" ORDER BY id')
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                writer.writerows(rows)
+        os.replace(tmp_path, csv_path)
+        return csv_path
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+class CsvLeadStore:
+    def __init__(self, csv_path, columns, key_columns, id_column=None):
+        self.csv_path = csv_path
+        self.columns = list(columns)
+        self.key_columns = tuple(key_columns)
+        self.id_column = id_column
+        self.keys = set()
+        self.ids = set()
+        header = csv_columns(self.columns, id_column)
+        if os.path.exists(csv_path):
+            with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    self._remember(row)
+                old_header = reader.fieldnames or []
+            if old_header and old_header != header:
+                self._rewrite(header)  # One-off: a file from before id_column was stored
+        else:
+            with open(csv_path, "w", encoding="utf-8", newline="") as f:
+                csv.writer(f).writerow(header)
+        self.file = open(csv_path, "a", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=header, extrasaction="ignore")
+
+    def _rewrite(self, header):
+        tmp_path = self.csv_path + ".tmp"
+        with open(self.csv_path, "r", encoding="utf-8", newline="") as src, \
+                open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+            writer = csv.DictWriter(dst, fieldnames=header, extrasaction="ignore", restval="")
+            writer.writeheader()
+            writer.writerows(csv.DictReader(src))
+        os.replace(tmp_path, self.csv_path)
+
+    def _remember(self, row):
+        self.keys.add(tuple(normalize_key(row.get(c, "")) for c in self.key_columns))
+        if self.id_column and row.get(self.id_column):
+            self.ids.add(str(row[self.id_column]))
+
+    def is_empty(self):
+        return not self.keys
+
+    def contains(self, row):
+        key = tuple(normalize_key(row.get(c, "")) for c in self.key_columns)
+        place_id = str(row.get(self.id_column) or "") if self.id_column else ""
+        return key in self.keys or (place_id and place_id in self.ids)
+
+    def add(self, row):
+        if self.contains(row):
+            return False
+        self._remember(row)
+        self.writer.writerow(row)
+        self.file.flush()
+        return True
+
+    def flush(self):
+        self.file.flush()
+
+    def import_csv(self, csv_path):
+        return 0
+
+    def export_csv(self, csv_path):
+        self.flush()
+        if os.path.abspath(csv_path) != os.path.abspath(self.csv_path):
+            shutil.copyfile(self.csv_path, csv_path)
+        return csv_path
+
+    def close(self):
+        self.file.close()
+
+def open_store(backend, csv_path, columns, key_columns, id_column=None, db_path=None, table="leads"):
+    """Factory used by the scrapers. The SQLite store imports `csv_path` the first time it is created."""
+    if backend == "csv":
+        return CsvLeadStore(csv_path, columns, key_columns, id_column)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown store backend {backend!r}; use 'sqlite' or 'csv'")
+    db_path = db_path or os.path.splitext(csv_path)[0] + ".db"
+    store = SqliteLeadStore(db_path, table, columns, key_columns, id_column)
+    if store.is_empty():
+        imported = store.import_csv(csv_path)
+        if imported:
+            print(f"📥 Imported {imported} leads from {csv_path} into {db_path}")
+    return store
+
+if __name__ == "__main__":
+    # python lead_store.py export <db_path> <table> <out.csv>
+    if len(sys.argv) != 5 or sys.argv[1] != "export":
+        print("Usage: python lead_store.py export <db_path> <table> <out.csv>")
+        sys.exit(1)
+    _, _, db, tbl, out = sys.argv
+    conn = sqlite3.connect(db)
+    cols = [r[1] for r in conn.execute(f'PRAGMA table_info("{tbl}")') if r[1] not in ("id", "k1", "k2", "place_id")]
+    conn.close()
+    SqliteLeadStore(db, tbl, cols, ("k1", "k2")).export_csv(out)
+    print(f"Exported {tbl} to {out}")
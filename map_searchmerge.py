@@ -2,12 +2,26 @@ import pandas as pd
 import os
 import time
 import random
-import re
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+from maps_network import PlaceCapture, merge_details
+from place_extractor import extract_details as extract_panel
+import request_blocking
+from enrichment_journal import CHECKED_FIELD, EnrichmentJournal
+from task_ledger import TaskLedger
+from place_cache import PlaceCache, cache_key, PLACE_CACHE_FILE
+from query_cache import QueryCache, QUERY_CACHE_FILE
+from phones import phone_key
+from rate_scheduler import RateScheduler
+from browser_pool import SyncBrowserPool
+import pincode_geo
+from pincode_geo import PincodeZone
+from stage_metrics import StageMetrics
 
 INPUT_CSV = "/Users/apple/Desktop/webscrape/new_in.csv"
 ZONE_FILE = "/Users/apple/Desktop/webscrape/operationalpincodesudupi.csv"
 OUTPUT_FILE = "/Users/apple/Desktop/webscrape/results/final_logistics_leads.csv"
+JOURNAL_FILE = OUTPUT_FILE + ".journal"
+PROGRESS_FILE = "/Users/apple/Desktop/webscrape/results/final_logistics_progress.txt"  # Phase 2 task ledger (delete to start a fresh sweep)
 
 NEW_BUSINESS_KEYWORDS = [
     "Rice Mill", "Oil Mill", "Agri Fertilizer Dealer", "Plant Nursery",
@@ -28,8 +42,16 @@ NEW_BUSINESS_KEYWORDS = [
     "Pharma Distributor", "Medical Equipment Supplier", "Herbal Product Manufacturer"
 ]
 
-RESTART_BROWSER_EVERY = 30
-SAVE_EVERY = 5
+SAVE_EVERY = 5          # Phase 1 rows per journal fsync
+NETWORK_FIRST = True    # Read place data from Maps XHR responses; DOM extract_details only fills the gaps
+BLOCK_POLICY = "fast"   # request_blocking policy: "off", "lite" or "fast"
+PLACE_CACHE_TTL_DAYS = 14  # Cached place details (shared with category_search) younger than this skip the panel
+MAPS_HOST = "www.google.com"
+HEADLESS = False
+DIRECT_NAVIGATION = True   # Open /maps/search/<query> directly; typing into the search box is only the fallback
+SEARCH_OUTCOME_TIMEOUT = 8000  # ms for Maps to show a place, a result list or "can't find" after a search
+scheduler = RateScheduler()  # Every Maps request / click waits here (token bucket, AIMD, block breaker)
+metrics = StageMetrics("map_searchmerge")  # Per-stage spans/counters; exported next to OUTPUT_FILE by run_marketing_agent
 os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
 def apply_stealth(page):
@@ -42,13 +64,23 @@ def apply_stealth(page):
 
 def safe_goto(page, url, retries=3):
     for attempt in range(retries):
+        with metrics.span("rate_wait"):
+            allowed = scheduler.wait(MAPS_HOST)
+        if not allowed:
+            return False
         try:
-            page.goto(url, timeout=60000, wait_until="load")
-            time.sleep(random.uniform(1.5, 2.5))
-            return True
+            with metrics.span("navigate"):
+                page.goto(url, timeout=60000, wait_until="load")
         except Exception as e:
             print(f"      ⚠️ Nav attempt {attempt+1}/{retries} failed: {e}")
-            time.sleep(4 + attempt * 2)
+            metrics.count("timeout" if isinstance(e, PlaywrightTimeout) else "retry")
+            scheduler.record_error(MAPS_HOST, e)
+            scheduler.backoff(MAPS_HOST)
+            continue
+        if not scheduler.check_page(MAPS_HOST, page):
+            return True
+        print(f"      🧯 Blocked page on attempt {attempt+1}/{retries}.")
+        metrics.count("blocked")
     return False
 
 def safe_type_and_search(page, query, retries=3):
@@ -59,6 +91,7 @@ def safe_type_and_search(page, query, retries=3):
         "input[type='text']",
     ]
     for attempt in range(retries):
+        started = time.perf_counter()
         for selector in selectors:
             try:
                 page.wait_for_selector(selector, timeout=10000, state="attached")
@@ -71,49 +104,71 @@ def safe_type_and_search(page, query, retries=3):
                 page.type(selector, query, delay=random.randint(60, 120))
                 time.sleep(0.5)
                 page.keyboard.press("Enter")
+                metrics.observe("type_search", time.perf_counter() - started)
                 return True
             except Exception:
                 continue
+        metrics.observe("type_search", time.perf_counter() - started, ok=False)
+        metrics.count("retry")
         print(f"      ⚠️ Search box not found (attempt {attempt+1}/{retries}), reloading...")
-        if not safe_goto(page, "https://www.google.com/maps"):
+        if not safe_goto(page, f"{pincode_geo.MAPS_BASE}/maps"):
             return False
     return False
 
+# What Maps rendered for a search: "place" (jumped straight to one listing), "list", "none", or "" (not yet)
+SEARCH_OUTCOME_JS = """() => {
+    if (document.querySelector("div[role='feed'] a[href*='/place/']")) return 'list';
+    if (location.pathname.includes('/maps/place/')) return 'place';
+    const h1 = document.querySelector("div[role='main'] h1");
+    if (h1 && h1.innerText.trim() && h1.innerText.trim() !== 'Results') return 'place';
+    const text = document.body ? document.body.innerText.slice(0, 5000) : '';
+    if (/can't find|cannot find|no results found/i.test(text)) return 'none';
+    return '';
+}"""
+
+def search_outcome(page, timeout=SEARCH_OUTCOME_TIMEOUT):
+    try:
+        with metrics.span("outcome_wait"):
+            return page.wait_for_function(SEARCH_OUTCOME_JS, timeout=timeout).json_value()
+    except PlaywrightTimeout:
+        metrics.count("timeout")
+        return ""
+
+def open_search(page, zone, query, pincode):
+    """Runs a Maps search: the search URL first, the typed search box as fallback.
+    Returns "place", "list" or "none", or None when the search could not be run at all."""
+    if DIRECT_NAVIGATION:
+        if safe_goto(page, zone.search_url(query, pincode)):
+            outcome = search_outcome(page)
+            if outcome:
+                return outcome
+            print("      ⌨️ Search URL gave no recognisable result; typing the query instead.")
+        elif scheduler.halted(MAPS_HOST):
+            return None
+    if not safe_goto(page, zone.map_url(pincode)) or not safe_type_and_search(page, query):
+        return None
+    return search_outcome(page) or "none"
+
 def extract_details(page):
-    data = {"Name": "N/A", "Phone": "Not Found", "Category": "N/A", "Address": "N/A"}
     try:
         page.wait_for_selector("h1", timeout=5000)
-        if page.locator("h1").count() > 0:
-            data["Name"] = page.locator("h1").first.inner_text()
-        phone_btn = page.locator("button[aria-label^='Phone:']")
-        if phone_btn.count() > 0:
-            data["Phone"] = phone_btn.first.get_attribute("aria-label").replace("Phone:", "").strip()
-        else:
-            try:
-                all_text = page.locator("div[role='main']").inner_text(timeout=3000)
-                phone_match = re.search(r'(\+91[\s-]?\d{5}[\s-]?\d{5}|0\d{2,4}[\s-]?\d{6,8}|\d{10})', all_text)
-                if phone_match:
-                    data["Phone"] = phone_match.group(0).strip()
-            except Exception:
-                pass
-        cat_btn = page.locator("button[jsaction*='category']")
-        if cat_btn.count() > 0:
-            data["Category"] = cat_btn.first.inner_text()
-        addr_btn = page.locator("button[data-item-id='address']")
-        if addr_btn.count() > 0:
-            raw = addr_btn.first.get_attribute("aria-label") or ""
-            data["Address"] = raw.replace("Address:", "").strip()
     except Exception:
         pass
-    return data
+    return extract_panel(page)
 
-def create_fresh_page(browser, context):
-    try:
-        page = context.new_page()
-        apply_stealth(page)
-        return page
-    except Exception:
-        return None
+def network_or_dom_details(page, capture, href=None, name=None):
+    """Place record captured from Maps XHRs when it has a phone, otherwise DOM extraction (merged)."""
+    record = capture.lookup(href=href or page.url, name=name) if capture is not None else None
+    if record and record["Phone"] != "Not Found":
+        return record
+    return merge_details(extract_details(page), record)
+
+def recycle(pool, slot, ok, capture=None):
+    """Health check after each search; ok=None swaps the context at once (page state unknown after an exception)."""
+    fresh = pool.replace(slot, "exception") if ok is None else pool.checkup(slot, ok)
+    if fresh is not slot and capture is not None:
+        capture.attach(fresh.page)
+    return fresh, fresh.page
 
 def run_marketing_agent():
     print("🤖 STARTING LOGISTICS MARKETING AGENT (v2 - Fixed)...")
@@ -129,10 +184,15 @@ def run_marketing_agent():
             print(f"❌ Critical Error loading CSV: {e}")
             return
 
-    for col in ["Google_Phone", "Google_Category", "Google_Address", "Source", "Google_Location_Used"]:
+    for col in ["Google_Phone", "Google_Category", "Google_Address", "Source", "Google_Location_Used", CHECKED_FIELD]:
         if col not in df.columns:
             df[col] = ""
 
+    journal = EnrichmentJournal(JOURNAL_FILE)
+    journaled_rows = journal.replay(df)
+    if journaled_rows:
+        print(f"🔄 Replayed {len(journaled_rows)} journaled rows from: {JOURNAL_FILE}")
+
     print(f"📂 Loading Operating Zones from: {ZONE_FILE}")
     try:
         zone_df = pd.read_csv(ZONE_FILE)
@@ -143,39 +203,44 @@ def run_marketing_agent():
             return
         pincodes = zone_df[pincode_col].dropna().astype(str).str.replace(".0", "", regex=False).unique().tolist()
         operating_zones = [(p, "") for p in pincodes]
+        zone = PincodeZone(pincodes)  # Centroid anchors + out-of-zone filter (pincode_centroids.csv)
         print(f"📍 Loaded {len(operating_zones)} operational pincodes.")
     except Exception as e:
         print(f"❌ Critical Error loading zones: {e}")
         return
 
+    metrics.export_to(os.path.splitext(OUTPUT_FILE)[0] + ".metrics.jsonl").serve()
     with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False,
-            args=["--disable-blink-features=AutomationControlled","--no-sandbox","--disable-infobars"]
-        )
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/"
-        )
-        page = create_fresh_page(browser, context)
+        block_stats = request_blocking.BlockStats(BLOCK_POLICY)
+        # Contexts are recycled on health (navigations, heap, errors, age, Chromium RSS), with a warm spare
+        pool = SyncBrowserPool(
+            p.chromium,
+            launch_kwargs={
+                "headless": HEADLESS,
+                "args": ["--disable-blink-features=AutomationControlled","--no-sandbox","--disable-infobars"],
+            },
+            context_kwargs={
+                "viewport": {"width": 1280, "height": 800},
+                "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/",
+            },
+            setup_context=lambda context: request_blocking.install(context, BLOCK_POLICY, block_stats),
+            setup_page=apply_stealth,
+        ).start()
+        capture = PlaceCapture() if NETWORK_FIRST else None
+        place_cache = PlaceCache(PLACE_CACHE_FILE, ttl_days=PLACE_CACHE_TTL_DAYS)
+        query_cache = QueryCache(QUERY_CACHE_FILE)
+        slot = pool.acquire()
+        page = slot.page
+        if capture is not None:
+            capture.attach(page)
 
         print("\n🚀 PHASE 1: Enriching Existing Database...")
-        rows_to_process = df[df["Google_Phone"].astype(str).isin(["nan", "", "Not Found"])].index.tolist()
+        # Rows tried before (journaled, or compacted with CHECKED_FIELD) are not searched again
+        pending = df["Google_Phone"].astype(str).isin(["nan", "", "Not Found"]) & df[CHECKED_FIELD].fillna("").astype(str).eq("")
+        rows_to_process = [i for i in df[pending].index.tolist() if i not in journaled_rows]
         print(f"   → {len(rows_to_process)} rows need enrichment.")
 
         for count, i in enumerate(rows_to_process):
-            if count > 0 and count % RESTART_BROWSER_EVERY == 0:
-                print(f"\n♻️ Restarting browser at #{count}...")
-                try:
-                    page.close()
-                except Exception:
-                    pass
-                time.sleep(random.uniform(5, 10))
-                page = create_fresh_page(browser, context)
-                if page is None:
-                    print("❌ Could not create new page. Stopping.")
-                    break
-
             row = df.loc[i]
             name = str(row.get("EnterpriseName", "")).strip()
             pincode = str(row.get("Pincode", "")).replace(".0", "")
@@ -183,53 +248,74 @@ def run_marketing_agent():
             query = f"{name} {pincode} {district}"
             print(f"   [{i}/{len(df)}] 🔎 {query}")
 
+            if scheduler.halted(MAPS_HOST):
+                print("⛔ Maps keeps blocking us; stopping Phase 1 (unprocessed rows stay pending).")
+                break
+            ok = False
+            started = time.perf_counter()
             try:
-                time.sleep(random.uniform(1.5, 3.0))
-                if not safe_goto(page, "https://www.google.com/maps"):
-                    df.at[i, "Google_Phone"] = "Not Found"
+                if capture is not None:
+                    capture.clear()
+                outcome = open_search(page, zone, query, pincode)
+                if outcome is None or outcome == "none":
+                    if not scheduler.halted(MAPS_HOST):
+                        journal.record(df, i, Google_Phone="Not Found")
+                    # No Maps match is a normal answer; only a blocked / failed search counts against the context
+                    ok = outcome == "none"
                     continue
-                if not safe_type_and_search(page, query):
-                    df.at[i, "Google_Phone"] = "Not Found"
-                    continue
-                try:
-                    page.wait_for_selector("h1, a[href*='/place/']", timeout=8000)
-                except PlaywrightTimeout:
-                    df.at[i, "Google_Phone"] = "Not Found"
-                    continue
-                if page.locator("a[href*='/place/']").count() > 0 and page.locator("h1").count() == 0:
-                    try:
-                        page.locator("a[href*='/place/']").first.click()
-                        page.wait_for_selector("h1", timeout=6000)
-                    except Exception:
-                        pass
-                details = extract_details(page)
-                df.at[i, "Google_Phone"] = details["Phone"]
-                df.at[i, "Google_Category"] = details["Category"]
-                df.at[i, "Google_Address"] = details["Address"]
-                df.at[i, "Source"] = "Govt_List_Enriched"
+                details = None
+                if outcome == "list":
+                    first_href = page.locator("a[href*='/place/']").first.get_attribute("href")
+                    details = place_cache.get(cache_key(first_href))
+                    if details is None:
+                        if not scheduler.wait(MAPS_HOST):
+                            continue  # Breaker tripped: the row stays pending and Phase 1 stops at the halted check
+                        try:
+                            with metrics.span("click"):
+                                page.locator("a[href*='/place/']").first.click()
+                                page.wait_for_selector("h1", timeout=6000)
+                        except Exception:
+                            pass
+                else:
+                    details = place_cache.get(cache_key(page.url))
+                if details is None:
+                    with metrics.span("panel"):
+                        details = network_or_dom_details(page, capture, name=name)
+                    place_cache.put(cache_key(page.url, details.get("Place_Id")), details)
+                else:
+                    metrics.count("cached")
+                journal.record(
+                    df, i,
+                    Google_Phone=details["Phone"],
+                    Google_Category=details["Category"],
+                    Google_Address=details["Address"],
+                    Source="Govt_List_Enriched",
+                )
                 if details["Phone"] != "Not Found":
+                    metrics.count("enriched")
                     print(f"      ✅ {details['Phone']} | {details['Category']}")
                 else:
                     print(f"      🔸 Found but no phone.")
+                ok = True
             except Exception as e:
                 print(f"      ⚠️ Error on row {i}: {e}")
-                df.at[i, "Google_Phone"] = "Not Found"
-                try:
-                    page.close()
-                except Exception:
-                    pass
-                time.sleep(5)
-                page = create_fresh_page(browser, context)
-                if page is None:
-                    print("❌ Could not recover. Stopping.")
-                    break
+                metrics.count("timeout" if isinstance(e, PlaywrightTimeout) else "row_error")
+                journal.record(df, i, Google_Phone="Not Found")
+                scheduler.record_error(MAPS_HOST, e)
+                scheduler.backoff(MAPS_HOST)
+                ok = None
+            finally:
+                metrics.observe("row", time.perf_counter() - started)
+                with metrics.span("pool_checkup"):
+                    slot, page = recycle(pool, slot, ok, capture)
 
             if count % SAVE_EVERY == 0:
-                df.to_csv(OUTPUT_FILE, index=False)
-                print(f"      💾 Saved. ({count}/{len(rows_to_process)})")
-                time.sleep(random.uniform(2, 5))
+                with metrics.span("journal_sync"):
+                    journal.sync()
+                print(f"      💾 Journaled. ({count}/{len(rows_to_process)})")
 
-        df.to_csv(OUTPUT_FILE, index=False)
+        journal.compact(df, OUTPUT_FILE)
+        journal.close()
         print("\n✅ PHASE 1 COMPLETE.")
 
         print("\n🚀 PHASE 2: Discovering NEW Businesses...")
@@ -238,10 +324,13 @@ def run_marketing_agent():
             ph = str(row.get("Google_Phone", "")).strip()
             nm = str(row.get("EnterpriseName", "")).strip().lower()
             if ph not in ["nan", "", "Not Found"]:
-                existing_unique_ids.add((nm, ph))
+                existing_unique_ids.add((nm, phone_key(ph) or ph))
         print(f"   → Dedup set: {len(existing_unique_ids)} existing entries.")
 
-        new_leads = []
+        ledger = TaskLedger(PROGRESS_FILE)
+        done_before = ledger.summary("discovery")["done"]
+        if done_before:
+            print(f"   → Resuming: {done_before} searches already done per {PROGRESS_FILE}.")
         search_count = 0
         total_searches = len(operating_zones) * len(NEW_BUSINESS_KEYWORDS)
 
@@ -250,89 +339,142 @@ def run_marketing_agent():
             for keyword in NEW_BUSINESS_KEYWORDS:
                 search_count += 1
                 search_term = f"{keyword} {pincode}"
-                print(f"   [{search_count}/{total_searches}] 🔎 {search_term}")
-
-                if search_count > 0 and search_count % RESTART_BROWSER_EVERY == 0:
-                    print("♻️ Restarting browser...")
-                    try:
-                        page.close()
-                    except Exception:
-                        pass
-                    time.sleep(random.uniform(8, 15))
-                    page = create_fresh_page(browser, context)
-                    if page is None:
-                        break
+                task = ("discovery", pincode, keyword)
+                if ledger.is_done(*task):
+                    continue
+                if scheduler.halted(MAPS_HOST):
+                    break
+                resume_from = ledger.get(*task).get("last_index", -1) + 1
+                print(f"   [{search_count}/{total_searches}] 🔎 {search_term}" + (f" (from result {resume_from + 1})" if resume_from else ""))
 
+                ok = False
+                started = time.perf_counter()
                 try:
-                    time.sleep(random.uniform(2, 4))
-                    if not safe_goto(page, "https://www.google.com/maps"):
-                        continue
-                    if not safe_type_and_search(page, search_term):
+                    if capture is not None:
+                        capture.clear()
+                    outcome = open_search(page, zone, search_term, pincode)
+                    if outcome is None:
                         continue
-                    try:
-                        page.wait_for_selector("a[href*='/place/']", timeout=6000)
-                    except PlaywrightTimeout:
+                    if outcome == "none":
                         print("      ❌ No businesses found.")
+                        ledger.done(*task, scrolled=0)
+                        ok = True
                         continue
 
-                    results = page.locator("a[href*='/place/']").all()
+                    if outcome == "place":
+                        # Maps jumped straight to the only match: its panel is already open
+                        hrefs, results = [page.url], [None]
+                    else:
+                        results = page.locator("a[href*='/place/']").all()
+                        hrefs = page.eval_on_selector_all("a[href*='/place/']", "els => els.map(e => e.href)")
+                    ledger.start(*task, scrolled=len(results))
+                    # Only places that are new since last sweep (or expired in the place cache) get opened below
+                    new_places, gone_places = query_cache.record(search_term, hrefs[:7])
+                    print(f"      🧭 {new_places} new / {gone_places} gone places since last sweep.")
                     found_count = 0
-                    for res in results[:7]:
+                    for res_idx, (href, res) in enumerate(zip(hrefs[:7], results[:7])):
+                        if res_idx < resume_from:
+                            continue
+                        listing_started = time.perf_counter()
                         try:
-                            res.click()
-                            time.sleep(random.uniform(1.5, 3.0))
-                            details = extract_details(page)
-                            if details["Phone"] != "Not Found":
-                                new_id = (details["Name"].strip().lower(), details["Phone"].strip())
+                            # The search XHR usually already carries the phone — no click needed
+                            record = capture.lookup(href=href) if capture is not None else None
+                            # Listings outside the operational zone are dropped before any click
+                            zone_status, place_pin = zone.classify(record)
+                            if zone_status == "out":
+                                details, clicked = None, False
+                                metrics.count("out_of_zone")
+                                print(f"      📍 Out of zone: {record['Name']} {place_pin}")
+                            else:
+                                if record and record["Phone"] != "Not Found":
+                                    place_cache.put(cache_key(href, record.get("Place_Id")), record)
+                                else:
+                                    record = place_cache.get(cache_key(href))
+                                clicked = record is None
+                                if clicked and res is not None:
+                                    if not scheduler.wait(MAPS_HOST):
+                                        break  # Breaker tripped: the task resumes at this result next run
+                                    with metrics.span("click"):
+                                        res.click()
+                                if clicked:
+                                    with metrics.span("panel"):
+                                        details = network_or_dom_details(page, capture, href=href)
+                                    place_cache.put(cache_key(href, details.get("Place_Id")), details)
+                                else:
+                                    details = record
+                                if zone_status == "unknown":
+                                    zone_status, place_pin = zone.classify(details)
+                                    if zone_status == "out":
+                                        details = None
+                                        metrics.count("out_of_zone")
+                            if details and details["Phone"] != "Not Found":
+                                new_id = (details["Name"].strip().lower(), phone_key(details["Phone"]) or details["Phone"].strip())
                                 if new_id not in existing_unique_ids:
-                                    new_leads.append({
+                                    # Written straight away so the ledger never runs ahead of the CSV
+                                    csv_started = time.perf_counter()
+                                    pd.DataFrame([{
                                         "EnterpriseName": details["Name"],
-                                      "Pincode": pincode,
+                                        "Pincode": place_pin or pincode,
                                         "District": district,
                                         "Google_Phone": details["Phone"],
                                         "Google_Category": details["Category"],
                                         "Google_Address": details["Address"],
                                         "Source": "Discovery_Mode",
                                         "Google_Location_Used": search_term
-                                    })
+                                    }]).reindex(columns=df.columns).to_csv(
+                                        OUTPUT_FILE, mode='a', header=not os.path.exists(OUTPUT_FILE), index=False
+                                    )
+                                    metrics.observe("csv_write", time.perf_counter() - csv_started)
                                     existing_unique_ids.add(new_id)
                                     found_count += 1
+                                    metrics.count("new_lead")
                                     print(f"      ✨ NEW LEAD: {details['Name']} ({details['Phone']})")
                                 else:
+                                    metrics.count("duplicate")
                                     print(f"      🔸 Duplicate: {details['Name']}")
-                            page.go_back()
-                            time.sleep(random.uniform(1, 2))
+                            if clicked and res is not None:
+                                with metrics.span("go_back"):
+                                    page.go_back()
                         except Exception as res_err:
-                            try:
-                                page.go_back()
-                                time.sleep(1)
-                            except Exception:
-                                pass
-                            continue
-                    print(f"      → {found_count} new leads.")
+                            metrics.count("timeout" if isinstance(res_err, PlaywrightTimeout) else "listing_error")
+                            scheduler.record_error(MAPS_HOST, res_err)
+                            if res is not None:
+                                try:
+                                    page.go_back()
+                                except Exception:
+                                    pass
+                        metrics.observe("listing", time.perf_counter() - listing_started)
+                        ledger.update(*task, last_index=res_idx)
+                    else:
+                        ledger.done(*task)
+                        print(f"      → {found_count} new leads.")
+                        ok = True
                 except Exception as e:
                     print(f"      ⚠️ Error: {e}")
-                    try:
-                        page.close()
-                    except Exception:
-                        pass
-                    page = create_fresh_page(browser, context)
-                    time.sleep(5)
+                    metrics.count("timeout" if isinstance(e, PlaywrightTimeout) else "search_error")
+                    scheduler.record_error(MAPS_HOST, e)
+                    scheduler.backoff(MAPS_HOST)
+                    ok = None
+                finally:
+                    metrics.observe("search", time.perf_counter() - started, pincode=pincode, keyword=keyword)
+                    with metrics.span("pool_checkup"):
+                        slot, page = recycle(pool, slot, ok, capture)
 
-            if new_leads:
-                new_df = pd.DataFrame(new_leads)
-                new_df.to_csv(OUTPUT_FILE, mode='a', header=not os.path.exists(OUTPUT_FILE), index=False)
-                print(f"      💾 Saved {len(new_leads)} leads from zone {pincode}.")
-                new_leads = []
+        ledger.close()
 
-        if new_leads:
-            pd.DataFrame(new_leads).to_csv(OUTPUT_FILE, mode='a', header=False, index=False)
-
-        try:
-            browser.close()
-        except Exception:
-            pass
+        pool.release(slot)
+        pool.close()
         print("\n🏁 ALL DONE!")
+        print(block_stats.summary())
+        print(place_cache.summary())
+        print(query_cache.summary())
+        print(scheduler.summary())
+        print(pool.summary())
+        print(zone.summary())
+        place_cache.close()
+        query_cache.close()
+        metrics.close()
+        print(metrics.summary())
 
 if __name__ == "__main__":
     run_marketing_agent()
@@ -0,0 +1,190 @@
+import json
+import re
+
+# ================= ⚙️ GOOGLE MAPS XHR DECODER =================
+# Maps fills the results feed and the place panel from two JSON endpoints:
+#   /search?tbm=map...       -> list of places (initial page + every scroll batch)
+#   /maps/preview/place?...  -> one place (fired when a listing is opened)
+# Both are prefixed with the ")]}'" anti-XSSI guard and sometimes wrapped in {"c":..,"d":"<json>"}.
+# Field positions below are the ones Maps has used for a long time; anything missing comes back
+# as "N/A" / "Not Found" exactly like extract_details, so DOM scraping can fill the gaps.
+SEARCH_URL_MARKERS = ("/search?tbm=map", "/search?authuser=", "/maps/preview/place")
+XSSI_PREFIX = ")]}'"
+
+NAME_PATH = (11,)
+CATEGORY_PATH = (13, 0)
+ADDRESS_PATH = (39,)
+ADDRESS_LINES_PATH = (2,)
+PHONE_PATHS = [(178, 0, 0), (178, 0, 3), (3, 0)]
+LAT_PATH = (9, 2)
+LNG_PATH = (9, 3)
+CID_PATH = (10,)            # "0x3bbc...:0x8f1..." — same id that appears in /place/ hrefs as !1s<cid>
+PLACE_ID_PATH = (78,)       # "ChIJ..." Google place id
+
+HREF_CID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.I)
+CID_RE = re.compile(r"^0x[0-9a-f]+:0x[0-9a-f]+$", re.I)
+# ===============================================================
+
+def _dig(obj, path):
+    for key in path:
+        try:
+            obj = obj[key]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return obj
+
+def decode_payload(text):
+    """Strips the anti-XSSI guard (and the {"c","d"} wrapper) and returns parsed JSON, or None."""
+    if not text:
+        return None
+    text = text.strip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get("d"), str):
+        return decode_payload(data["d"])
+    return data
+
+def looks_like_place(info):
+    return (
+        isinstance(info, list) and len(info) > 14
+        and isinstance(_dig(info, NAME_PATH), str)
+        and isinstance(_dig(info, CID_PATH), str) and bool(CID_RE.match(_dig(info, CID_PATH)))
+    )
+
+def place_from_info(info):
+    """Maps place array -> same dict shape as extract_details, plus Place_Id / Cid / Lat / Lng."""
+    data = {"Name": "N/A", "Phone": "Not Found", "Category": "N/A", "Address": "N/A",
+            "Place_Id": "", "Cid": "", "Lat": None, "Lng": None}
+    name = _dig(info, NAME_PATH)
+    if isinstance(name, str) and name.strip():
+        data["Name"] = name.strip()
+    category = _dig(info, CATEGORY_PATH)
+    if isinstance(category, str) and category.strip():
+        data["Category"] = category.strip()
+    address = _dig(info, ADDRESS_PATH)
+    if not isinstance(address, str):
+        lines = _dig(info, ADDRESS_LINES_PATH)
+        address = ", ".join(l for l in lines if isinstance(l, str)) if isinstance(lines, list) else None
+    if address:
+        data["Address"] = address.strip()
+    for path in PHONE_PATHS:
+        phone = _dig(info, path)
+        if isinstance(phone, str) and re.search(r"\d{5}", phone.replace(" ", "")):
+            data["Phone"] = phone.strip()
+            break
+    lat, lng = _dig(info, LAT_PATH), _dig(info, LNG_PATH)
+    if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+        data["Lat"], data["Lng"] = float(lat), float(lng)
+    cid = _dig(info, CID_PATH)
+    data["Cid"] = cid if isinstance(cid, str) else ""
+    place_id = _dig(info, PLACE_ID_PATH)
+    data["Place_Id"] = place_id if isinstance(place_id, str) else data["Cid"]
+    return data
+
+def iter_place_infos(payload, depth=0):
+    """Yields every place array inside a decoded payload, wherever Maps has nested it."""
+    if depth > 8 or not isinstance(payload, list):
+        return
+    if looks_like_place(payload):
+        yield payload
+        return
+    for item in payload:
+        if isinstance(item, list):
+            yield from iter_place_infos(item, depth + 1)
+
+def cid_from_href(href):
+    match = HREF_CID_RE.search(href or "")
+    return match.group(1).lower() if match else ""
+
+def _name_key(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+def merge_details(primary, *fallbacks):
+    """Fills "N/A" / "Not Found" fields of `primary` from the fallbacks, in order."""
+    merged = dict(primary) if primary else None
+    for fallback in fallbacks:
+        if not fallback:
+            continue
+        if merged is None:
+            merged = dict(fallback)
+            continue
+        for key, value in fallback.items():
+            if merged.get(key) in ("N/A", "Not Found", "", None):
+                merged[key] = value
+    return merged
+
+class PlaceCapture:
+    """Collects place records from a page's Maps XHR responses.
+
+    Sync pages:  capture.attach(page)        Async pages:  capture.attach_async(page)
+    """
+
+    def __init__(self):
+        self.by_cid = {}
+        self.by_name = {}
+        self.order = []
+        self.responses = 0
+        self.decode_errors = 0
+
+    def clear(self):
+        self.by_cid.clear()
+        self.by_name.clear()
+        self.order.clear()
+
+    @staticmethod
+    def wants(url):
+        return any(marker in url for marker in SEARCH_URL_MARKERS)
+
+    def attach(self, page):
+        def on_response(response):
+            if self.wants(response.url):
+                try:
+                    self.feed(response.text())
+                except Exception:
+                    self.decode_errors += 1
+        page.on("response", on_response)
+
+    def attach_async(self, page):
+        async def on_response(response):
+            if self.wants(response.url):
+                try:
+                    self.feed(await response.text())
+                except Exception:
+                    self.decode_errors += 1
+        page.on("response", on_response)
+
+    def feed(self, text):
+        payload = decode_payload(text)
+        if payload is None:
+            self.decode_errors += 1
+            return 0
+        self.responses += 1
+        added = 0
+        for info in iter_place_infos(payload):
+            record = place_from_info(info)
+            key = record["Cid"].lower()
+            if key not in self.by_cid:
+                self.order.append(key)
+                added += 1
+            else:
+                # Preview responses are richer than search ones; keep the best of both
+                record = merge_details(record, self.by_cid[key])
+            self.by_cid[key] = record
+            self.by_name[_name_key(record["Name"])] = record
+        return added
+
+    def lookup(self, href=None, name=None):
+        """Finds a captured place by its /place/ href (preferred) or by business name."""
+        cid = cid_from_href(href)
+        if cid and cid in self.by_cid:
+            return dict(self.by_cid[cid])
+        if name and _name_key(name) in self.by_name:
+            return dict(self.by_name[_name_key(name)])
+        return None
+
+    def places(self):
+        return [dict(self.by_cid[k]) for k in self.order]
@@ -0,0 +1,199 @@
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 — pyarrow-backed strings run the regex kernels in C
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+# ================= ⚙️ PHONE NORMALIZATION + DEDUP =================
+# One set of rules for every scraper and export, applied to whole pandas columns at once.
+#   mobile   -> "+91XXXXXXXXXX"           (10 digits starting 6-9)
+#   landline -> "+91-<STD>-<number>"      (STD code taken from how the number was written,
+#                                          e.g. "0820 252 1234" -> "+91-820-2521234")
+#   invalid  -> Phone_Valid False         (wrong length, all one digit, placeholders)
+#   several  -> the first valid one       ("98450 12345, 98765 43210" -> "+919845012345")
+# Phone_E164 ("+91" + 10 digits) is the dedup key for both kinds.
+# A landline written without separators ("08202521234") cannot be told apart from a mobile and
+# is classified by its first digit.
+PLACEHOLDERS = ["", "n/a", "na", "not found", "nan", "none", "null", "-"]
+
+# International / trunk prefixes in front of a 10-digit national number: (prefix, total length)
+PREFIXES = [("0091", 14), ("091", 13), ("91", 12), ("0", 11)]
+# Between numbers in a cell listing several ("98450 12345, 98765 43210", "0820 2521234 / 2522345");
+# such a cell is read as its first valid number. Explicit [ \t] so pyarrow (RE2) and re agree.
+NUMBER_SEPARATOR_RE = r"[ \t]*(?:[,;/|\n]|[ \t](?:or|and|OR|AND)[ \t])[ \t]*"
+# First written group is the STD code, e.g. "0820 252 1234", "+91 80-2345 6789", "(0820) 2521234"
+STD_GROUP_RE = r"^\s*(?:\+?\s*91[\s-]*)?\(?0?(\d{2,4})\)?[\s-]+\d.*$"
+
+# Where each scraper keeps its fields: source -> {unified column: source column}
+SOURCE_SCHEMAS = {
+    "discovery": {"Name": "Name", "Phone_Raw": "Contact_Number", "Category": "Category",
+                  "Address": "Address", "Pincode": "Pincode"},
+    "enrichment": {"Name": "EnterpriseName", "Phone_Raw": "Google_Phone", "Category": "Google_Category",
+                   "Address": "Google_Address", "Pincode": "Pincode"},
+    "indiamart": {"Name": "Name", "Phone_Raw": "Contact", "Category": None,
+                  "Address": "Location", "Pincode": "Pin"},
+}
+LEAD_COLUMNS = ["Name", "Phone", "Phone_E164", "Phone_Kind", "Category", "Address", "Pincode", "Sources", "Phone_Raw"]
+# ===================================================================
+
+def _national(s):
+    placeholder = s.str.lower().isin(PLACEHOLDERS)
+    digits = s.str.replace(r"[^0-9]", "", regex=True)
+    national = digits
+    for prefix, length in PREFIXES:
+        has_prefix = digits.str.len().eq(length) & digits.str.startswith(prefix)
+        national = national.mask(has_prefix, digits.str.slice(len(prefix)))
+
+    valid = (
+        national.str.fullmatch(r"[1-9][0-9]{9}").fillna(False)
+        & national.ne(national.str[0].str.repeat(10)).fillna(True)
+        & ~placeholder
+    )
+    return national, valid
+
+def _first_number(s):
+    """Cells listing several numbers -> their first valid number (unchanged when no part is valid,
+    e.g. "0820/2521234")."""
+    multi = s.str.contains(NUMBER_SEPARATOR_RE, regex=True).fillna(False).to_numpy(dtype=bool)
+    if not multi.any():
+        return s
+    positions = np.flatnonzero(multi)
+    split = s.iloc[positions].reset_index(drop=True)
+    pieces = split.str.split(NUMBER_SEPARATOR_RE, regex=True).explode().astype(STRING_DTYPE).fillna("").str.strip()
+    _, piece_valid = _national(pieces)
+    first = pieces[piece_valid.to_numpy(dtype=bool)].groupby(level=0, sort=False).first()
+    s = s.copy()
+    s.iloc[positions[first.index.to_numpy()]] = first.to_numpy()
+    return s
+
+def national_numbers(raw):
+    """Vectorized phone_key: Series of raw phone strings -> (national 10-digit Series, valid mask).
+    The cheap first half of normalize_phones, for dedup before formatting."""
+    s = _first_number(pd.Series(raw, copy=False).astype(STRING_DTYPE).fillna("").str.strip())
+    national, valid = _national(s)
+    return national, valid.astype(bool)
+
+def normalize_phones(raw):
+    """Vectorized: Series of raw phone strings -> DataFrame with Phone, Phone_E164, Phone_Kind, Phone_Std, Phone_Valid."""
+    s = _first_number(pd.Series(raw, copy=False).astype(STRING_DTYPE).fillna("").str.strip())
+    national, valid = _national(s)
+    # replace() + match() rather than extract(): both stay in pyarrow's C kernels
+    std = s.str.replace(STD_GROUP_RE, r"\1", regex=True).where(s.str.match(STD_GROUP_RE).fillna(False), "")
+    # The written STD group must really be the head of the national number; the rest is the local part.
+    # No regex backreferences here so that pyarrow-backed strings (RE2) stay on the fast path.
+    std_len = std.str.len()
+    std_fits = pd.Series(False, index=s.index)
+    local = pd.Series("", index=s.index, dtype="string")
+    for n in (2, 3, 4):
+        fits = std_len.eq(n) & national.str.slice(0, n).eq(std).fillna(False)
+        std_fits |= fits
+        local = local.mask(fits, national.str.slice(n))
+    starts_mobile = national.str[0].isin(list("6789"))
+
+    kind = pd.Series(
+        np.select([~valid, std_fits, starts_mobile], ["invalid", "landline", "mobile"], default="landline"),
+        index=s.index,
+    )
+    e164 = ("+91" + national).where(valid, "")
+    landline_std = (kind == "landline") & std_fits
+    phone = e164.where(~landline_std, "+91-" + std + "-" + local)
+
+    return pd.DataFrame({
+        "Phone": phone.astype(object),
+        "Phone_E164": e164.astype(object),
+        "Phone_Kind": kind,
+        "Phone_Std": std.where(landline_std, "").astype(object),
+        "Phone_Valid": valid.astype(bool),
+    }, index=s.index)
+
+def normalize_phone(raw):
+    """Scalar version for per-lead use: canonical phone string, or "Not Found" when invalid."""
+    result = normalize_phones(pd.Series([raw if raw is not None else ""]))
+    return result.at[0, "Phone"] if result.at[0, "Phone_Valid"] else "Not Found"
+
+def phone_key(raw):
+    """Dedup key without pandas: the national 10 digits, "" when invalid — the same rules as
+    _national() / normalize_phones (placeholders, prefixes, [1-9] + 9 digits, not all one digit,
+    first valid number of a cell listing several)."""
+    text = str(raw if raw is not None else "").strip()
+    if re.search(NUMBER_SEPARATOR_RE, text):
+        key = next((k for k in (_phone_key(p.strip()) for p in re.split(NUMBER_SEPARATOR_RE, text)) if k), "")
+        if key:
+            return key
+    return _phone_key(text)
+
+def _phone_key(text):
+    if text.lower() in PLACEHOLDERS:
+        return ""
+    digits = re.sub(r"[^0-9]", "", text)  # ASCII digits only, like the pyarrow (RE2) \D in _national
+    national = digits
+    for prefix, length in PREFIXES:
+        if len(digits) == length and digits.startswith(prefix):
+            national = digits[len(prefix):]
+    if not re.fullmatch(r"[1-9][0-9]{9}", national) or national == national[0] * 10:
+        return ""
+    return national
+
+def to_leads(df, source):
+    """Maps one scraper's output onto LEAD_COLUMNS (before dedup)."""
+    schema = SOURCE_SCHEMAS[source]
+    out = pd.DataFrame(index=df.index)
+    for col, src in schema.items():
+        out[col] = df[src].astype(STRING_DTYPE) if src and src in df.columns else pd.Series("", index=df.index, dtype=STRING_DTYPE)
+    out["Sources"] = source
+    return out
+
+def dedup_leads(frames):
+    """frames: list of (source, DataFrame) in priority order. One pass: normalize, drop invalid,
+    keep the first row per Phone_E164 (filling its blanks from later rows), list every source."""
+    if not frames:
+        return pd.DataFrame(columns=LEAD_COLUMNS)
+    leads = pd.concat([to_leads(df, source) for source, df in frames], ignore_index=True)
+    leads = pd.concat([leads, normalize_phones(leads["Phone_Raw"])], axis=1)
+    leads = leads[leads["Phone_Valid"]]
+    for col in ["Name", "Category", "Address", "Pincode"]:
+        leads[col] = leads[col].mask(leads[col].str.lower().isin(PLACEHOLDERS))
+
+    grouped = leads.groupby("Phone_E164", sort=False)
+    merged = grouped[["Name", "Phone", "Phone_Kind", "Category", "Address", "Pincode", "Phone_Raw"]].first()
+    # "discovery|indiamart" style list, built per source instead of a Python join per group
+    sources = pd.Series("", index=merged.index, dtype=object)
+    for source in leads["Sources"].unique():
+        present = leads["Sources"].eq(source).groupby(leads["Phone_E164"], sort=False).any()
+        tag = np.where(sources.eq(""), source, sources + "|" + source)
+        sources = sources.where(~present.reindex(merged.index, fill_value=False), pd.Series(tag, index=merged.index))
+    merged["Sources"] = sources
+    merged = merged.reset_index()
+    return merged[LEAD_COLUMNS].fillna("")
+
+def add_source_args(parser):
+    for source in SOURCE_SCHEMAS:
+        parser.add_argument(f"--{source}", action="append", default=[], help=f"{source} CSV (repeatable)")
+
+def read_sources(args):
+    """[(source, DataFrame)] in SOURCE_SCHEMAS priority order, for dedup_leads / entity resolution."""
+    frames = []
+    for source in SOURCE_SCHEMAS:
+        for path in getattr(args, source):
+            frames.append((source, pd.read_csv(path, dtype=str, keep_default_na=False)))
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize phones and dedup lead files from every scraper.")
+    parser.add_argument("output", help="Merged, deduplicated CSV to write")
+    add_source_args(parser)
+    args = parser.parse_args()
+    frames = read_sources(args)
+    total = sum(len(df) for _, df in frames)
+    merged = dedup_leads(frames)
+    merged.to_csv(args.output, index=False)
+    print(f"✅ {total} rows in, {len(merged)} unique valid numbers out -> {args.output}")
+
+if __name__ == "__main__":
+    main()
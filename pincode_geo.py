@@ -0,0 +1,172 @@
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sqlite3
+from statistics import median
+from urllib.parse import quote
+
+from place_cache import PLACE_CACHE_FILE
+
+# ================= ⚙️ PINCODE GEO ANCHORS =================
+# Local pincode -> centroid table, used to anchor Maps searches to the zone
+# (/maps/search/<query>/@lat,lng,<zoom>z) instead of letting Maps pick the viewport, and to drop
+# listings that are outside the operational zone before their detail panel is opened.
+# The table is a plain CSV (pincode,lat,lng,radius_km) that can be edited by hand; `build` fills it
+# from coordinates Maps already gave us (place cache records whose address carries the pincode).
+# Pincodes missing from the table fall back to the old text-only search (a missing or empty table is
+# reported once at startup: every search is then unanchored and only address pincodes filter the zone).
+MAPS_BASE = "https://www.google.com"  # benchmark.py points this at its local mock server
+CENTROIDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pincode_centroids.csv")  # Next to this file
+PLACE_CACHE_DB = PLACE_CACHE_FILE
+DEFAULT_RADIUS_KM = 4.0
+MIN_RADIUS_KM, MAX_RADIUS_KM = 1.5, 12.0
+MIN_PLACES_FOR_CENTROID = 5
+VIEWPORT_HALF_WIDTH_PX = 640   # Half of the 1280px browser viewport
+ZOOM_RANGE = (11, 16)
+OUTSIDE_FACTOR = 2.5           # Beyond this many radii from every zone centroid a place is out of zone
+# ===========================================================
+
+PINCODE_RE = re.compile(r"\b[1-9]\d{5}\b")
+
+def address_pincode(address):
+    """Last 6-digit pincode in an address ("..., Udupi, Karnataka 576101" -> "576101"), or ""."""
+    found = PINCODE_RE.findall(str(address or ""))
+    return found[-1] if found else ""
+
+def distance_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+def zoom_for_radius(radius_km, lat):
+    """Maps zoom at which the viewport's half-width covers radius_km."""
+    metres_per_px = radius_km * 1000 / VIEWPORT_HALF_WIDTH_PX
+    zoom = math.log2(156543.03392 * math.cos(math.radians(lat)) / metres_per_px)
+    return max(ZOOM_RANGE[0], min(ZOOM_RANGE[1], int(zoom)))
+
+def load_centroids(path=None):
+    """{pincode: (lat, lng, radius_km)}; empty when the table does not exist yet."""
+    path = path or CENTROIDS_FILE
+    if not os.path.exists(path):
+        return {}
+    centroids = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                radius = float(row.get("radius_km") or DEFAULT_RADIUS_KM)
+                centroids[str(row["pincode"]).strip()] = (float(row["lat"]), float(row["lng"]), radius)
+            except (KeyError, ValueError):
+                continue
+    return centroids
+
+class PincodeZone:
+    """The operational pincodes plus their centroids: builds anchored URLs and classifies listings."""
+
+    def __init__(self, pincodes, centroids=None):
+        self.pincodes = {str(p) for p in pincodes}
+        if centroids is None:
+            centroids = load_centroids()
+            if not centroids:
+                print(f"⚠️ No pincode centroids in {CENTROIDS_FILE}: searches are not anchored to the zone "
+                      f"(build the table with `python pincode_geo.py <pincode_csv>`).", flush=True)
+        self.centroids = centroids
+        self.anchored = 0
+        self.unanchored = 0
+        self.dropped = 0
+
+    def anchor(self, pincode):
+        """"@lat,lng,zoomz" for the pincode, or "" when it has no centroid."""
+        centroid = self.centroids.get(str(pincode))
+        if not centroid:
+            self.unanchored += 1
+            return ""
+        self.anchored += 1
+        lat, lng, radius = centroid
+        return f"@{lat:.6f},{lng:.6f},{zoom_for_radius(radius, lat)}z"
+
+    def search_url(self, query, pincode):
+        anchor = self.anchor(pincode)
+        return f"{MAPS_BASE}/maps/search/{quote(query)}/" + (f"{anchor}/" if anchor else "")
+
+    def map_url(self, pincode):
+        """Maps home centred on the pincode, so a typed search is biased to the zone."""
+        anchor = self.anchor(pincode)
+        return f"{MAPS_BASE}/maps/{anchor}" if anchor else f"{MAPS_BASE}/maps"
+
+    def classify(self, details):
+        """("in", pincode) for a zone listing, ("out", pincode) for one outside it, ("unknown", "")."""
+        details = details or {}
+        pin = address_pincode(details.get("Address"))
+        if pin:
+            if pin in self.pincodes:
+                return "in", pin
+            self.dropped += 1
+            return "out", pin
+        lat, lng = details.get("Lat"), details.get("Lng")
+        if isinstance(lat, (int, float)) and isinstance(lng, (int, float)) and self.centroids:
+            nearest = min(
+                ((distance_km(lat, lng, c[0], c[1]) / c[2], p) for p, c in self.centroids.items() if p in self.pincodes),
+                default=None,
+            )
+            if nearest and nearest[0] > OUTSIDE_FACTOR:
+                self.dropped += 1
+                return "out", ""
+        return "unknown", ""
+
+    def summary(self):
+        return (f"📍 Geo anchors: {self.anchored} anchored / {self.unanchored} text-only searches, "
+                f"{self.dropped} out-of-zone listings dropped ({len(self.centroids)} centroids)")
+
+def build_centroids(pincodes, place_cache_db=PLACE_CACHE_DB, out_path=CENTROIDS_FILE):
+    """Median lat/lng of cached places whose address carries each pincode; radius = 80th-percentile distance."""
+    points = {}
+    conn = sqlite3.connect(place_cache_db)
+    for (data,) in conn.execute("SELECT data FROM places"):
+        try:
+            place = json.loads(data)
+        except ValueError:
+            continue
+        pin, lat, lng = address_pincode(place.get("Address")), place.get("Lat"), place.get("Lng")
+        if pin in pincodes and isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+            points.setdefault(pin, []).append((lat, lng))
+    conn.close()
+
+    existing = load_centroids(out_path)
+    rows = dict(existing)
+    for pin, pts in points.items():
+        if len(pts) < MIN_PLACES_FOR_CENTROID:
+            continue
+        lat, lng = median(p[0] for p in pts), median(p[1] for p in pts)
+        dists = sorted(distance_km(lat, lng, p[0], p[1]) for p in pts)
+        radius = max(MIN_RADIUS_KM, min(MAX_RADIUS_KM, dists[int(0.8 * (len(dists) - 1))]))
+        rows[pin] = (lat, lng, radius)
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["pincode", "lat", "lng", "radius_km"])
+        for pin in sorted(rows):
+            lat, lng, radius = rows[pin]
+            writer.writerow([pin, f"{lat:.6f}", f"{lng:.6f}", f"{radius:.2f}"])
+    os.replace(tmp, out_path)
+    missing = sorted(set(pincodes) - set(rows))
+    print(f"✅ {len(rows)} centroids in {out_path} ({len(rows) - len(existing)} new)"
+          + (f"; no data yet for {', '.join(missing)}" if missing else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pincode centroid table from cached Maps places.")
+    parser.add_argument("pincode_csv", help="CSV with a pincode column (e.g. operationalpincodesudupi.csv)")
+    parser.add_argument("--place-cache", default=PLACE_CACHE_DB)
+    parser.add_argument("--out", default=CENTROIDS_FILE)
+    args = parser.parse_args()
+    with open(args.pincode_csv, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        col = next((c for c in reader.fieldnames if "pincode" in c.strip().lower()), reader.fieldnames[0])
+        pincodes = {str(row[col]).strip().replace(".0", "") for row in reader if row.get(col)}
+    build_centroids(pincodes, args.place_cache, args.out)
+
+if __name__ == "__main__":
+    main()
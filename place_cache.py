@@ -0,0 +1,103 @@
+import json
+import re
+import sqlite3
+import time
+
+from maps_network import cid_from_href
+
+# ================= ⚙️ PLACE DETAIL CACHE =================
+# On-disk cache of place details shared by every Maps scraper, keyed by the place's cid
+# (the "0x...:0x..." id inside /place/ hrefs) or its place id. Entries expire after TTL_DAYS and
+# the least recently used ones are evicted once the cache holds more than MAX_ENTRIES.
+PLACE_CACHE_FILE = "/Users/apple/Desktop/webscrape/results/place_cache.db"
+TTL_DAYS = 14
+MAX_ENTRIES = 200_000
+# =========================================================
+
+def cache_key(href=None, place_id=None):
+    """cid from a /place/ href, else the place id, else the href's /place/<name> path. "" if none."""
+    cid = cid_from_href(href)
+    if cid:
+        return cid
+    if place_id:
+        return str(place_id)
+    match = re.search(r"/maps/place/([^/?]+)", href or "")
+    return match.group(1).lower() if match else ""
+
+class PlaceCache:
+    def __init__(self, path=PLACE_CACHE_FILE, ttl_days=TTL_DAYS, max_entries=MAX_ENTRIES):
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS places (key TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS places_lru ON places (last_used)")
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+    def get(self, key):
+        """Cached details for key, or None when missing / expired."""
+        if not key:
+            return None
+        row = self.conn.execute("SELECT data, fetched_at FROM places WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self.misses += 1
+            return None
+        if now - row[1] > self.ttl:
+            self.stale += 1
+            self.misses += 1
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE places SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def is_fresh(self, key):
+        """Like get() but without touching the counters or LRU order."""
+        if not key:
+            return False
+        row = self.conn.execute("SELECT fetched_at FROM places WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, key, details):
+        if not key or not details:
+            return
+        now = time.time()
+        existed = self.conn.execute("SELECT 1 FROM places WHERE key = ?", (key,)).fetchone() is not None
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO places (key, data, fetched_at, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at, "
+                "last_used = excluded.last_used",
+                (key, json.dumps(details, ensure_ascii=False), now, now),
+            )
+        if not existed:
+            self.size += 1
+            if self.size > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # Drop the least recently used 10% in one statement rather than one row per insert
+        drop = max(1, self.size - int(self.max_entries * 0.9))
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM places WHERE key IN (SELECT key FROM places ORDER BY last_used LIMIT ?)", (drop,)
+            )
+        self.size = self.conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return (f"🗃️ Place cache: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate, "
+                f"{self.stale} expired), {self.size} places cached")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,107 @@
+import json
+import os
+
+# ================= ⚙️ PLACE PANEL EXTRACTOR =================
+# One page.evaluate() call reads every field of the Maps place panel, so a listing costs one
+# browser round-trip instead of ~10 locator calls. Selectors live in SELECTORS and are versioned:
+# when Maps changes its markup, bump "version" and edit the lists (or drop a JSON file with the
+# same keys at SELECTORS_FILE to override them without touching code).
+SELECTORS = {
+    "version": "2026.10-1",
+    "main": "div[role='main']",
+    "name": ["div[role='main'] h1", "h1.DUwDvf", "h1", "div[role='main'] [class*='fontHeadline']"],
+    "name_reject": ["Results"],
+    "phone": ["button[aria-label^='Phone:']", "button[data-item-id^='phone:tel:']", "a[href^='tel:']"],
+    "phone_prefix": "Phone:",
+    # Tried in order against the panel text when no phone button exists
+    "phone_patterns": [
+        r"\+91[\s-]?\d{5}[\s-]?\d{5}",
+        r"0\d{2,4}[\s-]?\d{6,8}",
+        r"(?:\+91|0)?\s?\d{5}\s?\d{5}",
+    ],
+    "category": ["button[jsaction*='category']"],
+    "address": ["button[data-item-id='address']"],
+    "address_prefix": "Address:",
+}
+SELECTORS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps_selectors.json")
+# ============================================================
+
+EXTRACT_JS = """
+(cfg) => {
+    const first = (sels) => {
+        for (const sel of sels) {
+            const el = document.querySelector(sel);
+            if (el) return el;
+        }
+        return null;
+    };
+    const out = {name: null, phone: null, phone_source: null, category: null, address: null};
+    const main = document.querySelector(cfg.main);
+    const mainText = main ? (main.innerText || "") : "";
+    const okName = (t) => t && t.length < 200 && !cfg.name_reject.some(r => t.includes(r));
+
+    for (const sel of cfg.name) {
+        const el = document.querySelector(sel);
+        const text = el ? (el.innerText || "").trim() : "";
+        if (okName(text)) { out.name = text; break; }
+    }
+    if (!out.name) {
+        const line = mainText.split("\\n")[0].trim();
+        if (okName(line)) out.name = line;
+    }
+
+    const phoneEl = first(cfg.phone);
+    if (phoneEl) {
+        const label = phoneEl.getAttribute("aria-label") || "";
+        const href = phoneEl.getAttribute("href") || "";
+        out.phone = (label.replace(cfg.phone_prefix, "") || href.replace("tel:", "") || phoneEl.innerText || "").trim();
+        out.phone_source = "button";
+    }
+    if (!out.phone) {
+        for (const pattern of cfg.phone_patterns) {
+            const m = mainText.match(new RegExp(pattern));
+            if (m) { out.phone = m[0].trim(); out.phone_source = "text"; break; }
+        }
+    }
+
+    const catEl = first(cfg.category);
+    if (catEl) out.category = (catEl.innerText || "").trim();
+
+    const addrEl = first(cfg.address);
+    if (addrEl) out.address = (addrEl.getAttribute("aria-label") || "").replace(cfg.address_prefix, "").trim();
+    return out;
+}
+"""
+
+def load_selectors(path=SELECTORS_FILE):
+    config = dict(SELECTORS)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    return config
+
+ACTIVE_SELECTORS = load_selectors()
+
+def parse_result(raw):
+    """EXTRACT_JS output -> {"Name", "Phone", "Category", "Address"} with the usual placeholders."""
+    raw = raw or {}
+    return {
+        "Name": raw.get("name") or "N/A",
+        "Phone": raw.get("phone") or "Not Found",
+        "Category": raw.get("category") or "N/A",
+        "Address": raw.get("address") or "N/A",
+    }
+
+def extract_details(page, selectors=None):
+    """Sync pages: all panel fields in one round-trip."""
+    try:
+        return parse_result(page.evaluate(EXTRACT_JS, selectors or ACTIVE_SELECTORS))
+    except Exception:
+        return parse_result(None)
+
+async def extract_details_async(page, selectors=None):
+    """Async pages: all panel fields in one round-trip."""
+    try:
+        return parse_result(await page.evaluate(EXTRACT_JS, selectors or ACTIVE_SELECTORS))
+    except Exception:
+        return parse_result(None)
@@ -0,0 +1,85 @@
+import json
+import sqlite3
+import time
+
+from place_cache import cache_key
+
+# ================= ⚙️ SEARCH RESULT CACHE =================
+# Remembers the ordered list of place URLs each search returned last time, so a weekly re-sweep
+# only pays for what changed:
+#   - places already in the place cache (and not expired) are not opened again;
+#   - if the first screen of results matches the head of last run's list and every remaining
+#     cached place is still fresh, the feed is not scrolled at all and the cached tail is reused.
+QUERY_CACHE_FILE = "/Users/apple/Desktop/webscrape/results/query_cache.db"
+TTL_DAYS = 30          # Older lists are ignored entirely
+MIN_HEAD_MATCH = 8     # Listings that must match in order before the scroll is skipped
+# ==========================================================
+
+def normalize_term(term):
+    return " ".join(str(term).lower().split())
+
+class QueryCache:
+    def __init__(self, path=QUERY_CACHE_FILE, ttl_days=TTL_DAYS, min_head_match=MIN_HEAD_MATCH):
+        self.ttl = ttl_days * 86400
+        self.min_head_match = min_head_match
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries (term TEXT PRIMARY KEY, urls TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.scrolls_skipped = 0
+        self.new_places = 0
+        self.gone_places = 0
+
+    def get(self, term):
+        """Last run's ordered URL list for the search term, or None when unknown / too old."""
+        row = self.conn.execute(
+            "SELECT urls, fetched_at FROM queries WHERE term = ?", (normalize_term(term),)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, term, urls):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO queries (term, urls, fetched_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(term) DO UPDATE SET urls = excluded.urls, fetched_at = excluded.fetched_at",
+                (normalize_term(term), json.dumps(list(urls)), time.time()),
+            )
+
+    def unchanged_tail(self, term, loaded_urls, is_fresh):
+        """Cached URLs past the loaded head when scrolling can be skipped, else None.
+
+        `is_fresh(key)` tells whether a place's cached details are still valid (PlaceCache.is_fresh).
+        """
+        cached = self.get(term)
+        if not cached or len(loaded_urls) < self.min_head_match or len(cached) < len(loaded_urls):
+            return None
+        head = [cache_key(u) for u in loaded_urls]
+        if head != [cache_key(u) for u in cached[:len(loaded_urls)]]:
+            return None
+        tail = cached[len(loaded_urls):]
+        if not all(is_fresh(cache_key(u)) for u in tail):
+            return None
+        self.scrolls_skipped += 1
+        return tail
+
+    def record(self, term, urls):
+        """Stores this run's list and returns (new, gone) counts versus the previous one."""
+        previous = self.get(term) or []
+        old_keys = {cache_key(u) for u in previous}
+        new_keys = {cache_key(u) for u in urls}
+        new, gone = len(new_keys - old_keys), len(old_keys - new_keys)
+        self.new_places += new
+        self.gone_places += gone
+        self.put(term, urls)
+        return new, gone
+
+    def summary(self):
+        return (f"🧭 Query cache: {self.new_places} new / {self.gone_places} gone places vs last sweep, "
+                f"{self.scrolls_skipped} scrolls skipped")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,195 @@
+import heapq
+import re
+import sqlite3
+import time
+from collections import defaultdict
+
+from place_cache import cache_key
+
+# ================= ⚙️ QUERY PLANNER =================
+# Maps mostly ignores the pincode in "<category> in <pincode>" searches, so neighbouring pincodes
+# return the same places. Each place is owned by the first pincode whose search found it; a
+# search's overlap is the share of its places owned by *other* pincodes (so re-sweeping the same
+# search is not counted as overlap) and its yield is the number of places it owns. The planner:
+#   - skips a (category, pincode) whose last SATURATED_SWEEPS searches each had >= SATURATION
+#     overlap and owned at most MAX_OWN_WHEN_SATURATED places, or each returned no results at all
+#     (both re-checked after RECHECK_DAYS; an empty search has overlap 0, it is logged as "empty");
+#   - skips it within a run once other searches already returned COVERAGE_FULL places whose
+#     address is in that pincode and its expected yield has dropped below MIN_EXPECTED;
+#   - runs the rest in order of expected yield (past yield, discounted by in-run coverage).
+# Every skip is printed and stored in the `skips` table of PLAN_DB.
+PLAN_DB = "/Users/apple/Desktop/webscrape/results/query_plan.db"
+SATURATION = 0.9
+SATURATED_SWEEPS = 2
+MAX_OWN_WHEN_SATURATED = 1
+RECHECK_DAYS = 30
+COVERAGE_FULL = 40
+MIN_EXPECTED = 2.0
+UNKNOWN_EXPECTED = 60.0  # Never-searched pairs go first: they teach the planner the most
+# ====================================================
+
+PINCODE_RE = re.compile(r"\b[1-9]\d{5}\b")
+
+class QueryPlanner:
+    def __init__(self, path=PLAN_DB):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS searches (category TEXT NOT NULL, pincode TEXT NOT NULL, "
+            "searched_at REAL NOT NULL, results INTEGER NOT NULL, own INTEGER NOT NULL, new INTEGER NOT NULL, "
+            "overlap REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS searches_pair ON searches (category, pincode, searched_at)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS owners (category TEXT NOT NULL, place TEXT NOT NULL, pincode TEXT NOT NULL, "
+            "PRIMARY KEY (category, place))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS skips (category TEXT NOT NULL, pincode TEXT NOT NULL, "
+            "skipped_at REAL NOT NULL, reason TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.owners = defaultdict(dict)  # category -> place key -> pincode that found it first
+        for category, place, pincode in self.conn.execute("SELECT category, place, pincode FROM owners"):
+            self.owners[category][place] = pincode
+        self.history = defaultdict(list)  # (category, pincode) -> [(searched_at, results, own, overlap)], oldest first
+        for row in self.conn.execute(
+            "SELECT category, pincode, searched_at, results, own, overlap FROM searches ORDER BY searched_at"
+        ):
+            self.history[(row[0], row[1])].append(row[2:])
+        self.category_yield = defaultdict(lambda: [0, 0])  # category -> [sum, count] of each pair's latest yield
+        for (category, _), past in self.history.items():
+            self.category_yield[category][0] += past[-1][2]
+            self.category_yield[category][1] += 1
+        self.coverage = defaultdict(lambda: defaultdict(set))  # category -> address pincode -> places (this run)
+        self.skipped = 0
+        self.searched = 0
+        self.new_places = 0
+
+    # --- scoring ---
+    def _category_mean(self, category):
+        total, count = self.category_yield[category]
+        return total / count if count else UNKNOWN_EXPECTED
+
+    def expected_yield(self, category, pincode):
+        """Expected places a search will own, from its past yield and what this run already covered."""
+        past = self.history.get((category, pincode))
+        if past:
+            recent = past[-SATURATED_SWEEPS:]
+            base = sum(h[2] for h in recent) / len(recent)
+        else:
+            base = self._category_mean(category)
+        covered = len(self.coverage[category].get(pincode, ()))
+        return base * max(0.0, 1.0 - covered / COVERAGE_FULL)
+
+    def skip_reason(self, category, pincode):
+        """Why this search should not run now, or None."""
+        past = self.history.get((category, pincode), [])
+        recent = past[-SATURATED_SWEEPS:]
+        if len(recent) == SATURATED_SWEEPS and time.time() - recent[-1][0] < RECHECK_DAYS * 86400:
+            if all(h[1] == 0 for h in recent):
+                return f"empty in last {SATURATED_SWEEPS} sweeps (no results)"
+            if all(h[1] > 0 and h[3] >= SATURATION and h[2] <= MAX_OWN_WHEN_SATURATED for h in recent):
+                return (f"saturated in last {SATURATED_SWEEPS} sweeps ({recent[-1][3]:.0%} of results found by "
+                        f"other pincodes, {recent[-1][2]} own)")
+        covered = len(self.coverage[category].get(pincode, ()))
+        if covered >= COVERAGE_FULL and self.expected_yield(category, pincode) < MIN_EXPECTED:
+            return f"{covered} places in {pincode} already found by other {category} searches this run"
+        return None
+
+    def log_skip(self, category, pincode, reason):
+        self.skipped += 1
+        print(f"   ⏭️ Planner skip: {category} in {pincode} — {reason}", flush=True)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO skips (category, pincode, skipped_at, reason) VALUES (?, ?, ?, ?)",
+                (category, pincode, time.time(), reason),
+            )
+
+    # --- feedback ---
+    def observe(self, category, pincode, urls, addresses=()):
+        """Records one finished search: its places (hrefs) and the addresses of the leads it produced.
+        Returns (places owned by this pincode, overlap with other pincodes)."""
+        keys = {k for k in (cache_key(u) for u in urls) if k}
+        owners = self.owners[category]
+        new = [k for k in keys if k not in owners]
+        for k in new:
+            owners[k] = pincode
+        own = sum(1 for k in keys if owners[k] == pincode)
+        overlap = (1 - own / len(keys)) if keys else 0.0  # No results is "empty", not "all found elsewhere"
+        for address in addresses:
+            for pin in PINCODE_RE.findall(str(address or "")):
+                self.coverage[category][pin].add(address)
+        now = time.time()
+        past = self.history[(category, pincode)]
+        stats = self.category_yield[category]
+        if past:
+            stats[0] -= past[-1][2]
+        else:
+            stats[1] += 1
+        stats[0] += own
+        past.append((now, len(keys), own, overlap))
+        self.searched += 1
+        self.new_places += len(new)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO searches (category, pincode, searched_at, results, own, new, overlap) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (category, pincode, now, len(keys), own, len(new), overlap),
+            )
+            self.conn.executemany("INSERT OR IGNORE INTO owners (category, place, pincode) VALUES (?, ?, ?)",
+                                  [(category, k, pincode) for k in new])
+        return own, overlap
+
+    def summary(self):
+        return (f"🧮 Query planner: {self.searched} searches run, {self.skipped} skipped, "
+                f"{self.new_places} new places")
+
+    def close(self):
+        self.conn.close()
+
+class PlannedTasks:
+    """category_search task source (same interface as QueueTasks) that hands out the search with the
+    highest expected yield first and drops saturated ones. Scores mostly fall as the run covers more
+    ground, so a lazy max-heap is enough: a popped task whose fresh score is lower is pushed back."""
+
+    def __init__(self, items, planner):
+        self.planner = planner
+        self.heap = []
+        self.seq = 0
+        for pincode, category in items:
+            reason = planner.skip_reason(category, pincode)
+            if reason:
+                planner.log_skip(category, pincode, reason)
+            else:
+                self._push((pincode, category))
+
+    def _push(self, item, score=None):
+        pincode, category = item
+        score = self.planner.expected_yield(category, pincode) if score is None else score
+        self.seq += 1
+        heapq.heappush(self.heap, (-score, self.seq, item))
+
+    def __len__(self):
+        return len(self.heap)
+
+    async def next(self):
+        while self.heap:
+            neg_score, _, item = heapq.heappop(self.heap)
+            pincode, category = item
+            reason = self.planner.skip_reason(category, pincode)
+            if reason:
+                self.planner.log_skip(category, pincode, reason)
+                continue
+            score = self.planner.expected_yield(category, pincode)
+            if score < -neg_score - 1e-9:
+                self._push(item, score)
+                continue
+            return item
+        return None
+
+    def retry(self, item):
+        self._push(item, 0.0)
+
+    def complete(self, item):
+        pass
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+# ================= ⚙️ RATE SCHEDULER =================
+# Every politeness decision of every scraper goes through here, per target host:
+#   - token bucket: requests are spaced at the host's current rate (with a little jitter);
+#   - AIMD: each clean response adds ADD_STEP req/s, a captcha / "unusual traffic" page or a
+#     rising timeout rate multiplies the rate by DECREASE_FACTOR;
+#   - circuit breaker: a block (or ERROR_TRIP errors in a row) pauses the host for a cooldown that
+#     doubles on every consecutive trip; after MAX_TRIPS trips without a clean response in between
+#     the host is halted and the scraper stops, leaving the rest of its task ledger for a later run.
+# Rates are requests per second across all workers of a process.
+HOST_PROFILES = {
+    "www.google.com": {"rate": 0.33, "min_rate": 0.05, "max_rate": 0.8, "burst": 1},
+    "dir.indiamart.com": {"rate": 0.4, "min_rate": 0.05, "max_rate": 1.0, "burst": 2},
+    "default": {"rate": 0.5, "min_rate": 0.05, "max_rate": 1.0, "burst": 1},
+}
+ADD_STEP = 0.01            # req/s gained per clean response
+DECREASE_FACTOR = 0.5      # Rate multiplier on a block or timeout spike
+JITTER = 0.3               # Extra random delay, as a fraction of the current interval
+TIMEOUT_WINDOW = 20        # Recent outcomes considered for the timeout rate
+TIMEOUT_RATE_LIMIT = 0.3   # Timeout share (over at least 5 outcomes) that counts as a slowdown signal
+ERROR_TRIP = 5             # Consecutive errors/timeouts that trip the breaker
+BREAKER_COOLDOWN = 120.0   # Seconds of the first trip; doubles on each consecutive trip
+MAX_TRIPS = 3              # Consecutive trips before the host is halted for this run
+ERROR_BACKOFF = 5.0        # Pause after an error; doubles with consecutive errors, capped at MAX_BACKOFF
+MAX_BACKOFF = 120.0
+# Applied on top of HOST_PROFILES and any scraper's own profiles (benchmark.py lifts the politeness
+# limits here while it runs the scrapers against its local mock server)
+PROFILE_OVERRIDES = {}
+BLOCK_MARKERS = ["unusual traffic", "/sorry/", "recaptcha", "captcha", "access denied", "are you a robot"]
+# =====================================================
+
+# URL and the top of the page text, enough to spot an interstitial without reading the whole DOM
+PAGE_PROBE_JS = """() => [location.href, document.body ? document.body.innerText.slice(0, 3000) : ""]"""
+
+def host_of(url):
+    return urlparse(url).hostname or url
+
+def looks_blocked(url="", text=""):
+    haystack = f"{url}\n{text}".lower()
+    return any(marker in haystack for marker in BLOCK_MARKERS)
+
+def is_timeout(exc):
+    return "timeout" in type(exc).__name__.lower() or "timeout" in str(exc).lower()[:200]
+
+class HostLimiter:
+    """Token bucket + AIMD + circuit breaker for one host. Time-based logic only; no sleeping."""
+
+    def __init__(self, host, rate, min_rate, max_rate, burst):
+        self.host = host
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.recent = deque(maxlen=TIMEOUT_WINDOW)
+        self.consecutive_errors = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.halted = False
+        self.requests = 0
+        self.blocks = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.waited = 0.0
+
+    def reserve(self):
+        """Takes a token now and returns how long the caller must wait before using it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        delay = max(0.0, -self.tokens / self.rate)
+        delay += random.uniform(0, JITTER / self.rate)
+        delay = max(delay, self.open_until - now)
+        self.requests += 1
+        self.waited += delay
+        return delay
+
+    def _decrease(self):
+        self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+        self.recent.clear()
+
+    def _trip(self, reason):
+        self.trips += 1
+        if self.trips > MAX_TRIPS:
+            self.halted = True
+            print(f"⛔ {self.host}: {reason}, breaker tripped {MAX_TRIPS} times in a row — halting this host.", flush=True)
+            return
+        cooldown = BREAKER_COOLDOWN * 2 ** (self.trips - 1)
+        self.open_until = time.monotonic() + cooldown
+        self.tokens = min(self.tokens, 0.0)
+        print(f"🧯 {self.host}: {reason}, pausing {cooldown:.0f}s (trip {self.trips}/{MAX_TRIPS}, "
+              f"rate now {self.rate:.2f} req/s).", flush=True)
+
+    def record(self, outcome):
+        """outcome: "ok", "blocked", "timeout" or "error"."""
+        self.recent.append(outcome)
+        if outcome == "ok":
+            self.rate = min(self.max_rate, self.rate + ADD_STEP)
+            self.consecutive_errors = 0
+            self.trips = 0
+            return
+        if outcome == "blocked":
+            self.blocks += 1
+            self._decrease()
+            self._trip("captcha / unusual-traffic page")
+            return
+        self.consecutive_errors += 1
+        if outcome == "timeout":
+            self.timeouts += 1
+            share = self.recent.count("timeout") / len(self.recent)
+            if len(self.recent) >= 5 and share > TIMEOUT_RATE_LIMIT:
+                self._decrease()
+        else:
+            self.errors += 1
+        if self.consecutive_errors >= ERROR_TRIP:
+            self.consecutive_errors = 0
+            self._decrease()
+            self._trip(f"{ERROR_TRIP} errors in a row")
+
+    def backoff_delay(self):
+        return min(MAX_BACKOFF, ERROR_BACKOFF * 2 ** max(0, self.consecutive_errors - 1)) * random.uniform(0.8, 1.2)
+
+    def summary(self):
+        return (f"{self.host}: {self.requests} requests, {self.rate:.2f} req/s now, {self.waited:.0f}s waited, "
+                f"{self.blocks} blocks, {self.timeouts} timeouts, {self.errors} errors"
+                + (", HALTED" if self.halted else ""))
+
+class RateScheduler:
+    """One per process; hosts are created on first use from HOST_PROFILES (or `profiles` overrides)."""
+
+    def __init__(self, profiles=None):
+        self.profiles = {**HOST_PROFILES, **(profiles or {}), **PROFILE_OVERRIDES}
+        self.hosts = {}
+
+    def limiter(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = HostLimiter(host, **self.profiles.get(host, self.profiles["default"]))
+        return self.hosts[host]
+
+    def halted(self, host):
+        return self.limiter(host).halted
+
+    def record(self, host, outcome):
+        self.limiter(host).record(outcome)
+
+    def record_error(self, host, exc):
+        self.limiter(host).record("timeout" if is_timeout(exc) else "error")
+
+    # --- sync (map_searchmerge) ---
+    def wait(self, host):
+        """Blocks until the next request to host may start. Returns False once the host is halted."""
+        limiter = self.limiter(host)
+        if limiter.halted:
+            return False
+        time.sleep(limiter.reserve())
+        return not limiter.halted
+
+    def backoff(self, host):
+        time.sleep(self.limiter(host).backoff_delay())
+
+    def check_page(self, host, page):
+        """Records "blocked" or "ok" for the page just loaded. True when it is a captcha/block page."""
+        try:
+            url, text = page.evaluate(PAGE_PROBE_JS)
+        except Exception:
+            url, text = page.url, ""
+        blocked = looks_blocked(url, text)
+        self.record(host, "blocked" if blocked else "ok")
+        return blocked
+
+    # --- async (category_search, indiamart) ---
+    async def wait_async(self, host):
+        limiter = self.limiter(host)
+        if limiter.halted:
+            return False
+        await asyncio.sleep(limiter.reserve())
+        return not limiter.halted
+
+    async def backoff_async(self, host):
+        await asyncio.sleep(self.limiter(host).backoff_delay())
+
+    async def check_page_async(self, host, page):
+        try:
+            url, text = await page.evaluate(PAGE_PROBE_JS)
+        except Exception:
+            url, text = page.url, ""
+        blocked = looks_blocked(url, text)
+        self.record(host, "blocked" if blocked else "ok")
+        return blocked
+
+    def summary(self):
+        return "🚦 Rate scheduler: " + ("; ".join(h.summary() for h in self.hosts.values()) or "no requests")
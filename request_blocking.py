@@ -0,0 +1,116 @@
+import re
+
+# ================= ⚙️ REQUEST BLOCKING (FAST MODE) =================
+# Shared context.route layer for all scrapers. Pick a policy per scraper:
+#   "off"   -> nothing blocked
+#   "lite"  -> images, media, fonts, analytics/beacons
+#   "fast"  -> lite + Maps tiles, street view / place photos and image URLs fetched by script
+# Stylesheets are left alone: the Maps feed needs its layout to scroll.
+# Nothing here touches document, xhr or fetch requests that carry listing or phone data.
+ANALYTICS_PATTERNS = [
+    r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net",
+    r"googlesyndication\.com", r"/gen_204", r"/log\?", r"play\.google\.com/log",
+    r"facebook\.(net|com)/tr", r"hotjar\.com", r"clarity\.ms", r"/collect\?",
+]
+MAPS_TILE_PATTERNS = [
+    r"/maps/vt[/?]", r"/maps/vt$", r"khms\d*\.google", r"/kh/v=", r"/maps/api/staticmap",
+    r"streetviewpixels", r"/maps/rpc/photo", r"lh\d\.googleusercontent\.com",
+    r"geo\d\.ggpht\.com",
+]
+IMAGE_URL_PATTERNS = [r"imgs\.indiamart\.com", r"\.(png|jpe?g|gif|webp|svg|ico)(\?|$)"]
+
+# Blocked requests are never downloaded, so savings are estimated from typical sizes per type
+EST_BYTES = {
+    "image": 40_000, "media": 300_000, "font": 60_000, "stylesheet": 30_000,
+    "xhr": 20_000, "fetch": 20_000, "script": 50_000, "other": 5_000,
+}
+# ====================================================================
+
+class BlockPolicy:
+    def __init__(self, name, resource_types=(), url_patterns=()):
+        self.name = name
+        self.resource_types = set(resource_types)
+        self.url_re = re.compile("|".join(url_patterns), re.I) if url_patterns else None
+
+    def reason(self, resource_type, url):
+        """Why this request should be blocked, or None to let it through."""
+        if resource_type in self.resource_types:
+            return resource_type
+        if self.url_re is not None and self.url_re.search(url):
+            return "pattern"
+        return None
+
+POLICIES = {
+    "off": BlockPolicy("off"),
+    "lite": BlockPolicy("lite", ["image", "media", "font"], ANALYTICS_PATTERNS),
+    "fast": BlockPolicy("fast", ["image", "media", "font"], ANALYTICS_PATTERNS + MAPS_TILE_PATTERNS + IMAGE_URL_PATTERNS),
+}
+
+def get_policy(policy):
+    if isinstance(policy, BlockPolicy):
+        return policy
+    if policy in POLICIES:
+        return POLICIES[policy]
+    raise ValueError(f"Unknown block policy {policy!r}; choose from {sorted(POLICIES)}")
+
+class BlockStats:
+    """Per-run counters: blocked / allowed requests and estimated bytes saved."""
+
+    def __init__(self, policy_name):
+        self.policy_name = policy_name
+        self.allowed = 0
+        self.blocked = 0
+        self.bytes_saved = 0
+        self.by_reason = {}
+
+    def record_block(self, reason, resource_type):
+        self.blocked += 1
+        self.bytes_saved += EST_BYTES.get(resource_type, EST_BYTES["other"])
+        self.by_reason[reason] = self.by_reason.get(reason, 0) + 1
+
+    def summary(self):
+        total = self.blocked + self.allowed
+        share = (100.0 * self.blocked / total) if total else 0.0
+        reasons = ", ".join(f"{k}={v}" for k, v in sorted(self.by_reason.items(), key=lambda kv: -kv[1]))
+        return (f"🛡️ Block policy '{self.policy_name}': {self.blocked}/{total} requests blocked ({share:.0f}%), "
+                f"~{self.bytes_saved / 1_000_000:.1f} MB saved" + (f" [{reasons}]" if reasons else ""))
+
+def _decide(policy, stats, request):
+    reason = policy.reason(request.resource_type, request.url)
+    if reason:
+        stats.record_block(reason, request.resource_type)
+    else:
+        stats.allowed += 1
+    return reason
+
+def install(context, policy="fast", stats=None):
+    """Routes every request of a sync BrowserContext through the policy. Returns the BlockStats."""
+    policy = get_policy(policy)
+    stats = stats or BlockStats(policy.name)
+    if policy.name == "off":
+        return stats
+
+    def handler(route, request):
+        if _decide(policy, stats, request):
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", handler)
+    return stats
+
+async def install_async(context, policy="fast", stats=None):
+    """Async-API twin of install()."""
+    policy = get_policy(policy)
+    stats = stats or BlockStats(policy.name)
+    if policy.name == "off":
+        return stats
+
+    async def handler(route, request):
+        if _decide(policy, stats, request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handler)
+    return stats
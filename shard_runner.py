@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import glob
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+import category_search
+from lead_store import csv_columns, normalize_key
+
+# ================= ⚙️ SHARDED DISCOVERY =================
+# Splits category_search's (pincode x category) searches over several headless processes.
+# Every shard claims small batches of tasks from one SQLite task store (TASKS_DB). The store runs in
+# WAL mode, which needs shared memory on one host: all shards must run on the same machine, with
+# TASKS_DB on a local disk (never NFS/SMB — shards on other machines could corrupt it or get the same
+# task twice). Each shard writes its own lead store / CSV and progress ledger under SHARD_DIR;
+# `merge` then combines the shard CSVs into one deterministic, deduplicated OUTPUT_FILE.
+#   python shard_runner.py run --processes 6     # seed + run shards + merge
+#   python shard_runner.py run --no-merge        # more shards from a second terminal on this machine
+#   python shard_runner.py status | merge
+RESULTS_DIR = os.path.dirname(category_search.OUTPUT_FILE)
+TASKS_DB = os.path.join(RESULTS_DIR, "shard_tasks.db")
+SHARD_DIR = os.path.join(RESULTS_DIR, "shards")
+OUTPUT_FILE = category_search.OUTPUT_FILE
+PROCESSES = max(1, min(6, (os.cpu_count() or 2) // 2))  # Each shard runs its own Chromium
+WORKERS_PER_SHARD = 2     # Browser contexts per shard (category_search.WORKERS for a single process)
+CLAIM_BATCH = 4           # Tasks claimed per trip to the store
+LEASE_SECONDS = 30 * 60   # A claimed task not finished by then (crashed shard) goes back to the pool
+# ========================================================
+
+class TaskStore:
+    """(pincode, category) tasks shared by every shard: pending -> claimed (leased) -> done."""
+
+    def __init__(self, path=TASKS_DB, lease_seconds=LEASE_SECONDS):
+        self.lease = lease_seconds
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks (pincode TEXT NOT NULL, category TEXT NOT NULL, "
+            "state TEXT NOT NULL DEFAULT 'pending', owner TEXT, claimed_at REAL, done_at REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (pincode, category))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, claimed_at)")
+
+    def seed(self, items):
+        """Adds tasks that are not in the store yet; returns how many were new."""
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany("INSERT OR IGNORE INTO tasks (pincode, category) VALUES (?, ?)", list(items))
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def claim(self, owner, n=CLAIM_BATCH):
+        """Atomically leases up to n pending (or abandoned) tasks to owner, in seeding order."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                "SELECT rowid, pincode, category FROM tasks WHERE state = 'pending' "
+                "OR (state = 'claimed' AND claimed_at < ?) ORDER BY rowid LIMIT ?",
+                (now - self.lease, n),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET state = 'claimed', owner = ?, claimed_at = ?, attempts = attempts + 1 WHERE rowid = ?",
+                [(owner, now, row[0]) for row in rows],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [(row[1], row[2]) for row in rows]
+
+    def complete(self, item, owner):
+        self.conn.execute(
+            "UPDATE tasks SET state = 'done', done_at = ? WHERE pincode = ? AND category = ? AND owner = ?",
+            (time.time(), item[0], item[1], owner),
+        )
+
+    def release(self, owner):
+        """Returns the owner's unfinished claims to the pool (clean shard shutdown)."""
+        self.conn.execute("UPDATE tasks SET state = 'pending', owner = NULL WHERE state = 'claimed' AND owner = ?", (owner,))
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+class SharedTasks:
+    """category_search task source backed by the TaskStore (same interface as QueueTasks)."""
+
+    def __init__(self, store, owner, batch=CLAIM_BATCH):
+        self.store = store
+        self.owner = owner
+        self.batch = batch
+        self.local = []
+
+    async def next(self):
+        if not self.local:
+            self.local = self.store.claim(self.owner, self.batch)
+        return self.local.pop(0) if self.local else None
+
+    def retry(self, item):
+        self.local.append(item)
+
+    def complete(self, item):
+        self.store.complete(item, self.owner)
+
+def shard_owner(shard_id):
+    return f"{socket.gethostname()}-{os.getpid()}-{shard_id}"
+
+def run_shard(shard_id, tasks_db=TASKS_DB, workers=WORKERS_PER_SHARD, headless=True):
+    """One process: a full category_search run fed from the shared store, with its own output files."""
+    owner = shard_owner(shard_id)
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    output_file = os.path.join(SHARD_DIR, f"leads_{owner}.csv")
+    progress_file = os.path.join(SHARD_DIR, f"progress_{owner}.txt")
+    store = TaskStore(tasks_db)
+    try:
+        asyncio.run(category_search.run_deep_discovery(
+            workers, tasks=SharedTasks(store, owner), output_file=output_file,
+            progress_file=progress_file, headless=headless,
+        ))
+    finally:
+        store.release(owner)
+        store.close()
+    return output_file
+
+def seed_tasks(tasks_db=TASKS_DB):
+    pincodes = category_search.load_pincodes()
+    store = TaskStore(tasks_db)
+    added = store.seed((pincode, category) for pincode in pincodes for category in category_search.SEARCH_CATEGORIES)
+    counts = store.counts()
+    store.close()
+    print(f"📋 Task store {tasks_db}: {added} new tasks, {counts}")
+
+def merge_shards(output_file=OUTPUT_FILE, shard_dir=SHARD_DIR):
+    """All shard CSVs (plus any existing OUTPUT_FILE) -> one CSV, deduplicated on the lead store key
+    (normalized name, phone). Rows are sorted first, so the result does not depend on shard timing."""
+    paths = sorted(glob.glob(os.path.join(shard_dir, "leads_*.csv")))
+    frames = [pd.read_csv(path, dtype=str, keep_default_na=False) for path in paths]
+    if os.path.exists(output_file):
+        frames.append(pd.read_csv(output_file, dtype=str, keep_default_na=False))
+    if not frames:
+        print(f"🔸 No shard outputs in {shard_dir}.")
+        return
+    columns = csv_columns(category_search.OUTPUT_COLUMNS, "Place_Id")  # Same layout as the lead store writes
+    leads = pd.concat(frames, ignore_index=True).reindex(columns=columns).fillna("")
+    total = len(leads)
+    leads = leads.sort_values(["Pincode", "Category", "Name", "Contact_Number", "Address", "Location"], kind="stable")
+    keys = pd.DataFrame({"k1": leads["Name"].map(normalize_key), "k2": leads["Contact_Number"].map(normalize_key)})
+    leads = leads[~keys.duplicated()]
+    tmp = output_file + ".tmp"
+    leads[columns].to_csv(tmp, index=False)
+    os.replace(tmp, output_file)
+    print(f"✅ Merged {len(paths)} shard files ({total} rows) -> {len(leads)} unique leads in {output_file}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run category discovery as parallel headless shards.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_cmd = sub.add_parser("run", help="Seed the task store, run shards, merge their outputs")
+    run_cmd.add_argument("--processes", type=int, default=PROCESSES)
+    run_cmd.add_argument("--workers", type=int, default=WORKERS_PER_SHARD, help="Browser contexts per shard")
+    run_cmd.add_argument("--tasks-db", default=TASKS_DB)
+    run_cmd.add_argument("--headed", action="store_true", help="Show the shard browsers")
+    run_cmd.add_argument("--no-merge", action="store_true", help="Leave merging to a later `merge`")
+    sub.add_parser("status", help="Task counts by state").add_argument("--tasks-db", default=TASKS_DB)
+    sub.add_parser("merge", help="Merge shard outputs into OUTPUT_FILE").add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        store = TaskStore(args.tasks_db)
+        print(f"📋 {args.tasks_db}: {store.counts()}")
+        store.close()
+        return
+    if args.command == "merge":
+        merge_shards(args.output)
+        return
+
+    seed_tasks(args.tasks_db)
+    print(f"🚀 Starting {args.processes} shards x {args.workers} workers...", flush=True)
+    # spawn: every shard gets a clean interpreter (Playwright does not survive fork)
+    with ProcessPoolExecutor(max_workers=args.processes, mp_context=get_context("spawn")) as executor:
+        futures = [
+            executor.submit(run_shard, shard_id, args.tasks_db, args.workers, not args.headed)
+            for shard_id in range(args.processes)
+        ]
+        for future in futures:
+            try:
+                print(f"🏁 Shard finished: {future.result()}")
+            except Exception as e:
+                print(f"⚠️ Shard failed: {e}")
+    store = TaskStore(args.tasks_db)
+    print(f"📋 Task store: {store.counts()}")
+    store.close()
+    if not args.no_merge:
+        merge_shards()
+
+if __name__ == "__main__":
+    main()
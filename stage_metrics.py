@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import threading
+import time
+from array import array
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ================= ⚙️ STAGE METRICS =================
+# Where a scraper's time goes. Code marks stages with `with metrics.span("scroll"):` and events
+# with `metrics.count("retry")`; every finished span becomes one JSON line
+#   {"ts", "scraper", "pid", "stage", "ms", "ok", ...labels}
+# in the scraper's metrics file (<output>.metrics.jsonl, written in batches of FLUSH_EVERY lines),
+# and the counters are appended as one "counters" line when the run ends. The end-of-run summary
+# ranks stages by total time (worker-seconds: parallel workers add up). ENVELOPE_STAGES contain
+# other stages, so they are listed separately instead of ranked.
+# With METRICS_PORT set, running totals are served in Prometheus text format on
+# http://127.0.0.1:<port>/metrics (a busy port, e.g. a second shard, just skips the endpoint).
+METRICS_PORT = None
+FLUSH_EVERY = 200
+ENVELOPE_STAGES = ("search", "listing", "row", "batch")
+# ====================================================
+
+class _Span:
+    __slots__ = ("metrics", "stage", "labels", "started")
+
+    def __init__(self, metrics, stage, labels):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started, ok=exc_type is None, **self.labels)
+        return False
+
+class StageMetrics:
+    """Spans and counters for one scraper process. Safe to use from asyncio code and threads."""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.totals = Counter()   # stage -> seconds
+        self.calls = Counter()    # stage -> spans
+        self.failures = Counter() # stage -> spans that raised
+        self.durations = {}       # stage -> array of seconds (for percentiles)
+        self.counters = Counter()
+        self.buffer = []
+        self.path = None
+        self.server = None
+
+    def export_to(self, path):
+        """Appends span lines to path (JSON lines)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        return self
+
+    def serve(self, port=METRICS_PORT):
+        """Starts the Prometheus text endpoint when a port is configured."""
+        if not port:
+            return self
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint not started on port {port}: {e}", flush=True)
+            return self
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📈 Metrics: http://127.0.0.1:{port}/metrics", flush=True)
+        return self
+
+    # --- recording ---
+    def span(self, stage, **labels):
+        return _Span(self, stage, labels)
+
+    def observe(self, stage, seconds, ok=True, **labels):
+        """Records a stage timed elsewhere (span() ends up here too)."""
+        with self.lock:
+            self.totals[stage] += seconds
+            self.calls[stage] += 1
+            if not ok:
+                self.failures[stage] += 1
+            self.durations.setdefault(stage, array("d")).append(seconds)
+            if self.path:
+                record = {"ts": round(time.time(), 3), "scraper": self.scraper, "pid": self.pid, "stage": stage,
+                          "ms": round(seconds * 1000, 1), "ok": ok}
+                record.update(labels)
+                self.buffer.append(record)
+                if len(self.buffer) >= FLUSH_EVERY:
+                    self._flush()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def _flush(self):
+        if not self.buffer or not self.path:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.buffer))
+        self.buffer = []
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.path:
+                self.buffer.append({"ts": round(time.time(), 3), "scraper": self.scraper, "pid": self.pid,
+                                    "host": socket.gethostname(), "counters": dict(self.counters)})
+            self._flush()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    # --- reporting ---
+    @staticmethod
+    def _percentile(values, share):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))] if ordered else 0.0
+
+    def prometheus(self):
+        with self.lock:
+            totals, calls, failures, counters = dict(self.totals), dict(self.calls), dict(self.failures), dict(self.counters)
+        label = f'scraper="{self.scraper}"'
+        lines = ["# TYPE scraper_stage_seconds_total counter"]
+        lines += [f'scraper_stage_seconds_total{{{label},stage="{s}"}} {v:.3f}' for s, v in sorted(totals.items())]
+        lines.append("# TYPE scraper_stage_calls_total counter")
+        lines += [f'scraper_stage_calls_total{{{label},stage="{s}"}} {v}' for s, v in sorted(calls.items())]
+        lines.append("# TYPE scraper_stage_failures_total counter")
+        lines += [f'scraper_stage_failures_total{{{label},stage="{s}"}} {v}' for s, v in sorted(failures.items())]
+        lines.append("# TYPE scraper_events_total counter")
+        lines += [f'scraper_events_total{{{label},event="{n}"}} {v}' for n, v in sorted(counters.items())]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        with self.lock:
+            totals = dict(self.totals)
+            durations = {s: list(v) for s, v in self.durations.items()}
+            counters = dict(self.counters)
+        ranked = sorted((s for s in totals if s not in ENVELOPE_STAGES), key=lambda s: -totals[s])
+        grand = sum(totals[s] for s in ranked) or 1.0
+        lines = [f"⏱️ Stage times ({self.scraper}, worker-seconds):"]
+        for rank, stage in enumerate(ranked, 1):
+            values = durations[stage]
+            fails = f", {self.failures[stage]} failed" if self.failures[stage] else ""
+            lines.append(f"   {rank:>2}. {stage:<16} {totals[stage]:>9.1f}s {totals[stage] / grand:>4.0%}  n={len(values)}  "
+                         f"p50 {self._percentile(values, 0.5) * 1000:.0f} ms  p95 {self._percentile(values, 0.95) * 1000:.0f} ms{fails}")
+        envelopes = [s for s in ENVELOPE_STAGES if s in totals]
+        if envelopes:
+            lines.append("   per unit: " + ", ".join(
+                f"{s} {totals[s] / len(durations[s]):.1f}s avg (n={len(durations[s])})" for s in envelopes))
+        if counters:
+            lines.append("   counters: " + ", ".join(f"{k} {v}" for k, v in sorted(counters.items(), key=lambda kv: -kv[1])))
+        if self.path:
+            lines.append(f"   spans: {self.path}")
+        return "\n".join(lines)
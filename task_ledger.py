@@ -0,0 +1,61 @@
+import json
+import os
+
+# ================= ⚙️ TASK LEDGER =================
+# Persistent per-task progress for resumable runs, one JSON line per state change:
+#   {"task": ["maps", "576211", "Rice Mill"], "state": "running", "scrolled": 42, "last_index": 17}
+#   {"task": ["indiamart", "Malpe", "furniture"], "state": "running", "page": 3}
+# The last line for a task wins. The file is compacted to one line per task on open.
+# States: "running" (started, resume from last_index / page) and "done" (skip on resume).
+DEFAULT_LEDGER_FILE = "/Users/apple/Desktop/webscrape/results/category_discovery_progress.txt"
+# ==================================================
+
+class TaskLedger:
+    def __init__(self, path=DEFAULT_LEDGER_FILE):
+        self.path = path
+        self.tasks = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    task = tuple(entry.pop("task", ()))
+                    if task:
+                        self.tasks.setdefault(task, {}).update(entry)
+        self._compact()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for task, entry in self.tasks.items():
+                f.write(json.dumps({"task": list(task), **entry}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def get(self, *task):
+        return dict(self.tasks.get(tuple(task), {}))
+
+    def is_done(self, *task):
+        return self.tasks.get(tuple(task), {}).get("state") == "done"
+
+    def update(self, *task, **fields):
+        """Merges fields into the task's entry and appends the change to the ledger file."""
+        entry = self.tasks.setdefault(tuple(task), {})
+        entry.update(fields)
+        self.file.write(json.dumps({"task": list(task), **fields}, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def start(self, *task, **fields):
+        self.update(*task, state="running", **fields)
+
+    def done(self, *task, **fields):
+        self.update(*task, state="done", **fields)
+
+    def summary(self, scope=None):
+        states = [e.get("state") for t, e in self.tasks.items() if scope is None or t[0] == scope]
+        return {"done": states.count("done"), "running": states.count("running")}
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from entity_resolution import clean_name_tokens, resolve_leads, soundex
+
+def discovery(rows):
+    return ("discovery", pd.DataFrame(rows, columns=["Category", "Name", "Location", "Address", "Pincode", "Contact_Number"]))
+
+def test_clean_name_tokens_drops_stopwords_and_plurals():
+    assert clean_name_tokens("Sri Durga Rice Mills, Udupi") == ["durga", "mill", "rice"]
+
+def test_soundex():
+    assert soundex("Robert") == soundex("Rupert") == "r163"
+
+def test_same_phone_merges():
+    golden = resolve_leads([discovery([
+        ["Rice Mill", "Durga Rice Mill", "", "Main Road, Udupi 576101", "576101", "9876543210"],
+        ["Rice Mill", "Sri Durga Rice Mills", "", "Udupi 576101", "576101", "+91 98765 43210"],
+    ])])
+    assert len(golden) == 1
+    assert golden.loc[0, "Records"] == 2
+
+def test_similar_name_without_second_phone_merges():
+    golden = resolve_leads([discovery([
+        ["Rice Mill", "Durga Rice Mill", "", "Main Road, Udupi 576101", "576101", "9876543210"],
+        ["Rice Mill", "Sri Durga Rice Mills", "", "Udupi 576101", "576101", "Not Found"],
+    ])])
+    assert len(golden) == 1
+
+def test_same_name_different_phones_stay_apart():
+    golden = resolve_leads([discovery([
+        ["Hardware Store", "Sri Ganesh Hardware", "", "Car Street, Udupi 576101", "576101", "9876543210"],
+        ["Hardware Store", "Sri Ganesh Hardware", "", "Kalsanka Circle, Udupi 576101", "576101", "9845012345"],
+    ])])
+    assert len(golden) == 2
+    assert set(golden["Phone"]) == {"+919876543210", "+919845012345"}
+    assert golden["Other_Phones"].eq("").all()
+
+def test_name_chain_does_not_join_two_phones():
+    # The phoneless record matches both shops by name; it must not glue their numbers together
+    golden = resolve_leads([discovery([
+        ["Hardware Store", "Sri Ganesh Hardware", "", "Car Street, Udupi 576101", "576101", "9876543210"],
+        ["Hardware Store", "Ganesh Hardware", "", "Udupi 576101", "576101", ""],
+        ["Hardware Store", "Sri Ganesh Hardware", "", "Kalsanka Circle, Udupi 576101", "576101", "9845012345"],
+    ])])
+    assert len(golden) == 2
+
+def test_same_name_same_address_different_phones_merge():
+    golden = resolve_leads([discovery([
+        ["Hardware Store", "Sri Ganesh Hardware", "", "Car Street, Udupi 576101", "576101", "9876543210"],
+        ["Hardware Store", "Sri Ganesh Hardware", "", "Car Street, Udupi 576101", "576101", "0820 252 1234"],
+    ])])
+    assert len(golden) == 1
+    assert golden.loc[0, "Other_Phones"] != ""
+
+def test_golden_pincode_from_a_later_record():
+    golden = resolve_leads([discovery([
+        ["Rice Mill", "Durga Rice Mill", "", "Main Road, Udupi", "N/A", "9876543210"],
+        ["Rice Mill", "Sri Durga Rice Mills", "", "Udupi 576101", "", "+91 98765 43210"],
+    ])])
+    assert len(golden) == 1
+    assert golden.loc[0, "Pincode"] == "576101"
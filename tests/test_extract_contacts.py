@@ -0,0 +1,104 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import extract_contacts
+from extract_contacts import ContactExporter, PhoneSet, ShardedWriter, detect_source
+from lead_store import open_store
+
+DISCOVERY_COLUMNS = ["Category", "Name", "Location", "Address", "Pincode", "Contact_Number"]
+
+def test_phone_set_marks_first_occurrences_only():
+    seen = PhoneSet()
+    assert seen.add_new([9876543210, 9845012345, 9876543210]).tolist() == [True, True, False]
+    assert seen.add_new([9845012345, 9000000001]).tolist() == [False, True]
+    assert len(seen) == 3
+
+def test_phone_set_matches_a_python_set_across_compactions(monkeypatch):
+    monkeypatch.setattr(extract_contacts, "CHUNK_ROWS", 50)  # Compact often
+    rng = np.random.default_rng(3)
+    seen, reference = PhoneSet(), set()
+    for _ in range(40):
+        keys = rng.integers(6_000_000_000, 6_000_000_400, 60)
+        fresh = seen.add_new(keys)
+        expected = []
+        for k in keys.tolist():
+            expected.append(k not in reference)
+            reference.add(k)
+        assert fresh.tolist() == expected
+    assert len(seen) == len(reference)
+
+def test_detect_source():
+    assert detect_source(DISCOVERY_COLUMNS) == "discovery"
+    assert detect_source(["Name", "Contact", "Location", "Pin"]) == "indiamart"
+    with pytest.raises(ValueError):
+        detect_source(["Name", "Phone"])
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "parquet"])
+def test_sharded_writer_splits_rows(tmp_path, fmt):
+    writer = ShardedWriter(str(tmp_path / f"out.{fmt}"), fmt, ["Contact"], shard_rows=4)
+    writer.write(pd.DataFrame({"Contact": [str(i) for i in range(3)]}))
+    writer.write(pd.DataFrame({"Contact": [str(i) for i in range(3, 10)]}))
+    paths = writer.close()
+    assert [p.rsplit("/", 1)[1] for p in paths] == [f"out-0000{n}.{fmt}" for n in (1, 2, 3)]
+    read = {"csv": lambda p: pd.read_csv(p, dtype=str),
+            "jsonl": lambda p: pd.read_json(p, lines=True, dtype=str),
+            "parquet": pd.read_parquet}[fmt]
+    assert [len(read(p)) for p in paths] == [4, 4, 2]
+    assert pd.concat(read(p) for p in paths)["Contact"].tolist() == [str(i) for i in range(10)]
+
+def test_sharded_writer_without_rows_writes_a_header(tmp_path):
+    path = tmp_path / "out.csv"
+    assert ShardedWriter(str(path), "csv", ["Contact"]).close() == [str(path)]
+    assert path.read_text(encoding="utf-8").strip() == "Contact"
+
+def write_inputs(tmp_path):
+    discovery = tmp_path / "discovery.csv"
+    pd.DataFrame([
+        ["Rice Mill", "Durga Rice Mill", "", "Udupi", "576101", "98765 43210"],
+        ["Bakery", "Sweet Bakery", "", "Car Street, Udupi 576104", "N/A", "+91 98450 12345"],
+        ["Rice Mill", "Dup of Durga", "", "Udupi", "576101", "09876543210"],
+        ["Bakery", "No Phone", "", "", "576101", "Not Found"],
+    ], columns=DISCOVERY_COLUMNS).to_csv(discovery, index=False)
+    indiamart = tmp_path / "indiamart.csv.gz"
+    with gzip.open(indiamart, "wt", encoding="utf-8") as f:
+        pd.DataFrame({"Name": ["Durga Rice Mill", "Ganesh Hardware"], "Contact": ["9876543210", "0820 252 1234"],
+                      "Location": ["Udupi", "Manipal"], "Pin": ["576101", "576104"]}).to_csv(f, index=False)
+    return str(discovery), str(indiamart)
+
+def export(tmp_path, inputs, layout="crm", **filters):
+    writer = ShardedWriter(str(tmp_path / "out.jsonl"), "jsonl", list(extract_contacts.LAYOUTS[layout]))
+    exporter = ContactExporter(writer, layout, **filters)
+    for path in inputs:
+        exporter.export_file(path, chunk_rows=2)  # Several chunks per file
+    paths = writer.close()
+    with open(paths[0], encoding="utf-8") as f:
+        return [json.loads(line) for line in f], exporter.stats
+
+def test_export_dedups_across_files_and_chunks(tmp_path):
+    rows, stats = export(tmp_path, write_inputs(tmp_path))
+    assert [r["Phone_E164"] for r in rows] == ["+919876543210", "+919845012345", "+918202521234"]
+    assert rows[0]["Name"] == "Durga Rice Mill" and rows[0]["Source"] == "discovery"  # First file wins
+    assert rows[1]["Pincode"] == ""  # Placeholder blanked
+    assert rows[2]["Phone"] == "+91-820-2521234" and rows[2]["Phone_Kind"] == "landline"
+    assert stats == {"read": 6, "invalid": 1, "filtered": 0, "duplicates": 2, "written": 3}
+
+def test_export_filters_by_category_and_pincode(tmp_path):
+    inputs = write_inputs(tmp_path)
+    rows, _ = export(tmp_path, inputs, categories=["bakery"])
+    assert [r["Name"] for r in rows] == ["Sweet Bakery"]
+    # Pincode from the address when the column has none
+    rows, _ = export(tmp_path, inputs, pincodes=["576104"])
+    assert [r["Name"] for r in rows] == ["Sweet Bakery", "Ganesh Hardware"]
+
+def test_dialer_layout_and_sqlite_store_input(tmp_path):
+    store = open_store("sqlite", str(tmp_path / "leads.csv"), DISCOVERY_COLUMNS, ("Name", "Contact_Number"))
+    store.add(dict(zip(DISCOVERY_COLUMNS, ["Rice Mill", "Durga Rice Mill", "", "Udupi", "576101", "98765 43210"])))
+    store.add(dict(zip(DISCOVERY_COLUMNS, ["Bakery", "Sweet Bakery", "", "Udupi", "576104", "1111111111"])))
+    store.close()
+    rows, stats = export(tmp_path, [str(tmp_path / "leads.db")], layout="dialer")
+    assert rows == [{"Contact": "+919876543210"}]
+    assert stats["invalid"] == 1
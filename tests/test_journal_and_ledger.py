@@ -0,0 +1,78 @@
+import pandas as pd
+
+from enrichment_journal import EnrichmentJournal
+from task_ledger import TaskLedger
+
+def rows():
+    return pd.DataFrame({"EnterpriseName": ["A", "B", "C"], "Google_Phone": ["", "", ""]})
+
+def test_journal_replays_onto_a_fresh_frame(tmp_path):
+    path = str(tmp_path / "out.csv.journal")
+    journal = EnrichmentJournal(path)
+    df = rows()
+    journal.record(df, 0, Google_Phone="+919876543210", Source="Govt_List_Enriched")
+    journal.record(df, 2, Google_Phone="Not Found")
+    journal.record(df, 0, Google_Phone="+919845012345")  # Last record for a row wins
+    assert df.at[0, "Google_Phone"] == "+919845012345"
+    journal.close()
+
+    fresh = rows()
+    touched = EnrichmentJournal(path).replay(fresh)
+    assert touched == {0, 2}
+    assert fresh["Google_Phone"].tolist() == ["+919845012345", "", "Not Found"]
+    assert fresh.at[0, "Source"] == "Govt_List_Enriched"
+
+def test_journal_skips_a_truncated_last_line_and_unknown_rows(tmp_path):
+    path = tmp_path / "out.csv.journal"
+    path.write_text('{"i": 1, "Google_Phone": "+919876543210"}\n{"i": 9, "Google_Phone": "x"}\n{"i": 2, "Goo', encoding="utf-8")
+    df = rows()
+    assert EnrichmentJournal(str(path)).replay(df) == {1}
+    assert df.at[1, "Google_Phone"] == "+919876543210"
+
+def test_journal_compact_writes_csv_and_empties_the_journal(tmp_path):
+    path = str(tmp_path / "out.csv.journal")
+    output = str(tmp_path / "out.csv")
+    journal = EnrichmentJournal(path)
+    df = rows()
+    journal.record(df, 1, Google_Phone="+919876543210")
+    journal.compact(df, output)
+    journal.close()
+    assert pd.read_csv(output, dtype=str, keep_default_na=False)["Google_Phone"].tolist() == ["", "+919876543210", ""]
+    assert EnrichmentJournal(path).replay(rows()) == set()
+
+def test_ledger_last_update_wins_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "progress.txt")
+    ledger = TaskLedger(path)
+    ledger.start("maps", "576101", "Rice Mill", scrolled=40)
+    ledger.update("maps", "576101", "Rice Mill", last_index=17)
+    ledger.done("indiamart", "Malpe", "furniture", page=4)
+    ledger.close()
+
+    ledger = TaskLedger(path)
+    assert ledger.get("maps", "576101", "Rice Mill") == {"state": "running", "scrolled": 40, "last_index": 17}
+    assert ledger.is_done("indiamart", "Malpe", "furniture")
+    assert not ledger.is_done("maps", "576101", "Rice Mill")
+    assert ledger.summary("maps") == {"done": 0, "running": 1}
+    ledger.close()
+    # Compacted to one line per task on open
+    assert len((tmp_path / "progress.txt").read_text(encoding="utf-8").splitlines()) == 2
+
+def test_ledger_ignores_a_truncated_line(tmp_path):
+    path = tmp_path / "progress.txt"
+    path.write_text('{"task": ["maps", "1", "x"], "state": "done"}\n{"task": ["maps", "2"', encoding="utf-8")
+    ledger = TaskLedger(str(path))
+    assert ledger.is_done("maps", "1", "x")
+    assert ledger.summary() == {"done": 1, "running": 0}
+    ledger.close()
+
+def test_not_found_rows_stay_checked_after_compaction(tmp_path):
+    path = str(tmp_path / "out.csv.journal")
+    output = str(tmp_path / "out.csv")
+    journal = EnrichmentJournal(path)
+    df = rows()
+    journal.record(df, 0, Google_Phone="Not Found")
+    journal.compact(df, output)
+    journal.close()
+    resumed = pd.read_csv(output, dtype=str, keep_default_na=False)
+    assert resumed["Google_Checked"].ne("").tolist() == [True, False, False]
+    assert EnrichmentJournal(path).replay(resumed) == set()
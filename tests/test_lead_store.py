@@ -0,0 +1,71 @@
+import csv
+
+import pytest
+
+from lead_store import CsvLeadStore, SqliteLeadStore, normalize_key, open_store
+
+COLUMNS = ["Category", "Name", "Location", "Address", "Pincode", "Contact_Number"]
+KEYS = ("Name", "Contact_Number")
+
+def lead(name, phone, place_id=""):
+    return {"Category": "Rice Mill", "Name": name, "Location": "", "Address": "Udupi", "Pincode": "576101",
+            "Contact_Number": phone, "Place_Id": place_id}
+
+def read_rows(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+def test_normalize_key():
+    assert normalize_key("Durga Rice-Mill ") == "durgaricemill"
+    assert normalize_key("+91 98765 43210") == normalize_key("09876543210") == "9876543210"
+
+@pytest.mark.parametrize("backend", ["sqlite", "csv"])
+def test_dedup_on_normalized_key_and_place_id(tmp_path, backend):
+    store = open_store(backend, str(tmp_path / "leads.csv"), COLUMNS, KEYS, id_column="Place_Id")
+    assert store.add(lead("Durga Rice Mill", "9876543210", "p1"))
+    assert not store.add(lead("durga rice mill", "+91 98765 43210"))   # Same key, formatted differently
+    assert not store.add(lead("Durga Rice Mill (Udupi)", "9845012345", "p1"))  # Same place
+    assert store.add(lead("Ganesh Hardware", "9845012345", "p2"))
+    assert store.contains(lead("Ganesh Hardware", "9845012345"))
+    store.close()
+
+@pytest.mark.parametrize("backend", ["sqlite", "csv"])
+def test_both_backends_keep_place_id_across_resume(tmp_path, backend):
+    csv_path = str(tmp_path / "leads.csv")
+    store = open_store(backend, csv_path, COLUMNS, KEYS, id_column="Place_Id")
+    store.add(lead("Durga Rice Mill", "9876543210", "p1"))
+    store.export_csv(csv_path)
+    store.close()
+    rows = read_rows(csv_path)
+    assert list(rows[0]) == COLUMNS + ["Place_Id"]
+    assert rows[0]["Place_Id"] == "p1"
+
+    # A fresh store built from that CSV still knows the place
+    if backend == "sqlite":
+        (tmp_path / "leads.db").unlink()
+    resumed = open_store(backend, csv_path, COLUMNS, KEYS, id_column="Place_Id")
+    assert not resumed.add(lead("Renamed Mill", "9000000001", "p1"))
+    resumed.close()
+
+def test_csv_store_adds_place_id_column_to_an_old_file(tmp_path):
+    csv_path = tmp_path / "leads.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerow(lead("Durga Rice Mill", "9876543210"))
+    store = CsvLeadStore(str(csv_path), COLUMNS, KEYS, id_column="Place_Id")
+    assert not store.add(lead("Durga Rice Mill", "9876543210"))
+    assert store.add(lead("Ganesh Hardware", "9845012345", "p2"))
+    store.close()
+    rows = read_rows(csv_path)
+    assert [r["Place_Id"] for r in rows] == ["", "p2"]
+
+def test_sqlite_store_batches_and_dedups_pending_rows(tmp_path):
+    store = SqliteLeadStore(str(tmp_path / "leads.db"), "leads", COLUMNS, KEYS, id_column="Place_Id", batch_size=10)
+    assert store.add(lead("A", "9876543210"))
+    assert not store.add(lead("a", "9876543210"))  # Still pending, not yet in the table
+    assert store.inserted == 0
+    store.flush()
+    assert store.inserted == 1
+    assert not store.is_empty()
+    store.close()
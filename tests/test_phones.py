@@ -0,0 +1,69 @@
+import random
+
+import pandas as pd
+import pytest
+
+import phones
+from phones import dedup_leads, national_numbers, normalize_phone, normalize_phones, phone_key
+
+TRICKY = [
+    "9876543210", "+91 98765 43210", "091-98765-43210", "0091 9876543210", "09876543210", "919876543210",
+    "0820 252 1234", "+91 80-2345 6789", "(0820) 2521234", "08202521234",
+    "1111111111", "0000000000", "5555555555", "0123456789", "98765", "98765432101234", "",
+    "Not Found", "N/A", "nan", "-", "None", None, "  9876543210  ", "٩٨٧٦٥٤٣٢١٠", "+91 ٩٨٧٦٥ 43210",
+    "98450 12345, 98765 43210", "0820 2521234 / 2522345", "N/A, 9876543210", "12345; 98765 43210",
+    "9845012345 or 9876543210", "1111111111, 0000000000", ", ,",
+]
+
+def test_normalize_mobile_and_landline():
+    out = normalize_phones(pd.Series(["+91 98765 43210", "0820 252 1234", "Not Found"]))
+    assert out["Phone"].tolist() == ["+919876543210", "+91-820-2521234", ""]
+    assert out["Phone_E164"].tolist() == ["+919876543210", "+918202521234", ""]
+    assert out["Phone_Kind"].tolist() == ["mobile", "landline", "invalid"]
+    assert out["Phone_Valid"].tolist() == [True, True, False]
+
+def test_normalize_phone_scalar():
+    assert normalize_phone("098765 43210") == "+919876543210"
+    assert normalize_phone("1111111111") == "Not Found"
+    assert normalize_phone(None) == "Not Found"
+
+def test_cell_with_several_numbers_keeps_the_first_valid_one():
+    out = normalize_phones(pd.Series(["98450 12345, 98765 43210", "N/A / 0820 252 1234", "12345, 1111111111"]))
+    assert out["Phone"].tolist() == ["+919845012345", "+91-820-2521234", ""]
+    assert out["Phone_Valid"].tolist() == [True, True, False]
+    assert phone_key("98765; +91 98450 12345") == "9845012345"
+
+@pytest.mark.parametrize("raw", TRICKY)
+def test_phone_key_agrees_with_vectorized_rules(raw):
+    national, valid = national_numbers(pd.Series([raw]))
+    expected = national.iloc[0] if valid.iloc[0] else ""
+    assert phone_key(raw) == expected
+    e164 = normalize_phones(pd.Series([raw]))["Phone_E164"].iloc[0]
+    assert e164 == ("+91" + expected if expected else "")
+
+@pytest.mark.parametrize("dtype", ["string[pyarrow]", "string"])
+def test_phone_key_agrees_on_random_inputs(monkeypatch, dtype):
+    monkeypatch.setattr(phones, "STRING_DTYPE", dtype)  # With and without pyarrow's regex kernels
+    rng = random.Random(7)
+    alphabet = "0123456789 +-()9٩,/"
+    raws = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16))) for _ in range(3000)]
+    national, valid = national_numbers(pd.Series(raws))
+    vectorized = national.where(valid, "").fillna("").tolist()
+    assert [phone_key(r) for r in raws] == vectorized
+
+def test_dedup_leads_merges_sources_and_fills_blanks():
+    discovery = pd.DataFrame({"Name": ["Durga Rice Mill"], "Contact_Number": ["98765 43210"], "Category": ["Rice Mill"],
+                              "Address": ["N/A"], "Pincode": ["576101"]})
+    indiamart = pd.DataFrame({"Name": ["Durga Rice Mills"], "Contact": ["+91-9876543210"], "Location": ["Udupi"],
+                              "Pin": ["576101"]})
+    merged = dedup_leads([("discovery", discovery), ("indiamart", indiamart)])
+    assert len(merged) == 1
+    row = merged.iloc[0]
+    assert row["Name"] == "Durga Rice Mill"          # First source wins
+    assert row["Address"] == "Udupi"                 # Placeholder filled from the later source
+    assert row["Sources"] == "discovery|indiamart"
+    assert list(merged.columns) == phones.LEAD_COLUMNS
+
+def test_dedup_leads_drops_invalid_numbers():
+    df = pd.DataFrame({"Name": ["A", "B"], "Contact_Number": ["Not Found", "1111111111"]})
+    assert dedup_leads([("discovery", df)]).empty
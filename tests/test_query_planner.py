@@ -0,0 +1,63 @@
+import asyncio
+
+import query_planner
+from query_planner import PlannedTasks, QueryPlanner
+
+def place(n):
+    return f"https://www.google.com/maps/place/Shop+{n}/data=!4m2!3m1!1s0x{n:04x}:0x{n:04x}"
+
+def planner(tmp_path):
+    return QueryPlanner(str(tmp_path / "plan.db"))
+
+def test_first_finder_owns_places_and_overlap(tmp_path):
+    qp = planner(tmp_path)
+    own, overlap = qp.observe("Rice Mill", "576101", [place(i) for i in range(4)])
+    assert (own, overlap) == (4, 0.0)
+    own, overlap = qp.observe("Rice Mill", "576102", [place(i) for i in range(2, 6)])
+    assert own == 2 and overlap == 0.5
+    # Re-sweeping the same search is not overlap with itself
+    own, overlap = qp.observe("Rice Mill", "576101", [place(i) for i in range(4)])
+    assert (own, overlap) == (4, 0.0)
+    qp.close()
+
+def test_saturated_search_is_skipped(tmp_path):
+    qp = planner(tmp_path)
+    qp.observe("Rice Mill", "576101", [place(i) for i in range(20)])
+    for _ in range(query_planner.SATURATED_SWEEPS):
+        qp.observe("Rice Mill", "576102", [place(i) for i in range(20)])
+    assert qp.skip_reason("Rice Mill", "576102").startswith("saturated")
+    assert qp.skip_reason("Rice Mill", "576101") is None
+    qp.close()
+
+def test_empty_search_is_not_reported_as_saturated(tmp_path):
+    qp = planner(tmp_path)
+    for _ in range(query_planner.SATURATED_SWEEPS):
+        own, overlap = qp.observe("Rice Mill", "576103", [])
+        assert (own, overlap) == (0, 0.0)
+    assert qp.skip_reason("Rice Mill", "576103").startswith("empty")
+    qp.close()
+
+def test_history_survives_reopen(tmp_path):
+    qp = planner(tmp_path)
+    qp.observe("Rice Mill", "576101", [place(1)])
+    qp.close()
+    qp = planner(tmp_path)
+    own, _ = qp.observe("Rice Mill", "576102", [place(1)])
+    assert own == 0
+    qp.close()
+
+def test_planned_tasks_run_highest_expected_yield_first(tmp_path):
+    qp = planner(tmp_path)
+    qp.observe("Rice Mill", "576101", [place(i) for i in range(3)])
+    qp.observe("Bakery", "576101", [place(i) for i in range(100, 130)])
+    tasks = PlannedTasks([("576101", "Rice Mill"), ("576101", "Bakery"), ("576105", "Dairy Farm")], qp)
+
+    async def drain():
+        order = []
+        while (item := await tasks.next()) is not None:
+            order.append(item)
+        return order
+
+    # Never-searched first (UNKNOWN_EXPECTED), then by past yield
+    assert asyncio.run(drain()) == [("576105", "Dairy Farm"), ("576101", "Bakery"), ("576101", "Rice Mill")]
+    qp.close()